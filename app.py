@@ -1,19 +1,24 @@
 #!/usr/bin/env python3
 """
-Medical AI Poster Generator - Hugging Face API Only Version
-FORCED API USAGE - No fallback to templates
+Medical AI Poster Generator - Hugging Face API Version
+Hugging Face API first; falls back to a template background only when the
+API misses the per-request latency budget (POSTER_LATENCY_BUDGET)
 DEBUG VERSION with comprehensive error handling
 """
 
 import gradio as gr
 import sys
 from pathlib import Path
-import tempfile
 from PIL import Image
 import os
 from dotenv import load_dotenv
 import datetime
+import json
 import traceback
+import time
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables
 load_dotenv()
@@ -23,13 +28,53 @@ sys.path.append(str(Path(__file__).parent))
 
 from modules.text_analyzer import EnhancedTextAnalyzer
 from modules.hf_api_generator import HuggingFaceAPIGenerator
+from modules.image_generator import DynamicImageGenerator
 from modules.layout_designer import EnhancedLayoutDesigner
 from modules.style_selector import StyleSelector
 from modules.branding import Branding
 from modules.caption_generator import CaptionGenerator
+from modules.process_pool import CompositingPool, compose_poster
+from modules.deadline import Deadline, DeadlineExceeded, call_with_deadline, wait_with_deadline
+from modules.variants import plan_variants
+from modules.stage_cache import StageCache, fingerprint
+from modules.output_store import OutputStore
+from modules.cache_backends import create_cache_backend, cache_key
+from modules.scheduler import FairScheduler, QuotaExceeded
+from modules.job_queue import JobQueue, JobCancelled
+from modules.job_api import create_job_router
+from modules.profiling import RequestProfiler, current_task_profiles
+from modules.speculation import Speculator
+from modules.model_warmer import ModelWarmer
+from modules.ledger import GenerationLedger, StageClock
+from modules.autotuner import LatencyModel, AutoTuner
+from modules.pixel_cache import MmapPixelCache
+from modules.prompt_canonicalizer import PromptCanonicalizer
+from modules.print_renderer import print_pixel_size, render_print
+from modules.example_cache import ExampleCache, render_version
+from modules.pipeline import TaskGraph
+from modules.token_pool import TokenPool, load_tokens
+from utils.image_utils import thumbnail_pyramid
 from config import (
-    OUTPUT_DIR, DEFAULT_LOGO_PATH,
-    DEFAULT_FONT_PATH, DEFAULT_BOLD_FONT_PATH, COLOR_PALETTES, HF_MODELS
+    OUTPUT_DIR, DEFAULT_LOGO_PATH, ICONS_DIR,
+    DEFAULT_FONT_PATH, DEFAULT_BOLD_FONT_PATH, COLOR_PALETTES, HF_MODELS,
+    POSTER_SIZES, COMPOSITE_WORKERS,
+    POSTER_LATENCY_BUDGET, POSTER_COMPOSE_RESERVE,
+    POSTER_STORE_DIR, OUTPUT_RETENTION_HOURS, OUTPUT_MAX_MB, OUTPUT_SWEEP_INTERVAL,
+    CACHE_BACKEND, CACHE_DIR, CACHE_URL, CACHE_MAX_MB,
+    HF_TOKEN_REQUESTS_PER_WINDOW, HF_TOKEN_WINDOW_SECONDS, HF_TOKEN_MAX_CONCURRENT,
+    SCHEDULER_MAX_WAIT, JOBS_DB_PATH, JOB_WORKERS,
+    PROFILES_DIR, POSTER_PROFILE, POSTER_PROFILE_SAMPLE_RATE,
+    SPECULATIVE_GENERATION, SPECULATION_DEBOUNCE, SPECULATION_MAX_IN_FLIGHT, SPECULATION_MIN_HEADROOM,
+    MODEL_WARMUP_INTERVAL, MODEL_WARMUP_MODELS, MODEL_WARM_TTL, MODEL_WARMUP_MIN_HEADROOM,
+    MODEL_COLD_START_FACTOR, MODEL_LOADING_TIMEOUT,
+    LEDGER_ENABLED, LEDGER_DB_PATH, DRAFT_STEPS, DRAFT_SIZE, DRAFT_MODEL,
+    MODEL_PROFILES, AUTOTUNE_TARGET_SECONDS, LATENCY_WINDOW, LATENCY_MAX_AGE, MODEL_COLD_PENALTY,
+    PIXEL_CACHE_DIR, PIXEL_CACHE_MB, PIXEL_CACHE_PROMOTE_AFTER, PIXEL_CACHE_IDLE_SECONDS,
+    PROMPT_CANONICALIZATION, ACCURACY_BUCKETS,
+    PRINT_DPI, PRINT_FORMATS, PRINT_STRIP_HEIGHT, PRINT_PREVIEW_SIZE,
+    EXAMPLE_PROMPTS, EXAMPLES_PRECOMPUTE, EXAMPLE_POSTER_SIZES, PIPELINE_WORKERS,
+    HF_API_TOKENS, HF_API_TOKENS_FILE, TOKEN_RATE_LIMIT_COOLDOWN, TOKEN_INVALID_COOLDOWN,
+    THUMBNAIL_WIDTHS, THUMBNAIL_QUALITY, THUMBNAIL_PLACEHOLDER_WIDTH
 )
 
 def safe_str(value, default=""):
@@ -55,12 +100,19 @@ def safe_get_percentage(key_phrases):
         return '95%'
 
 class APIPosterGenerator:
-    def __init__(self):
-        """Initialize with Hugging Face API only"""
+    def __init__(self, precompute_examples=EXAMPLES_PRECOMPUTE, job_queue=True, model_warmup=True):
+        """Initialize with Hugging Face API only
+        
+        Batch tools pass job_queue=False, model_warmup=False and
+        precompute_examples=False to get the pipeline without the job
+        workers (and the shared jobs database), keep-warm pings or
+        example rendering.
+        """
         print("\n" + "="*60)
         print("🏥 MEDICAL AI POSTER GENERATOR (HF API ONLY MODE)")
         print("="*60)
-        print("\n⚠️  This version uses ONLY Hugging Face API - NO fallback!")
+        print("\n⚠️  This version uses Hugging Face API for all backgrounds")
+        print("⚠️  Template fallback is used only when the latency budget runs out")
         print("⚠️  API token is REQUIRED for all generations")
         print("\n📝 Initializing components...")
         
@@ -79,31 +131,320 @@ class APIPosterGenerator:
         self.caption_generator = CaptionGenerator()
         print("  ✓ Caption Generator loaded")
         
+        # Degraded-mode background when the API misses the latency budget
+        self.fallback_generator = DynamicImageGenerator(ICONS_DIR)
+        self.latency_budget = POSTER_LATENCY_BUDGET
+        print(f"  ✓ Template fallback loaded (budget: {self.latency_budget:.0f}s)")
+        
+        # Threads running each request's background-independent stages during the API call
+        self.pipeline_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+        
+        # Optional process pool for resize/layout/branding/encoding
+        self.compositing_pool = None
+        if COMPOSITE_WORKERS > 0:
+            self.compositing_pool = CompositingPool(
+                DEFAULT_FONT_PATH, DEFAULT_BOLD_FONT_PATH, DEFAULT_LOGO_PATH,
+                max_workers=COMPOSITE_WORKERS,
+                warm_sizes=sorted(set(POSTER_SIZES.values()))
+            )
+            print(f"  ✓ Compositing pool started ({COMPOSITE_WORKERS} workers)")
+        else:
+            self.layout_designer.warm(sorted(set(POSTER_SIZES.values())))
+            self.branding.warm()
+        
+        # Shared image/artifact cache (memory, file or network backend)
+        self.cache = create_cache_backend(
+            CACHE_BACKEND, cache_dir=CACHE_DIR, cache_url=CACHE_URL,
+            max_bytes=int(CACHE_MAX_MB * 1024 * 1024)
+        )
+        print(f"  ✓ Cache backend: {type(self.cache).__name__ if self.cache else 'disabled'}")
+        
+        # Raw-pixel tier for hot backgrounds (memory-mapped, shared via the page cache)
+        self.pixel_cache = None
+        if PIXEL_CACHE_MB > 0:
+            self.pixel_cache = MmapPixelCache(
+                PIXEL_CACHE_DIR, max_bytes=int(PIXEL_CACHE_MB * 1024 * 1024),
+                promote_after=PIXEL_CACHE_PROMOTE_AFTER, idle_seconds=PIXEL_CACHE_IDLE_SECONDS
+            )
+            print(f"  ✓ Pixel cache: {PIXEL_CACHE_DIR} ({self.pixel_cache.stats()['entries']} hot backgrounds)")
+        
+        # Stable generation keys so equivalent campaigns share backgrounds
+        self.canonicalizer = None
+        if PROMPT_CANONICALIZATION:
+            self.canonicalizer = PromptCanonicalizer(accuracy_buckets=ACCURACY_BUCKETS)
+            print(f"  ✓ Prompt canonicalization (accuracy buckets: {ACCURACY_BUCKETS})")
+        
+        # Per-token quotas and fair queuing across users sharing tokens
+        self.scheduler = FairScheduler(
+            requests_per_window=HF_TOKEN_REQUESTS_PER_WINDOW,
+            window_seconds=HF_TOKEN_WINDOW_SECONDS,
+            max_concurrent=HF_TOKEN_MAX_CONCURRENT,
+            max_wait=SCHEDULER_MAX_WAIT
+        )
+        print(f"  ✓ Fair scheduler ready ({HF_TOKEN_REQUESTS_PER_WINDOW} requests / {HF_TOKEN_WINDOW_SECONDS:.0f}s per token)")
+        
+        # Calls on the service's own tokens are spread over the pool
+        self.token_pool = None
+        pool_tokens = load_tokens(HF_API_TOKENS, HF_API_TOKENS_FILE, primary=os.getenv("HF_API_TOKEN", ""))
+        if len(pool_tokens) > 1:
+            self.token_pool = TokenPool(
+                pool_tokens, scheduler=self.scheduler,
+                rate_limit_cooldown=TOKEN_RATE_LIMIT_COOLDOWN, invalid_cooldown=TOKEN_INVALID_COOLDOWN
+            )
+            print(f"  ✓ Token pool with {len(pool_tokens)} HF API tokens")
+        
+        # Backgrounds generated ahead of the click while the prompt is edited
+        self.speculator = Speculator(
+            max_in_flight=SPECULATION_MAX_IN_FLIGHT, debounce_seconds=SPECULATION_DEBOUNCE
+        )
+        
         # Track API instances
         self.api_generators = {}
         self.current_api = None
         
-        self.temp_dir = tempfile.mkdtemp()
+        # Rolling latency model behind the model/steps auto-tuner (real generations only;
+        # warm-up pings are too small to measure throughput and are dropped)
+        self.latency_model = LatencyModel(
+            priors={HF_MODELS[name]: profile['seconds_per_step']
+                    for name, profile in MODEL_PROFILES.items() if name in HF_MODELS},
+            window=LATENCY_WINDOW, max_age=LATENCY_MAX_AGE
+        )
+        
+        # Warm/cold tracking per model, with keep-warm pings on the server token
+        self.model_warmer = ModelWarmer(
+            HF_MODELS, get_generator=self._api_generator, scheduler=self.scheduler,
+            api_token=self.default_token(),
+            interval=MODEL_WARMUP_INTERVAL, warm_ttl=MODEL_WARM_TTL,
+            min_headroom=MODEL_WARMUP_MIN_HEADROOM,
+            ping_names=None if "all" in MODEL_WARMUP_MODELS else MODEL_WARMUP_MODELS,
+            cold_factor=MODEL_COLD_START_FACTOR, loading_timeout=MODEL_LOADING_TIMEOUT
+        )
+        if model_warmup and self.model_warmer.start():
+            print(f"  ✓ Model warm-up every {MODEL_WARMUP_INTERVAL:.0f}s ({len(self.model_warmer.ping_names)} models)")
+        
+        self.autotuner = AutoTuner(
+            HF_MODELS, MODEL_PROFILES, self.latency_model,
+            model_status=self.model_warmer.status, cold_penalty=MODEL_COLD_PENALTY
+        )
+        
+        self.output_store = OutputStore(
+            POSTER_STORE_DIR,
+            max_age_seconds=OUTPUT_RETENTION_HOURS * 3600,
+            max_total_bytes=int(OUTPUT_MAX_MB * 1024 * 1024),
+            sweep_interval=OUTPUT_SWEEP_INTERVAL
+        )
+        print(f"  ✓ Output store ready ({self.output_store.stats()['entries']} posters)")
+        
+        # Opt-in per-request profiling (UI toggle, POSTER_PROFILE or 1-in-N sampling)
+        self.profiler = RequestProfiler(
+            PROFILES_DIR, always=POSTER_PROFILE, sample_rate=POSTER_PROFILE_SAMPLE_RATE
+        )
+        
+        # Append-only record of every generation (python -m modules.ledger report)
+        self.ledger = GenerationLedger(LEDGER_DB_PATH) if LEDGER_ENABLED else None
+        if self.ledger is not None:
+            print(f"  ✓ Generation ledger: {LEDGER_DB_PATH}")
+        
+        # Persistent queue behind the asynchronous job API
+        self.job_queue = None
+        if job_queue:
+            self.job_queue = JobQueue(JOBS_DB_PATH, self._run_job, num_workers=JOB_WORKERS)
+            print(f"  ✓ Job queue ready ({JOB_WORKERS} workers, {self.job_queue.counts()})")
+        
+        # Example posters served instantly on click, rendered in the background
+        self.example_cache = ExampleCache(
+            self.output_store, EXAMPLE_PROMPTS, EXAMPLE_POSTER_SIZES, render_version(COLOR_PALETTES)
+        )
+        if precompute_examples and self.example_cache.start(self.generate_poster, self.default_token()):
+            print("  ✓ Precomputing example posters in the background")
         
         print("\n" + "="*60)
         print("✅ SYSTEM READY!")
         print("="*60)
         print("\n🔑 API Token required: https://huggingface.co/settings/tokens")
-        print("🚀 Access the UI at: http://localhost:7860\n")
+        print("🚀 Access the UI at: http://localhost:7860")
+        print("📮 Job API at: http://localhost:7860/api/jobs\n")
     
     def get_api_generator(self, token, model_name):
-        """Get or create API generator instance"""
+        """Get or create API generator instance and make it the current one"""
+        self.current_api = self._api_generator(token, model_name)
+        return self.current_api
+    
+    def _api_generator(self, token, model_name):
+        """Get or create API generator instance (background callers: leaves current_api alone)"""
         model_id = HF_MODELS.get(model_name, "black-forest-labs/FLUX.1-schnell")
-        key = f"{token}_{model_id}"
+        pooled = self.token_pool is not None and token in self.token_pool
+        key = f"pool_{model_id}" if pooled else f"{token}_{model_id}"
         
         if key not in self.api_generators:
             self.api_generators[key] = HuggingFaceAPIGenerator(
                 api_token=token.strip(),
-                model_id=model_id
+                model_id=model_id,
+                cache=self.cache,
+                scheduler=self.scheduler,
+                latency_observer=self._observe_latency,
+                canonicalizer=self.canonicalizer,
+                token_pool=self.token_pool if pooled else None
             )
+        return self.api_generators[key]
+    
+    def default_token(self):
+        """Server-side token (HF_API_TOKEN, else the first pooled token)"""
+        token = os.getenv("HF_API_TOKEN", "").strip()
+        if not token and self.token_pool is not None:
+            token = self.token_pool.tokens[0]
+        return token
+    
+    def token_pool_report(self):
+        """UI hook: per-token usage of the token pool"""
+        return self.token_pool.report() if self.token_pool is not None else ""
+    
+    def _observe_latency(self, model_id, seconds, loading=False, steps=None, size=None):
+        """Feed API latencies to the warm/cold tracker and the auto-tuner"""
+        self.model_warmer.observe(model_id, seconds, loading=loading, steps=steps, size=size)
+        if not loading and steps:
+            self.latency_model.observe(model_id, seconds, steps, *(size or (1024, 1024)))
+    
+    def predict_wait(self, auto_tune, target_seconds, api_token, selected_model, inference_steps):
+        """UI hook: predicted wait for the current settings, or the auto-tuned choice
         
-        self.current_api = self.api_generators[key]
-        return self.current_api
+        Returns updates for the model dropdown, the steps slider and the
+        predicted-wait text.
+        """
+        queue_wait = 0.0
+        if api_token and api_token.strip():
+            token = api_token.strip()
+            if self.token_pool is not None and token in self.token_pool:
+                token = self.token_pool.peek('interactive') or token
+            queue_wait = self.scheduler.estimate_wait(token, 'interactive')
+        
+        if auto_tune:
+            name, steps, seconds, source = self.autotuner.choose(target_seconds)
+            verdict = "meets" if seconds + queue_wait <= target_seconds else "exceeds"
+            text = (f"🎯 Auto-tuned: **{name}**, {steps} steps · ⏱️ predicted wait ~{seconds + queue_wait:.0f}s "
+                    f"({verdict} the {target_seconds:.0f}s target; {source})")
+            model_update, steps_update = gr.update(value=name), gr.update(value=steps)
+        else:
+            if selected_model not in HF_MODELS:
+                return gr.update(), gr.update(), ""
+            seconds, source = self.autotuner.predict(selected_model, int(inference_steps))
+            text = f"⏱️ Predicted wait: ~{seconds + queue_wait:.0f}s ({source})"
+            model_update, steps_update = gr.update(), gr.update()
+        if queue_wait > 0:
+            text += f" · includes ~{queue_wait:.0f}s in the API queue"
+        return model_update, steps_update, text
+    
+    def _analyze_text(self, prompt, tone_override):
+        """Run text analysis, going through the shared artifact cache if configured"""
+        artifact_key = cache_key("analysis", prompt, tone_override)
+        if self.cache is not None:
+            cached = self.cache.get(artifact_key)
+            if cached is not None:
+                artifact = json.loads(cached.decode('utf-8'))
+                return artifact['key_phrases'], artifact['tone']
+        
+        key_phrases = self.text_analyzer.extract_key_phrases(prompt)
+        
+        if tone_override != "Auto-detect":
+            tone = {'primary_tone': tone_override.lower()}
+        else:
+            tone = self.text_analyzer.determine_tone(prompt)
+        
+        if self.cache is not None:
+            artifact = {'key_phrases': key_phrases, 'tone': tone}
+            self.cache.set(artifact_key, json.dumps(artifact).encode('utf-8'))
+        return key_phrases, tone
+    
+    def _background_inputs(self, api_gen, key_phrases, tone, image_style, inference_steps, guidance_scale,
+                           api_size=(1024, 1024), seed=None):
+        """Everything the API background depends on (stage cache and speculation key)"""
+        return (
+            api_gen.model_id, api_gen.build_prompt(key_phrases, tone, image_style),
+            inference_steps, guidance_scale, tuple(api_size), seed
+        )
+    
+    def speculate(
+        self,
+        enabled,
+        prompt,
+        api_token,
+        selected_model,
+        tone_override,
+        inference_steps,
+        guidance_scale,
+        image_style,
+        request: gr.Request = None
+    ):
+        """Debounced UI hook: start the background generation before the click
+        
+        Returns at once; after SPECULATION_DEBOUNCE seconds without a newer
+        edit, _speculate runs on the speculator's timer thread and
+        speculation_status() reports how it is going.
+        """
+        user_id = getattr(request, 'session_hash', None) or "anonymous"
+        if not enabled or not prompt or not api_token or not api_token.strip():
+            self.speculator.cancel(user_id)
+            return ""
+        self.speculator.schedule(user_id, lambda: self._speculate(
+            prompt, api_token, selected_model, tone_override, inference_steps, guidance_scale,
+            image_style, user_id
+        ))
+        return "⏳ Pre-generation scheduled..."
+    
+    def speculation_status(self, request: gr.Request = None):
+        """UI hook: status of the user's last speculation"""
+        user_id = getattr(request, 'session_hash', None) or "anonymous"
+        result = self.speculator.result(user_id)
+        if result is None:
+            return gr.update()
+        if isinstance(result, str):
+            return result
+        state, key = result
+        if state in ('started', 'running'):
+            state = self.speculator.status(key) or 'failed'
+        return {
+            'running': "⚡ Pre-generating background...",
+            'ready': "✅ Background ready - generate will be instant",
+            'busy': "⏸️ Pre-generation busy, will retry on next edit",
+            'failed': ""
+        }[state]
+    
+    def _speculate(self, prompt, api_token, selected_model, tone_override, inference_steps, guidance_scale,
+                   image_style, user_id):
+        """Run analysis on the settled inputs and, if the derived generation key
+        is new, generate the background at batch priority. Skipped while the
+        token's quota headroom is below SPECULATION_MIN_HEADROOM.
+        
+        Returns (Speculator.submit state, generation key), or a status message
+        when nothing was submitted.
+        """
+        try:
+            api_gen = self._api_generator(api_token, selected_model)
+            key_phrases, tone = self._analyze_text(prompt, tone_override)
+            key = self._background_inputs(api_gen, key_phrases, tone, image_style, inference_steps, guidance_scale)
+            
+            if self.speculator.status(key) is None:
+                quota_token = api_gen.quota_token('batch')
+                headroom = self.scheduler.headroom(quota_token)
+                if headroom < SPECULATION_MIN_HEADROOM or self.scheduler.estimate_wait(quota_token, 'batch') > 0:
+                    return f"⏸️ Pre-generation paused: API quota headroom {headroom:.0%}"
+            
+            state = self.speculator.submit(user_id, key, lambda: api_gen.generate_image(
+                key_phrases=key_phrases,
+                tone=tone,
+                colors=None,
+                num_inference_steps=inference_steps,
+                guidance_scale=guidance_scale,
+                style=image_style,
+                enhance=False,
+                user_id=user_id,
+                priority='batch'
+            ))
+        except Exception as e:
+            print(f"Warning: Speculative generation skipped: {e}")
+            return ""
+        
+        return state, key
     
     def generate_poster(
         self,
@@ -117,10 +458,129 @@ class APIPosterGenerator:
         poster_size,
         inference_steps,
         guidance_scale,
-        image_style
+        image_style,
+        variant_count=1,
+        session_cache=None,
+        profile_request=False,
+        progress_callback=None,
+        priority="interactive",
+        quality="final",
+        seed=None,
+        request: gr.Request = None
+    ):
+        """Generate poster via Hugging Face API (template fallback on deadline) with comprehensive error handling
+        
+        session_cache is the caller's StageCache; when the analysis inputs or the
+        API prompt/settings are unchanged, the cached artifacts are reused.
+        profile_request forces a cProfile report for this request (see RequestProfiler).
+        progress_callback(stage) is called as each stage starts (used by the job API).
+        quality="draft" generates a DRAFT_STEPS / DRAFT_SIZE background; seed makes
+        the background reproducible so a draft can be finalized.
+        """
+        run_info = {}
+        args = (
+            prompt, api_token, selected_model, tone_override, color_scheme,
+            include_logo, logo_position, poster_size, inference_steps,
+            guidance_scale, image_style, variant_count, session_cache,
+            progress_callback, priority, quality, seed, request, run_info
+        )
+        started = time.monotonic()
+        report_path = None
+        if not self.profiler.should_profile(profile_request):
+            result = self._generate_poster(*args)
+        else:
+            result, report_path = self.profiler.run("generate_poster", self._generate_poster, *args)
+        self._record_generation(args, result, run_info, time.monotonic() - started)
+        
+        if report_path:
+            poster, caption, status, variants, output_path = result
+            status += f"\n\n🐞 Profile saved: {report_path}"
+            result = (poster, caption, status, variants, output_path)
+        return result
+    
+    def _record_generation(self, args, result, run_info, total_seconds):
+        """Queue a ledger entry for one generate_poster run"""
+        if self.ledger is None:
+            return
+        try:
+            (prompt, _, selected_model, tone_override, color_scheme, include_logo, logo_position,
+             poster_size, inference_steps, guidance_scale, image_style, variant_count) = args[:12]
+            poster, _, status_text, _, _ = result
+            if 'clock' in run_info:
+                run_info['clock'].finish()
+            
+            if poster is None:
+                outcome = 'error'
+            elif run_info.get('cache_outcome') == 'fallback':
+                outcome = 'degraded'
+            else:
+                outcome = 'ok'
+            
+            self.ledger.record(
+                param_hash=fingerprint(
+                    prompt, selected_model, tone_override, color_scheme, include_logo, logo_position,
+                    poster_size, inference_steps, guidance_scale, image_style, variant_count
+                ),
+                prompt_hash=fingerprint(prompt),
+                generation_key=run_info.get('generation_key'),
+                prompt=prompt,
+                model=run_info.get('model', HF_MODELS.get(selected_model, selected_model)),
+                steps=run_info.get('steps', inference_steps),
+                guidance=guidance_scale,
+                size=poster_size,
+                style=image_style,
+                priority=args[14],
+                quality=args[15],
+                outcome=outcome,
+                cache_outcome=run_info.get('cache_outcome'),
+                retries=run_info.get('retries', 0),
+                total_seconds=round(total_seconds, 4),
+                stage_timings=run_info['clock'].timings if 'clock' in run_info else {},
+                output_bytes=run_info.get('output_bytes'),
+                error=status_text.splitlines()[0] if outcome == 'error' and status_text else None
+            )
+        except Exception as e:
+            print(f"Warning: Could not record generation in ledger: {e}")
+    
+    def _generate_poster(
+        self,
+        prompt,
+        api_token,
+        selected_model,
+        tone_override,
+        color_scheme,
+        include_logo,
+        logo_position,
+        poster_size,
+        inference_steps,
+        guidance_scale,
+        image_style,
+        variant_count,
+        session_cache,
+        progress_callback,
+        priority,
+        quality,
+        seed,
+        request,
+        run_info
     ):
-        """Generate poster using ONLY Hugging Face API with comprehensive error handling"""
+        """Poster pipeline behind generate_poster
+        
+        run_info collects stage timings, cache outcome, retries and output
+        size for the generation ledger.
+        """
         try:
+            deadline = Deadline(self.latency_budget)
+            if session_cache is None:
+                session_cache = StageCache()
+            user_id = getattr(request, 'session_hash', None) or "anonymous"
+            stage_clock = run_info['clock'] = StageClock()
+            
+            def report_progress(stage, fraction=None):
+                stage_clock.start(stage)
+                if progress_callback is not None:
+                    progress_callback(stage, fraction)
+            
             status_lines = []
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
@@ -129,7 +589,7 @@ class APIPosterGenerator:
                 error_msg = "❌ ERROR: API Token Missing\n\n"
                 error_msg += "Please enter your Hugging Face API token to continue.\n"
                 error_msg += "Get your free token at: https://huggingface.co/settings/tokens"
-                return None, "", error_msg
+                return None, "", error_msg, [], None
             
             # Initialize API generator
             try:
@@ -137,24 +597,39 @@ class APIPosterGenerator:
                 status_lines.append(f"✅ HF API CONNECTED")
                 status_lines.append(f"   • Model: {selected_model}")
                 status_lines.append(f"   • Token: {api_token[:8]}...{api_token[-4:]}")
+                if api_gen.token_pool is not None:
+                    status_lines.append(f"   • Token pool: {len(api_gen.token_pool.available())}/{len(api_gen.token_pool)} "
+                                        f"tokens in rotation, least-loaded per call")
+                
+                # Drafts: few steps at low resolution, optionally on a faster model
+                api_size = (1024, 1024)
+                if quality == 'draft':
+                    if DRAFT_MODEL and DRAFT_MODEL in HF_MODELS:
+                        api_gen = self.get_api_generator(api_token, DRAFT_MODEL)
+                    inference_steps = min(int(inference_steps), DRAFT_STEPS)
+                    api_size = (DRAFT_SIZE, DRAFT_SIZE)
+                    status_lines.append(f"   ✏️ DRAFT: {inference_steps} steps at {DRAFT_SIZE}px on {api_gen.model_id}")
+                if seed is not None:
+                    status_lines.append(f"   • Seed: {seed}")
+                run_info['model'] = api_gen.model_id
+                run_info['steps'] = inference_steps
                 status_lines.append("")
             except Exception as e:
                 error_trace = traceback.format_exc()
-                return None, "", f"❌ Failed to initialize API:\n{str(e)}\n\n{error_trace}"
+                return None, "", f"❌ Failed to initialize API:\n{str(e)}\n\n{error_trace}", [], None
+            
+            report_progress('analysis')
             
             # Text Analysis
             try:
                 status_lines.append("📊 STEP 1: Text Analysis")
-                key_phrases = self.text_analyzer.extract_key_phrases(prompt)
-                
-                # DEBUG: Print key_phrases structure
-                print(f"DEBUG - key_phrases type: {type(key_phrases)}")
-                print(f"DEBUG - key_phrases: {key_phrases}")
                 
-                if tone_override != "Auto-detect":
-                    tone = {'primary_tone': tone_override.lower()}
-                else:
-                    tone = self.text_analyzer.determine_tone(prompt)
+                (key_phrases, tone), reused = session_cache.get_or_compute(
+                    'analysis', (prompt, tone_override),
+                    lambda: self._analyze_text(prompt, tone_override)
+                )
+                if reused:
+                    status_lines.append("   ♻️ Reused cached analysis")
                 
                 # Safe extraction with type checking
                 conditions = key_phrases.get('conditions', ['medical'])
@@ -171,141 +646,345 @@ class APIPosterGenerator:
                 
             except Exception as e:
                 error_trace = traceback.format_exc()
-                return None, "", f"❌ Text analysis failed:\n{str(e)}\n\n{error_trace}"
+                return None, "", f"❌ Text analysis failed:\n{str(e)}\n\n{error_trace}", [], None
             
-            # Get headline
-            try:
-                headlines = self.text_analyzer.generate_headline(key_phrases)
-                selected_headline = safe_str(headlines[0] if headlines else "AI Medical Diagnosis", "AI Medical Diagnosis")
-            except Exception as e:
-                print(f"Warning: Headline generation failed: {e}")
-                selected_headline = "AI Medical Diagnosis"
+            target_size = POSTER_SIZES.get(poster_size, (1080, 1080))
+            print_size = None
+            if poster_size in PRINT_FORMATS:
+                # Print mode: compose a screen preview now, the full-size TIFF at save time
+                print_size = print_pixel_size(PRINT_FORMATS[poster_size], PRINT_DPI)
+                preview_scale = PRINT_PREVIEW_SIZE / max(print_size)
+                target_size = (round(print_size[0] * preview_scale), round(print_size[1] * preview_scale))
             
-            # Color Selection
-            try:
-                if color_scheme != "Auto-detect":
-                    colors = COLOR_PALETTES[color_scheme.lower()]
-                else:
-                    colors = self.style_selector.select_colors(tone)
-            except Exception as e:
-                print(f"Warning: Color selection failed: {e}")
-                colors = COLOR_PALETTES['professional']
+            report_progress('image')
             
-            # Generate Image via API (NO FALLBACK)
-            try:
-                status_lines.append("🎨 STEP 2: HF API Image Generation")
-                status_lines.append(f"   • Sending request to Hugging Face...")
-                status_lines.append(f"   • Style: {image_style}")
-                status_lines.append(f"   • Steps: {inference_steps}")
-                
-                image = api_gen.generate_image(
+            # The background only depends on the analysis: the pipeline workers build
+            # every background-independent artifact while this thread waits for it
+            status_lines.append("🎨 STEP 2: HF API Image Generation")
+            status_lines.append(f"   • Sending request to Hugging Face...")
+            status_lines.append(f"   • Style: {image_style}")
+            status_lines.append(f"   • Steps: {inference_steps}")
+            if deadline.budget:
+                status_lines.append(f"   • Budget: {deadline.remaining():.0f}s remaining")
+            if self.canonicalizer is not None:
+                generation_key, raw_variants = self.canonicalizer.record(key_phrases, tone, image_style)
+                run_info['generation_key'] = generation_key
+                status_lines.append(f"   • Generation key: {generation_key} "
+                                    f"({raw_variants} distinct input variant(s) share it)")
+            
+            api_deadline = deadline.with_reserve(POSTER_COMPOSE_RESERVE)
+            api_call_stats = {}
+            background_inputs = self._background_inputs(
+                api_gen, key_phrases, tone, image_style, inference_steps, guidance_scale,
+                api_size, seed
+            )
+            pixel_key = self.pixel_cache.key(background_inputs, tuple(target_size)) if self.pixel_cache else None
+            
+            def fetch_background():
+                # Attach to a speculative generation of the same key if one exists
+                speculative = self.speculator.claim(background_inputs)
+                if speculative is not None:
+                    run_info['cache_outcome'] = 'speculative'
+                    try:
+                        return wait_with_deadline(api_deadline, speculative)
+                    except DeadlineExceeded:
+                        raise
+                    except Exception as e:
+                        print(f"Warning: Speculative generation failed, calling API: {e}")
+                run_info['cache_outcome'] = None
+                return call_with_deadline(api_deadline, lambda: api_gen.generate_image(
                     key_phrases=key_phrases,
                     tone=tone,
-                    colors=colors,
+                    colors=None,
                     num_inference_steps=inference_steps,
                     guidance_scale=guidance_scale,
-                    style=image_style
+                    style=image_style,
+                    deadline=api_deadline,
+                    enhance=False,
+                    user_id=user_id,
+                    priority=priority,
+                    stats=api_call_stats,
+                    width=api_size[0],
+                    height=api_size[1],
+                    seed=seed
+                ))
+            
+            def background_task():
+                """(enhanced background, how it was obtained)"""
+                # Hot tier: enhanced background already resized for this poster
+                image = self.pixel_cache.get(pixel_key, target_size) if pixel_key else None
+                if image is not None:
+                    run_info['cache_outcome'] = 'pixels'
+                    return image, 'pixels'
+                
+                raw_image, reused = session_cache.get_or_compute('background', background_inputs, fetch_background)
+                if reused:
+                    run_info['cache_outcome'] = 'session'
+                elif run_info.get('cache_outcome') != 'speculative':
+                    run_info['cache_outcome'] = 'shared' if api_call_stats.get('cache') == 'hit' else 'miss'
+                run_info['retries'] = max(0, api_call_stats.get('attempts', 1) - 1)
+                image, _ = session_cache.get_or_compute(
+                    'enhanced', (), lambda: api_gen.enhance_image(raw_image),
+                    depends_on=('background',)
                 )
                 
-                # Get API stats
+                # Promote backgrounds used often enough into the pixel tier
+                if pixel_key and self.pixel_cache.record_use(pixel_key):
+                    if image.size != tuple(target_size):
+                        image = image.resize(target_size, Image.Resampling.LANCZOS)
+                    self.pixel_cache.put(pixel_key, image)
+                return image, 'reused' if reused else run_info['cache_outcome']
+            
+            def headlines_task():
+                try:
+                    headlines = self.text_analyzer.generate_headline(key_phrases)
+                    selected = safe_str(headlines[0] if headlines else "AI Medical Diagnosis", "AI Medical Diagnosis")
+                    return headlines, selected
+                except Exception as e:
+                    print(f"Warning: Headline generation failed: {e}")
+                    return [], "AI Medical Diagnosis"
+            
+            def colors_task():
+                try:
+                    if color_scheme != "Auto-detect":
+                        return COLOR_PALETTES[color_scheme.lower()]
+                    return self.style_selector.select_colors(tone)
+                except Exception as e:
+                    print(f"Warning: Color selection failed: {e}")
+                    return COLOR_PALETTES['professional']
+            
+            def text_elements_task(headline_result):
+                features = self.text_analyzer.generate_features(key_phrases)
+                if isinstance(features, (list, tuple)):
+                    features_safe = [safe_str(f) for f in features]
+                else:
+                    features_safe = [safe_str(features)]
+                return {
+                    'headline': headline_result[1],
+                    'features': features_safe,
+                    'cta': "Learn More • Get Started Today",
+                    'percentage': safe_get_percentage(key_phrases)
+                }
+            
+            def fallback_caption(headline):
+                return f"{headline}\n\nLearn more about our AI-powered medical diagnosis system."
+            
+            def caption_task(headline_result):
+                try:
+                    return self.caption_generator.generate_caption(key_phrases, tone), True
+                except Exception as e:
+                    print(f"Warning: Caption generation failed: {e}")
+                    return fallback_caption(headline_result[1]), False
+            
+            graph = TaskGraph(self.pipeline_executor, task_profiles=current_task_profiles())
+            graph.add('headlines', headlines_task)
+            graph.add('colors', colors_task)
+            graph.add('text_elements', text_elements_task, deps=('headlines',))
+            graph.add('caption', caption_task, deps=('headlines',))
+            if self.compositing_pool is None:
+                # Static overlay layer, fonts, text fitting and the display list
+                # (pool workers plan their own)
+                graph.add('layout_layers', lambda: self.layout_designer.warm([target_size]))
+                graph.add('layout_plan', lambda text_elements, colors: self.layout_designer.plan_layout(
+                    target_size[0], target_size[1], text_elements, colors
+                ), deps=('text_elements', 'colors'))
+            
+            # Fetch the background from this thread, so the blocking API wait never
+            # holds a pipeline worker (template fallback only on deadline)
+            try:
+                image, source = background_task()
+                api_stats = api_gen.get_api_status()
+                if source == 'pixels':
+                    status_lines.append("   ⚡ Hot background from the memory-mapped pixel cache (no decode)")
+                elif source == 'reused':
+                    status_lines.append(f"   ♻️ Reused cached background (no API call)")
+                else:
+                    if source == 'speculative':
+                        status_lines.append("   ⚡ Attached to speculative pre-generation")
+                    status_lines.append(f"   ✅ Image generated via HF API!")
+                    status_lines.append(f"   • Request #{api_stats['requests']}")
+                    if api_call_stats.get('token'):
+                        status_lines.append(f"   • Served by pooled token {api_call_stats['token']}")
+                status_lines.append("")
+                
+            except DeadlineExceeded as deadline_error:
+                print(f"Warning: {deadline_error} - using template background")
+                run_info['cache_outcome'] = 'fallback'
+                run_info['retries'] = max(0, api_call_stats.get('attempts', 1) - 1)
+                image = self.fallback_generator.generate_image(
+                    key_phrases, tone, graph.result('colors'), size=target_size
+                )
                 api_stats = api_gen.get_api_status()
-                status_lines.append(f"   ✅ Image generated via HF API!")
-                status_lines.append(f"   • Request #{api_stats['requests']}")
+                status_lines.append(f"   ⚠️ DEGRADED: HF API did not deliver within the {deadline.budget:.0f}s budget")
+                status_lines.append(f"   • Using template background instead ({deadline.elapsed():.1f}s elapsed)")
                 status_lines.append("")
                 
+            except QuotaExceeded as quota_error:
+                error_msg = f"⏳ HF API QUOTA EXHAUSTED:\n\n{str(quota_error)}\n\n"
+                error_msg += f"Estimated wait: ~{quota_error.eta_seconds:.0f}s. Please try again later,\n"
+                error_msg += "or use your own Hugging Face token."
+                return None, "", error_msg, [], None
+                
             except Exception as api_error:
                 error_trace = traceback.format_exc()
                 error_msg = f"❌ HF API ERROR:\n\n{str(api_error)}\n\n"
                 error_msg += f"Full trace:\n{error_trace}\n\n"
-                error_msg += "This app uses ONLY Hugging Face API - no fallback available.\n"
+                error_msg += "The HF API call failed before the latency budget ran out.\n"
                 error_msg += "Please check:\n"
                 error_msg += "1. Your API token is valid\n"
                 error_msg += "2. You have internet connection\n"
                 error_msg += "3. The model is available\n"
                 error_msg += f"4. Install huggingface_hub: pip install huggingface_hub\n"
-                return None, "", error_msg
+                return None, "", error_msg, [], None
             
-            # Resize
-            try:
-                size_map = {
-                    "Instagram Square (1080x1080)": (1080, 1080),
-                    "Facebook (1200x630)": (1200, 630),
-                    "Twitter (1024x512)": (1024, 512),
-                    "LinkedIn (1200x1200)": (1200, 1200)
-                }
-                target_size = size_map.get(poster_size, (1080, 1080))
-                image = image.resize(target_size, Image.Resampling.LANCZOS)
-            except Exception as e:
-                print(f"Warning: Resize failed: {e}")
+            headlines, selected_headline = graph.result('headlines')
+            colors = graph.result('colors')
             
-            # Prepare text elements with safe extraction
+            # Text elements were prepared while the background was generated
             try:
-                features = self.text_analyzer.generate_features(key_phrases)
-                if isinstance(features, (list, tuple)):
-                    features_safe = [safe_str(f) for f in features]
-                else:
-                    features_safe = [safe_str(features)]
-                
-                text_elements = {
-                    'headline': selected_headline,
-                    'features': features_safe,
-                    'cta': "Learn More • Get Started Today",
-                    'percentage': safe_get_percentage(key_phrases)
-                }
+                text_elements = graph.result('text_elements')
+                layout_ops = graph.result('layout_plan') if self.compositing_pool is None else None
             except Exception as e:
                 error_trace = traceback.format_exc()
-                return None, "", f"❌ Text elements preparation failed:\n{str(e)}\n\n{error_trace}"
+                return None, "", f"❌ Text elements preparation failed:\n{str(e)}\n\n{error_trace}", [], None
+            overlapped = graph.overlapped_seconds()
+            status_lines.append(f"⚡ Prepared headline, palette, text, layout and caption during the API wait "
+                                f"({overlapped:.2f}s of work)")
+            status_lines.append("")
             
-            # Design Layout
+            report_progress('layout')
+            
+            # Resize, Design Layout and Add Branding
             try:
                 status_lines.append("🎨 STEP 3: Layout Design")
-                final_poster = self.layout_designer.design_poster(
-                    image, text_elements, colors, tone
-                )
+                if include_logo:
+                    status_lines.append("🏷️ STEP 4: Adding Branding")
+                
+                if self.compositing_pool is not None:
+                    final_poster, png_bytes = self.compositing_pool.compose(
+                        image, target_size, text_elements, colors, tone,
+                        include_logo, logo_position
+                    )
+                else:
+                    final_poster, png_bytes = compose_poster(
+                        self.layout_designer, self.branding,
+                        image, target_size, text_elements, colors, tone,
+                        include_logo, logo_position, layout_ops=layout_ops
+                    )
                 status_lines.append("   ✅ Layout created")
+                if include_logo:
+                    status_lines.append("   ✅ Logo added")
                 status_lines.append("")
+                
+                # Thumbnail pyramid, encoded while variants and the caption finish
+                thumbnails_future = None
+                if THUMBNAIL_WIDTHS:
+                    thumbnails_future = graph.add('thumbnails', lambda: thumbnail_pyramid(
+                        final_poster, THUMBNAIL_WIDTHS, THUMBNAIL_PLACEHOLDER_WIDTH, THUMBNAIL_QUALITY
+                    ))
             except Exception as e:
                 error_trace = traceback.format_exc()
-                return None, "", f"❌ Layout design failed:\n{str(e)}\n\n{error_trace}"
+                return None, "", f"❌ Layout design failed:\n{str(e)}\n\n{error_trace}", [], None
             
-            # Add Branding
+            # Layout variants from the same background
+            variant_gallery = []
             try:
-                if include_logo:
-                    status_lines.append("🏷️ STEP 4: Adding Branding")
-                    final_poster = self.branding.add_logo(
-                        final_poster, position=logo_position.lower()
+                variant_count = int(variant_count or 1)
+                if variant_count > 1 and deadline.expired():
+                    status_lines.append(f"⚠️ Skipped {variant_count - 1} layout variant(s): latency budget used up")
+                    status_lines.append("")
+                elif variant_count > 1:
+                    status_lines.append(f"🎲 Rendering {variant_count} layout variants")
+                    variants = plan_variants(
+                        [safe_str(h) for h in headlines] or [selected_headline],
+                        colors, logo_position, variant_count
                     )
-                    status_lines.append("   ✅ Logo added")
+                    variant_gallery = [(final_poster, variants[0]['label'])]
+                    variant_gallery += self._render_variants(
+                        image, target_size, text_elements, variants[1:], tone, include_logo
+                    )
+                    status_lines.append(f"   ✅ {len(variant_gallery)} variants rendered (1 API call)")
                     status_lines.append("")
             except Exception as e:
-                print(f"Warning: Logo addition failed: {e}")
+                print(f"Warning: Variant rendering failed: {e}")
             
-            # Generate Caption
+            report_progress('caption')
+            
+            # Caption (generated during the API wait)
+            status_lines.append("✍️ STEP 5: Generating Caption")
             try:
-                status_lines.append("✍️ STEP 5: Generating Caption")
-                caption = self.caption_generator.generate_caption(
-                    key_phrases, tone  # Fixed: Pass correct parameters
-                )
+                caption, caption_ok = wait_with_deadline(deadline, graph.future('caption'))
+            except DeadlineExceeded:
+                caption, caption_ok = fallback_caption(selected_headline), False
+                status_lines.append("   ⚠️ Caption not ready within the latency budget; using the template caption")
+            if caption_ok:
                 status_lines.append("   ✅ Caption generated")
                 status_lines.append("")
-            except Exception as e:
-                print(f"Warning: Caption generation failed: {e}")
-                caption = f"{selected_headline}\n\nLearn more about our AI-powered medical diagnosis system."
+            
+            report_progress('save')
             
             # Save
             try:
-                output_path = os.path.join(self.temp_dir, "hf_api_poster.png")
-                final_poster.save(output_path, quality=95)
+                metadata = {
+                    'caption': caption,
+                    'headline': selected_headline,
+                    'parameters': {
+                        'prompt': prompt,
+                        'model': selected_model,
+                        'tone_override': tone_override,
+                        'color_scheme': color_scheme,
+                        'include_logo': include_logo,
+                        'logo_position': logo_position,
+                        'poster_size': poster_size,
+                        'inference_steps': inference_steps,
+                        'guidance_scale': guidance_scale,
+                        'image_style': image_style,
+                        'quality': quality,
+                        'seed': seed
+                    },
+                    'generated_at': timestamp
+                }
+                if print_size is not None:
+                    status_lines.append(f"🖨️ Rendering print file: {print_size[0]}x{print_size[1]} px at {PRINT_DPI} dpi")
+                    tmp_path = self.output_store.root / f"print-{uuid.uuid4().hex}.tif.tmp"
+                    try:
+                        render_print(
+                            self.layout_designer, self.branding, image, print_size, text_elements, colors,
+                            tmp_path, dpi=PRINT_DPI, include_logo=include_logo,
+                            logo_position=logo_position, strip_height=PRINT_STRIP_HEIGHT
+                        )
+                        run_info['output_bytes'] = tmp_path.stat().st_size
+                        metadata['print'] = {'size': list(print_size), 'dpi': PRINT_DPI}
+                        output_path = self.output_store.save_file(tmp_path, metadata, suffix=".tif")
+                    finally:
+                        tmp_path.unlink(missing_ok=True)
+                    status_lines.append(f"   ✅ Print TIFF: {run_info['output_bytes'] / 1024 / 1024:.1f} MB "
+                                        f"(preview shown at {target_size[0]}x{target_size[1]})")
+                else:
+                    run_info['output_bytes'] = len(png_bytes)
+                    output_path = self.output_store.save(png_bytes, metadata)
+                if thumbnails_future is not None:
+                    try:
+                        manifest = self.output_store.save_thumbnails(output_path, thumbnails_future.result())
+                        levels = [f"{level['width']}px" for level in manifest['levels']] + ["placeholder"]
+                        status_lines.append(f"🖼️ Thumbnails (WebP): {', '.join(levels)} "
+                                            f"({manifest['total_bytes'] / 1024:.0f} KB)")
+                    except Exception as e:
+                        print(f"Warning: Thumbnail pyramid failed: {e}")
                 status_lines.append(f"✅ COMPLETE!")
                 status_lines.append(f"   • Generated at: {timestamp}")
                 status_lines.append(f"   • Size: {poster_size}")
                 status_lines.append(f"   • API Requests: {api_stats['requests']}")
+                status_lines.append(f"   • Total time: {deadline.elapsed():.1f}s")
             except Exception as e:
                 error_trace = traceback.format_exc()
-                return None, "", f"❌ Save failed:\n{str(e)}\n\n{error_trace}"
+                return None, "", f"❌ Save failed:\n{str(e)}\n\n{error_trace}", [], None
             
-            return final_poster, caption, "\n".join(status_lines)
+            return final_poster, caption, "\n".join(status_lines), variant_gallery, output_path
             
+        except JobCancelled:
+            # The job queue records the job as cancelled; stop here instead of reporting an error
+            raise
         except Exception as e:
             error_trace = traceback.format_exc()
             error_msg = f"❌ UNEXPECTED ERROR:\n{str(e)}\n\n"
@@ -316,7 +995,134 @@ class APIPosterGenerator:
             error_msg += "2. Internet connection\n"
             error_msg += "3. Selected model is available\n"
             error_msg += "4. Installed: pip install huggingface_hub pillow\n"
-            return None, "", error_msg
+            return None, "", error_msg, [], None
+    
+    def generate_draft(
+        self,
+        prompt,
+        api_token,
+        selected_model,
+        tone_override,
+        color_scheme,
+        include_logo,
+        logo_position,
+        poster_size,
+        inference_steps,
+        guidance_scale,
+        image_style,
+        variant_count=1,
+        session_cache=None,
+        profile_request=False,
+        request: gr.Request = None
+    ):
+        """Fast draft with a fresh seed; also returns the draft parameters for finalize_draft"""
+        draft = {
+            'prompt': prompt,
+            'api_token': api_token,
+            'selected_model': selected_model,
+            'tone_override': tone_override,
+            'color_scheme': color_scheme,
+            'include_logo': include_logo,
+            'logo_position': logo_position,
+            'poster_size': poster_size,
+            'inference_steps': inference_steps,
+            'guidance_scale': guidance_scale,
+            'image_style': image_style,
+            'variant_count': variant_count,
+            'seed': random.randint(0, 2**31 - 1)
+        }
+        result = self.generate_poster(
+            session_cache=session_cache, profile_request=profile_request,
+            quality='draft', request=request, **draft
+        )
+        return (*result, draft if result[0] is not None else None)
+    
+    def finalize_draft(self, draft, session_cache=None, profile_request=False, request: gr.Request = None):
+        """Re-generate the last draft at full quality with the same seed and parameters"""
+        if not draft:
+            return None, "", "❌ No draft to finalize yet - click '✏️ Draft' first", [], None
+        return self.generate_poster(
+            session_cache=session_cache, profile_request=profile_request,
+            quality='final', request=request, **draft
+        )
+    
+    def serve_example(
+        self,
+        prompt,
+        selected_model,
+        tone_override,
+        color_scheme,
+        include_logo,
+        logo_position,
+        poster_size,
+        inference_steps,
+        guidance_scale,
+        image_style,
+        variant_count=1
+    ):
+        """UI hook after an example click: show its precomputed poster if the settings match"""
+        settings = {
+            'selected_model': selected_model,
+            'tone_override': tone_override,
+            'color_scheme': color_scheme,
+            'include_logo': include_logo,
+            'logo_position': logo_position,
+            'poster_size': poster_size,
+            'inference_steps': inference_steps,
+            'guidance_scale': guidance_scale,
+            'image_style': image_style
+        }
+        entry = self.example_cache.lookup(prompt, settings) if int(variant_count or 1) == 1 else None
+        if entry is None:
+            return gr.update(), gr.update(), gr.update(), gr.update(), gr.update()
+        
+        rendered_at = datetime.datetime.fromtimestamp(entry['rendered_at']).strftime("%Y-%m-%d %H:%M")
+        status = (f"⚡ Precomputed example poster (rendered {rendered_at}, no API call)\n"
+                  f"   • Size: {poster_size}\n"
+                  f"   • Click '🚀 Generate with HF API' for a fresh background")
+        return (Image.open(entry['output_path']), entry['caption'], status, [],
+                gr.update(value=entry['output_path'], visible=True))
+    
+    def _render_variants(self, image, target_size, text_elements, variants, tone, include_logo):
+        """Render layout variants of one background; returns [(poster, label), ...]"""
+        if not variants:
+            return []
+        
+        # Resize the shared background once for all variants
+        if image.size != tuple(target_size):
+            image = image.resize(target_size, Image.Resampling.LANCZOS)
+        
+        jobs = [{
+            'text_elements': dict(text_elements, headline=variant['headline']),
+            'colors': variant['colors'],
+            'logo_position': variant['logo_position']
+        } for variant in variants]
+        
+        if self.compositing_pool is not None:
+            results = self.compositing_pool.compose_many(image, target_size, jobs, tone, include_logo)
+        else:
+            results = [
+                compose_poster(
+                    self.layout_designer, self.branding, image, target_size,
+                    job['text_elements'], job['colors'], tone,
+                    include_logo, job['logo_position']
+                )
+                for job in jobs
+            ]
+        
+        return [(poster, variant['label']) for (poster, _), variant in zip(results, variants)]
+    
+    def _run_job(self, params, progress_callback):
+        """Run one queued job; returns (output_path, caption, status_log)"""
+        poster, caption, status_log, _, output_path = self.generate_poster(
+            params['prompt'], params['api_token'] or self.default_token(), params['selected_model'],
+            params['tone_override'], params['color_scheme'], params['include_logo'],
+            params['logo_position'], params['poster_size'], params['inference_steps'],
+            params['guidance_scale'], params['image_style'],
+            progress_callback=progress_callback,
+            priority=params.get('priority', 'batch')
+        )
+        return output_path if poster is not None else None, caption, status_log
     
     def test_api_connection(self, api_token):
         """Test HF API connection"""
@@ -343,7 +1149,8 @@ class APIPosterGenerator:
             gr.Markdown("""
             <div style="background-color: #fff3cd; border-left: 4px solid #ffc107; padding: 12px; margin: 10px 0;">
             <strong>⚠️ API-ONLY MODE</strong><br>
-            This application uses ONLY Hugging Face's cloud API for image generation.<br>
+            This application uses Hugging Face's cloud API for image generation.<br>
+            If the API misses the latency budget, a template background is used instead.<br>
             You need a valid HF API token to generate posters.
             </div>
             """)
@@ -358,22 +1165,24 @@ class APIPosterGenerator:
                         label="API Token",
                         placeholder="hf_xxxxxxxxxxxxxxxxxxxxx",
                         type="password",
-                        value=os.getenv("HF_API_TOKEN", ""),
+                        value=self.default_token(),
                         info="Your token starts with 'hf_'"
                     )
                     
                     test_btn = gr.Button("🧪 Test API Connection", size="sm")
                     test_result = gr.Textbox(label="Connection Test", interactive=False, visible=False)
+                    token_pool_status = gr.Markdown(self.token_pool_report(), visible=self.token_pool is not None)
                     
                     gr.Markdown("---")
                     
                     gr.Markdown("### 🤖 Model Selection")
                     model_selector = gr.Dropdown(
                         label="Select HF Model",
-                        choices=list(HF_MODELS.keys()),
+                        choices=self.model_warmer.choices(),
                         value=list(HF_MODELS.keys())[0] if HF_MODELS else "FLUX.1 Schnell (Fast & Quality)",
-                        info="All models run on Hugging Face's servers"
+                        info="All models run on Hugging Face's servers · 🟢 warm 🟡 loading 🔵 cold ⚪ unknown"
                     )
+                    model_status_timer = gr.Timer(30)
                     
                     gr.Markdown("---")
                     
@@ -404,6 +1213,21 @@ class APIPosterGenerator:
                             step=5
                         )
                     
+                    with gr.Row():
+                        auto_tune = gr.Checkbox(
+                            label="🎯 Auto-pick model & steps",
+                            value=False,
+                            info="Best expected quality within the target latency"
+                        )
+                        target_latency = gr.Slider(
+                            label="Target latency (s)",
+                            minimum=5,
+                            maximum=90,
+                            value=AUTOTUNE_TARGET_SECONDS,
+                            step=5
+                        )
+                    predicted_wait = gr.Markdown("")
+                    
                     guidance_scale = gr.Slider(
                         label="Prompt Guidance",
                         minimum=5.0,
@@ -436,21 +1260,49 @@ class APIPosterGenerator:
                             value="Top-right"
                         )
                     
+                    variant_count = gr.Slider(
+                        label="Layout Variants",
+                        minimum=1,
+                        maximum=8,
+                        value=1,
+                        step=1,
+                        info="Render several headline/palette/logo variants from one background"
+                    )
+                    
                     poster_size = gr.Dropdown(
                         label="Poster Size",
                         choices=[
                             "Instagram Square (1080x1080)",
                             "Facebook (1200x630)",
                             "Twitter (1024x512)",
-                            "LinkedIn (1200x1200)"
+                            "LinkedIn (1200x1200)",
+                            *PRINT_FORMATS
                         ],
                         value="Instagram Square (1080x1080)"
                     )
                     
+                    speculative_mode = gr.Checkbox(
+                        label="⚡ Pre-generate while I type",
+                        value=SPECULATIVE_GENERATION,
+                        info="Starts the background early; uses API quota only while there is headroom"
+                    )
+                    speculation_status = gr.Markdown("")
+                    speculation_timer = gr.Timer(2)
+                    
+                    profile_request = gr.Checkbox(
+                        label="🐞 Debug: profile this request",
+                        value=False,
+                        info="Writes a cProfile report to the profiles directory"
+                    )
+                    
                     generate_btn = gr.Button("🚀 Generate with HF API", 
                                            variant="primary", 
                                            size="lg")
                     
+                    with gr.Row():
+                        draft_btn = gr.Button("✏️ Draft (fast, low-res)", size="sm")
+                        finalize_btn = gr.Button("✅ Finalize draft", size="sm")
+                    
                 with gr.Column(scale=2):
                     # Output Section with API Badge
                     gr.Markdown("### 🖼️ Generated Poster")
@@ -466,6 +1318,8 @@ class APIPosterGenerator:
                     with gr.Row():
                         download_btn = gr.File(label="📥 Download Poster", visible=False)
                     
+                    variants_output = gr.Gallery(label="Layout Variants", columns=4, height=300)
+                    
                     gr.Markdown("### 📱 Social Media Caption")
                     caption_output = gr.Textbox(label="", lines=8, interactive=False)
                     
@@ -480,14 +1334,15 @@ class APIPosterGenerator:
             # Examples
             gr.Markdown("### 💡 Example Prompts")
             examples = gr.Examples(
-                examples=[
-                    ["Promote our AI-based Medical Diagnosis System with 95% accuracy and instant results for diabetes and heart disease."],
-                    ["Revolutionary AI healthcare solution! 98% accurate cancer detection in under 5 minutes. Trusted by 500+ hospitals."],
-                    ["Get instant cardiac risk assessment with our new AI system. 24/7 available, 99% accuracy."]
-                ],
+                examples=[[example] for example in EXAMPLE_PROMPTS],
                 inputs=[prompt_input]
             )
             
+            # Per-session cache of analysis and background artifacts
+            session_cache = gr.State(StageCache())
+            # Parameters and seed of the session's last draft
+            draft_state = gr.State(None)
+            
             # Event handlers
             test_btn.click(
                 fn=self.test_api_connection,
@@ -499,20 +1354,88 @@ class APIPosterGenerator:
                 outputs=[test_result]
             )
             
+            # Refresh the warm/cold badges in the model dropdown
+            refresh_models = lambda: gr.Dropdown(choices=self.model_warmer.choices())
+            demo.load(fn=refresh_models, inputs=None, outputs=[model_selector])
+            model_status_timer.tick(fn=refresh_models, inputs=None, outputs=[model_selector], show_progress="hidden")
+            if self.token_pool is not None:
+                model_status_timer.tick(fn=self.token_pool_report, inputs=None, outputs=[token_pool_status],
+                                        show_progress="hidden")
+            
+            # Predicted wait / auto-tuning (.input so the auto-tuner's own updates do not re-trigger it)
+            wait_inputs = [auto_tune, target_latency, api_token, model_selector, inference_steps]
+            wait_outputs = [model_selector, inference_steps, predicted_wait]
+            for component in [auto_tune, target_latency, model_selector, inference_steps]:
+                component.input(fn=self.predict_wait, inputs=wait_inputs, outputs=wait_outputs, show_progress="hidden")
+            demo.load(fn=self.predict_wait, inputs=wait_inputs, outputs=wait_outputs)
+            model_status_timer.tick(fn=self.predict_wait, inputs=wait_inputs, outputs=wait_outputs, show_progress="hidden")
+            
+            # Speculative pre-generation on (debounced) prompt/settings edits
+            for component in [prompt_input, api_token, model_selector, tone_override,
+                              image_style, inference_steps, guidance_scale, speculative_mode]:
+                component.change(
+                    fn=self.speculate,
+                    inputs=[
+                        speculative_mode, prompt_input, api_token, model_selector,
+                        tone_override, inference_steps, guidance_scale, image_style
+                    ],
+                    outputs=[speculation_status],
+                    trigger_mode="always_last",
+                    show_progress="hidden"
+                )
+            speculation_timer.tick(fn=self.speculation_status, inputs=None, outputs=[speculation_status],
+                                   show_progress="hidden")
+            
+            # Example click: serve the precomputed poster when the settings match
+            examples.load_input_event.then(
+                fn=self.serve_example,
+                inputs=[
+                    prompt_input, model_selector, tone_override, color_scheme, include_logo,
+                    logo_position, poster_size, inference_steps, guidance_scale, image_style,
+                    variant_count
+                ],
+                outputs=[poster_output, caption_output, status_output, variants_output, download_btn],
+                show_progress="hidden"
+            )
+            
             generate_btn.click(
                 fn=self.generate_poster,
                 inputs=[
                     prompt_input, api_token, model_selector,
                     tone_override, color_scheme, include_logo,
                     logo_position, poster_size, inference_steps,
-                    guidance_scale, image_style
+                    guidance_scale, image_style, variant_count,
+                    session_cache, profile_request
+                ],
+                outputs=[poster_output, caption_output, status_output, variants_output, download_btn]
+            ).then(
+                fn=lambda: gr.File(visible=True),
+                inputs=None,
+                outputs=[download_btn]
+            )
+            
+            draft_btn.click(
+                fn=self.generate_draft,
+                inputs=[
+                    prompt_input, api_token, model_selector,
+                    tone_override, color_scheme, include_logo,
+                    logo_position, poster_size, inference_steps,
+                    guidance_scale, image_style, variant_count,
+                    session_cache, profile_request
                 ],
-                outputs=[poster_output, caption_output, status_output]
+                outputs=[poster_output, caption_output, status_output, variants_output, download_btn, draft_state]
             ).then(
-                fn=lambda: gr.File(visible=True, 
-                                 value=os.path.join(self.temp_dir, "hf_api_poster.png") 
-                                 if os.path.exists(os.path.join(self.temp_dir, "hf_api_poster.png")) 
-                                 else None),
+                fn=lambda: gr.File(visible=True),
+                inputs=None,
+                outputs=[download_btn]
+            )
+            
+            finalize_btn.click(
+                fn=self.finalize_draft,
+                inputs=[draft_state, session_cache, profile_request],
+                outputs=[poster_output, caption_output, status_output, variants_output, download_btn]
+            ).then(
+                fn=lambda: gr.File(visible=True),
                 inputs=None,
                 outputs=[download_btn]
             )
@@ -520,17 +1443,19 @@ class APIPosterGenerator:
         return demo
 
 def main():
+    from fastapi import FastAPI
+    import uvicorn
+    
     generator = APIPosterGenerator()
     demo = generator.create_ui()
+    demo.show_error = True
+    
+    # Serve the job API next to the Gradio UI
+    server = FastAPI(title="Medical AI Poster Generator")
+    server.include_router(create_job_router(generator.job_queue))
+    server = gr.mount_gradio_app(server, demo, path="/")
     
-    # Launch with clear messages
-    demo.launch(
-        server_name="127.0.0.1",
-        server_port=7860,
-        share=False,
-        show_error=True,
-        quiet=False
-    )
+    uvicorn.run(server, host="127.0.0.1", port=7860)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -18,6 +18,7 @@ ASSETS_DIR.mkdir(exist_ok=True)
 DEFAULT_LOGO_PATH = ASSETS_DIR / "logo.png"
 DEFAULT_FONT_PATH = ASSETS_DIR / "fonts" / "Roboto-Regular.ttf"
 DEFAULT_BOLD_FONT_PATH = ASSETS_DIR / "fonts" / "Roboto-Bold.ttf"
+ICONS_DIR = ASSETS_DIR / "icons"
 
 # Hugging Face Models (working with router.huggingface.co)
 # These models are confirmed to work with the new endpoint
@@ -30,6 +31,18 @@ HF_MODELS = {
     "Kandinsky 2.2 (Artistic)": "kandinsky-community/kandinsky-2-2-decoder",
 }
 
+# Quality and latency priors per model for the auto-tuner (modules/autotuner.py):
+# relative quality at full_quality_steps, and seconds per step at 1024x1024
+# until real latencies have been observed
+MODEL_PROFILES = {
+    "FLUX.1 Schnell (Fast & Quality)": {'quality': 0.85, 'full_quality_steps': 4, 'seconds_per_step': 0.6},
+    "Stable Diffusion XL (Best Quality)": {'quality': 0.90, 'full_quality_steps': 30, 'seconds_per_step': 0.35},
+    "SDXL Turbo (Fastest)": {'quality': 0.65, 'full_quality_steps': 4, 'seconds_per_step': 0.15},
+    "Playground v2.5 (Aesthetic)": {'quality': 0.92, 'full_quality_steps': 30, 'seconds_per_step': 0.4},
+    "Stable Diffusion 2.1 (Reliable)": {'quality': 0.70, 'full_quality_steps': 30, 'seconds_per_step': 0.25},
+    "Kandinsky 2.2 (Artistic)": {'quality': 0.75, 'full_quality_steps': 25, 'seconds_per_step': 0.3},
+}
+
 # Color Palettes
 COLOR_PALETTES = {
     'professional': {
@@ -69,6 +82,14 @@ COLOR_PALETTES = {
     }
 }
 
+# Poster output formats
+POSTER_SIZES = {
+    "Instagram Square (1080x1080)": (1080, 1080),
+    "Facebook (1200x630)": (1200, 630),
+    "Twitter (1024x512)": (1024, 512),
+    "LinkedIn (1200x1200)": (1200, 1200)
+}
+
 # Image Generation Settings
 DEFAULT_IMAGE_SIZE = (1024, 1024)
 DEFAULT_INFERENCE_STEPS = 25
@@ -113,4 +134,143 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
-HF_API_TOKEN = os.getenv("HF_API_TOKEN", "")
\ No newline at end of file
+HF_API_TOKEN = os.getenv("HF_API_TOKEN", "")
+
+# Compositing process pool (0 = run layout/branding/encoding in-process,
+# "auto" = one worker per CPU core)
+_composite_workers = os.getenv("COMPOSITE_WORKERS", "0").strip().lower()
+COMPOSITE_WORKERS = (os.cpu_count() or 1) if _composite_workers == "auto" else int(_composite_workers or 0)
+
+# End-to-end latency budget per poster request, in seconds (0 = no deadline).
+# When the HF API has not delivered within the budget, a template background
+# from DynamicImageGenerator is used instead.
+POSTER_LATENCY_BUDGET = float(os.getenv("POSTER_LATENCY_BUDGET", "60"))
+# Part of the budget kept back for layout, branding and saving
+POSTER_COMPOSE_RESERVE = float(os.getenv("POSTER_COMPOSE_RESERVE", "5"))
+
+# Managed output store (content-addressed posters under OUTPUT_DIR/posters)
+POSTER_STORE_DIR = OUTPUT_DIR / "posters"
+OUTPUT_RETENTION_HOURS = float(os.getenv("OUTPUT_RETENTION_HOURS", "168"))  # 0 = keep forever
+OUTPUT_MAX_MB = float(os.getenv("OUTPUT_MAX_MB", "2048"))  # 0 = no size cap
+OUTPUT_SWEEP_INTERVAL = float(os.getenv("OUTPUT_SWEEP_INTERVAL", "300"))  # seconds
+
+# Shared cache for generated backgrounds and analysis artifacts:
+# "memory" (per process), "file" (shared filesystem), "network" (HTTP
+# key-value service, see `python -m modules.cache_backends serve`) or "none"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_DIR = Path(os.getenv("CACHE_DIR", str(OUTPUT_DIR / "cache")))
+CACHE_URL = os.getenv("CACHE_URL", "http://127.0.0.1:8765")
+CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", "256"))
+
+# Fair scheduling of HF API calls on shared tokens
+HF_TOKEN_REQUESTS_PER_WINDOW = int(os.getenv("HF_TOKEN_REQUESTS_PER_WINDOW", "300"))
+HF_TOKEN_WINDOW_SECONDS = float(os.getenv("HF_TOKEN_WINDOW_SECONDS", "3600"))
+HF_TOKEN_MAX_CONCURRENT = int(os.getenv("HF_TOKEN_MAX_CONCURRENT", "4"))
+SCHEDULER_MAX_WAIT = {
+    'interactive': float(os.getenv("SCHEDULER_MAX_WAIT_INTERACTIVE", "30")),
+    'batch': float(os.getenv("SCHEDULER_MAX_WAIT_BATCH", "600"))
+}
+
+# Asynchronous job API (/api/jobs)
+JOBS_DB_PATH = Path(os.getenv("JOBS_DB_PATH", str(OUTPUT_DIR / "jobs.sqlite3")))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Request profiling (see modules/profiling.py)
+PROFILES_DIR = Path(os.getenv("PROFILES_DIR", str(OUTPUT_DIR / "profiles")))
+POSTER_PROFILE = os.getenv("POSTER_PROFILE", "0").lower() in ("1", "true", "yes")
+POSTER_PROFILE_SAMPLE_RATE = int(os.getenv("POSTER_PROFILE_SAMPLE_RATE", "0"))  # 1 in N, 0 = off
+
+# Speculative pre-generation of the background while the prompt is edited
+SPECULATIVE_GENERATION = os.getenv("SPECULATIVE_GENERATION", "0").lower() in ("1", "true", "yes")  # UI default
+SPECULATION_DEBOUNCE = float(os.getenv("SPECULATION_DEBOUNCE", "1.0"))  # seconds of quiet before starting
+SPECULATION_MAX_IN_FLIGHT = int(os.getenv("SPECULATION_MAX_IN_FLIGHT", "2"))
+# Only speculate while at least this fraction of the token's window budget is unused
+SPECULATION_MIN_HEADROOM = float(os.getenv("SPECULATION_MIN_HEADROOM", "0.5"))
+
+# Model warm-up / keep-warm pings with HF_API_TOKEN (see modules/model_warmer.py)
+MODEL_WARMUP_INTERVAL = float(os.getenv("MODEL_WARMUP_INTERVAL", "600"))  # seconds, 0 = off
+MODEL_WARMUP_MODELS = [  # display names from HF_MODELS, "all" = every model
+    name.strip() for name in os.getenv("MODEL_WARMUP_MODELS", "all").split(",") if name.strip()
+]
+MODEL_WARM_TTL = float(os.getenv("MODEL_WARM_TTL", "900"))  # seconds a model stays warm after a response
+MODEL_WARMUP_MIN_HEADROOM = float(os.getenv("MODEL_WARMUP_MIN_HEADROOM", "0.5"))
+# A response this many times slower than the model's fastest for the same steps/size is a cold start
+MODEL_COLD_START_FACTOR = float(os.getenv("MODEL_COLD_START_FACTOR", "3"))
+MODEL_LOADING_TIMEOUT = float(os.getenv("MODEL_LOADING_TIMEOUT", "120"))  # seconds 'loading' lasts without an answer
+
+# Generation ledger for latency/cost analytics (python -m modules.ledger report)
+LEDGER_ENABLED = os.getenv("LEDGER_ENABLED", "1").lower() in ("1", "true", "yes")
+LEDGER_DB_PATH = Path(os.getenv("LEDGER_DB_PATH", str(OUTPUT_DIR / "ledger.sqlite3")))
+
+# Draft mode: fast low-step, low-resolution backgrounds with a recorded seed;
+# "Finalize" re-generates at full quality with the same seed and parameters
+DRAFT_STEPS = int(os.getenv("DRAFT_STEPS", "4"))
+DRAFT_SIZE = int(os.getenv("DRAFT_SIZE", "512"))  # square, in pixels
+# HF_MODELS name used for drafts ("" = the selected model; a different model
+# is faster but its composition will not match the finalized poster)
+DRAFT_MODEL = os.getenv("DRAFT_MODEL", "")
+
+# Latency-aware model/steps auto-tuner
+AUTOTUNE_TARGET_SECONDS = float(os.getenv("AUTOTUNE_TARGET_SECONDS", "20"))  # UI default
+LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "50"))  # samples kept per (model, steps, size)
+LATENCY_MAX_AGE = float(os.getenv("LATENCY_MAX_AGE", "3600"))  # seconds before a sample is forgotten
+MODEL_COLD_PENALTY = float(os.getenv("MODEL_COLD_PENALTY", "20"))  # extra seconds predicted for cold models
+
+# Memory-mapped raw-pixel tier for hot backgrounds (enhanced + resized, no decode on hit)
+PIXEL_CACHE_DIR = Path(os.getenv("PIXEL_CACHE_DIR", str(OUTPUT_DIR / "cache" / "pixels")))
+PIXEL_CACHE_MB = float(os.getenv("PIXEL_CACHE_MB", "512"))  # 0 = off
+PIXEL_CACHE_PROMOTE_AFTER = int(os.getenv("PIXEL_CACHE_PROMOTE_AFTER", "2"))  # uses before promotion
+PIXEL_CACHE_IDLE_SECONDS = float(os.getenv("PIXEL_CACHE_IDLE_SECONDS", "3600"))  # demote after idling
+
+# Corpus mode for the text analyzer (python -m modules.corpus_analyzer)
+CORPUS_WORKERS = int(os.getenv("CORPUS_WORKERS", "0"))  # 0 = one per CPU
+CORPUS_CHUNK_SIZE = int(os.getenv("CORPUS_CHUNK_SIZE", "200"))  # texts per worker task
+
+# Prompt canonicalization: bucket accuracy, order conditions and normalize
+# tone/style before building the background prompt, so equivalent campaigns
+# share cache entries and in-flight API calls
+PROMPT_CANONICALIZATION = os.getenv("PROMPT_CANONICALIZATION", "1").lower() in ("1", "true", "yes")
+ACCURACY_BUCKETS = [  # floor thresholds in percent; the badge still shows the exact value
+    int(value) for value in os.getenv("ACCURACY_BUCKETS", "90,95,99").split(",") if value.strip()
+]
+
+# Large-format print mode: these poster sizes are rendered strip by strip into
+# a DPI-tagged TIFF (bounded memory) plus an on-screen preview
+PRINT_DPI = int(os.getenv("PRINT_DPI", "300"))
+PRINT_FORMATS = {  # paper size in millimetres (portrait)
+    "A3 Print (297x420 mm)": (297, 420),
+    "A2 Print (420x594 mm)": (420, 594)
+}
+PRINT_STRIP_HEIGHT = int(os.getenv("PRINT_STRIP_HEIGHT", "256"))  # rows rendered and encoded at a time
+PRINT_PREVIEW_SIZE = 1080  # longest side of the preview shown in the UI
+
+# Example prompts shown under the form; their posters are precomputed into
+# the output store (python -m modules.example_cache regenerate)
+EXAMPLE_PROMPTS = [
+    "Promote our AI-based Medical Diagnosis System with 95% accuracy and instant results for diabetes and heart disease.",
+    "Revolutionary AI healthcare solution! 98% accurate cancer detection in under 5 minutes. Trusted by 500+ hospitals.",
+    "Get instant cardiac risk assessment with our new AI system. 24/7 available, 99% accuracy."
+]
+EXAMPLES_PRECOMPUTE = os.getenv("EXAMPLES_PRECOMPUTE", "1").lower() in ("1", "true", "yes")  # on startup, needs HF_API_TOKEN
+EXAMPLE_POSTER_SIZES = list(POSTER_SIZES)  # sizes precomputed per example (other settings at UI defaults)
+
+# Threads for the per-request task graph: the CPU stages that do not need the
+# background (the request thread itself waits for the API call)
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "16"))
+
+# Optional pool of HF API tokens used together with HF_API_TOKEN: calls on the
+# service's own tokens go to the least-loaded token in rotation, and tokens
+# answering 429 or 401/403 sit out a cooldown (see modules/token_pool.py)
+HF_API_TOKENS = os.getenv("HF_API_TOKENS", "")  # comma-separated
+HF_API_TOKENS_FILE = os.getenv("HF_API_TOKENS_FILE", "")  # one token per line, '#' comments
+TOKEN_RATE_LIMIT_COOLDOWN = float(os.getenv("TOKEN_RATE_LIMIT_COOLDOWN", "60"))  # seconds after a 429
+TOKEN_INVALID_COOLDOWN = float(os.getenv("TOKEN_INVALID_COOLDOWN", "3600"))  # seconds after a 401/403
+
+# Responsive thumbnail pyramid saved next to every poster: WebP at these
+# widths (each level reduced from the previous one), a blurred placeholder
+# and a <poster>.thumbnails.json manifest. Empty = off.
+THUMBNAIL_WIDTHS = [
+    int(value) for value in os.getenv("THUMBNAIL_WIDTHS", "1080,720,480,240").split(",") if value.strip()
+]
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))  # WebP quality
+THUMBNAIL_PLACEHOLDER_WIDTH = 16  # pixels
@@ -0,0 +1,120 @@
+import statistics
+import threading
+import time
+from collections import deque
+
+# "Quality Steps" values offered in the UI
+STEP_CHOICES = [15, 20, 25, 30, 35, 40]
+
+
+class LatencyModel:
+    """
+    Rolling latency observations per (model, steps, resolution).
+
+    Predictions use, in order: the median of recent samples for the exact
+    bucket; the model's median seconds per unit of work (steps x megapixels)
+    scaled to the requested work; the configured prior. Samples older than
+    `max_age` seconds are forgotten, so predictions follow the shared API's
+    drift during the day.
+    """
+
+    def __init__(self, priors=None, window=50, max_age=3600, min_samples=3):
+        """
+        Args:
+            priors: {model_id: seconds per step at 1024x1024}
+        """
+        self.priors = priors or {}
+        self.window = window
+        self.max_age = max_age
+        self.min_samples = min_samples
+        self._buckets = {}  # (model_id, steps, pixels) -> deque of (timestamp, seconds)
+        self._unit_costs = {}  # model_id -> deque of (timestamp, seconds per work unit)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _work(steps, width, height):
+        return steps * (width * height) / (1024 * 1024)
+
+    def observe(self, model_id, seconds, steps, width=1024, height=1024):
+        """Record one successful request"""
+        work = self._work(steps, width, height)
+        if seconds is None or work < 0.25:
+            return  # warm-up pings measure load time, not throughput
+        now = time.time()
+        with self._lock:
+            bucket = self._buckets.setdefault((model_id, steps, width * height), deque(maxlen=self.window))
+            bucket.append((now, seconds))
+            costs = self._unit_costs.setdefault(model_id, deque(maxlen=self.window * 4))
+            costs.append((now, seconds / work))
+
+    def _recent(self, samples):
+        cutoff = time.time() - self.max_age
+        return [value for timestamp, value in samples if timestamp >= cutoff]
+
+    def predict(self, model_id, steps, width=1024, height=1024):
+        """Return (seconds, source) with source 'observed', 'scaled' or 'prior'"""
+        with self._lock:
+            bucket = self._recent(self._buckets.get((model_id, steps, width * height), ()))
+            costs = self._recent(self._unit_costs.get(model_id, ()))
+        if len(bucket) >= self.min_samples:
+            return statistics.median(bucket), 'observed'
+        work = self._work(steps, width, height)
+        if costs:
+            return statistics.median(costs) * work, 'scaled'
+        return self.priors.get(model_id, 0.5) * work, 'prior'
+
+
+class AutoTuner:
+    """
+    Picks the model and step count with the best expected quality whose
+    predicted latency meets a target.
+
+    Expected quality is the model's quality prior, reduced when running
+    below its full-quality step count. Cold or loading models (per the
+    optional status function) are predicted `cold_penalty` seconds slower.
+    """
+
+    def __init__(self, models, profiles, latency_model, model_status=None, cold_penalty=20):
+        """
+        Args:
+            models: {display name: model id}
+            profiles: {display name: {'quality', 'full_quality_steps', 'seconds_per_step'}}
+            model_status: Optional callable(model_id) -> 'warm'/'loading'/'cold'/'unknown'
+        """
+        self.models = dict(models)
+        self.profiles = profiles
+        self.latency_model = latency_model
+        self.model_status = model_status
+        self.cold_penalty = cold_penalty
+
+    def expected_quality(self, name, steps):
+        profile = self.profiles.get(name, {})
+        quality = profile.get('quality', 0.5)
+        full_steps = profile.get('full_quality_steps', 25)
+        return quality * min(1.0, 0.7 + 0.3 * steps / full_steps)
+
+    def predict(self, name, steps, width=1024, height=1024):
+        """Return (seconds, source) for a model display name"""
+        model_id = self.models[name]
+        seconds, source = self.latency_model.predict(model_id, steps, width, height)
+        if self.model_status is not None and self.model_status(model_id) in ('cold', 'loading'):
+            seconds += self.cold_penalty
+            source += ", cold"
+        return seconds, source
+
+    def choose(self, target_seconds, width=1024, height=1024, step_choices=STEP_CHOICES):
+        """Return (name, steps, predicted seconds, source) for the target latency
+
+        When nothing meets the target, the fastest option is returned.
+        """
+        candidates = []
+        for name in self.models:
+            for steps in step_choices:
+                seconds, source = self.predict(name, steps, width, height)
+                candidates.append((name, steps, seconds, source))
+
+        meeting = [c for c in candidates if c[2] <= target_seconds]
+        if not meeting:
+            return min(candidates, key=lambda c: c[2])
+        # Best quality first; among equals, the faster one
+        return max(meeting, key=lambda c: (self.expected_quality(c[0], c[1]), -c[2]))
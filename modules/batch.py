@@ -0,0 +1,245 @@
+"""
+Sharded batch rendering of campaign manifests.
+
+A manifest is a CSV or JSONL file with one poster per row; columns are the
+job API parameters (see JOB_PARAM_DEFAULTS) plus an optional `id`. Rows are
+assigned to shards by a stable hash of their generation parameters, so
+duplicate rows always land on the same node and hit its cache. Each node
+renders only its shard:
+
+    python -m modules.batch run campaign.csv --shard 0 --num-shards 4 --results-dir batch_results/
+
+and appends to batch_results/shard-0000-of-0004.jsonl (re-running resumes
+where it stopped). Posters are kept in batch_results/posters/, outside the
+evicting output store, named by their parameter hash. Once every node is
+done, gather the shard files and posters and run:
+
+    python -m modules.batch merge campaign.csv --num-shards 4 --results-dir batch_results/
+
+which writes the merged manifest and reports missing or failed rows (and
+rows whose poster file is gone).
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from modules.job_api import JOB_PARAM_DEFAULTS
+from modules.stage_cache import fingerprint
+
+# Parameters that determine the rendered poster (and therefore the shard)
+GENERATION_PARAMS = [name for name in JOB_PARAM_DEFAULTS if name != 'priority']
+
+
+def _coerce(name, value):
+    """Convert a manifest cell to the type of the parameter's default"""
+    default = JOB_PARAM_DEFAULTS[name]
+    if value is None or value == "":
+        return default
+    if isinstance(default, bool):
+        return value if isinstance(value, bool) else str(value).strip().lower() in ("1", "true", "yes", "y")
+    if isinstance(default, int):
+        return int(float(value))
+    if isinstance(default, float):
+        return float(value)
+    return str(value)
+
+
+def read_manifest(path):
+    """Yield (row_id, params) for every row of a CSV or JSONL manifest"""
+    path = Path(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.suffix.lower() in ('.jsonl', '.ndjson'):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        for number, record in enumerate(records, start=1):
+            params = {name: _coerce(name, record.get(name)) for name in JOB_PARAM_DEFAULTS}
+            if not params['prompt']:
+                raise ValueError(f"{path}: row {number} has no prompt")
+            row_id = str(record.get('id') or number)
+            yield row_id, params
+
+
+def param_hash(params):
+    """Stable hash of the parameters that determine a poster"""
+    return fingerprint(*(params[name] for name in GENERATION_PARAMS))
+
+
+def shard_of(params, num_shards):
+    """Shard index of a row; identical across machines and runs"""
+    return int(param_hash(params), 16) % num_shards
+
+
+def shard_results_path(results_dir, shard, num_shards):
+    return Path(results_dir) / f"shard-{shard:04d}-of-{num_shards:04d}.jsonl"
+
+
+def _poster_exists(result):
+    return bool(result.get('output_path')) and Path(result['output_path']).exists()
+
+
+def _keep_poster(output_path, posters_dir, digest):
+    """Link (or copy) a rendered poster out of the output store, whose sweeper may delete it"""
+    posters_dir.mkdir(parents=True, exist_ok=True)
+    kept = posters_dir / f"{digest}{Path(output_path).suffix}"
+    if not kept.exists():
+        try:
+            os.link(output_path, kept)
+        except OSError:
+            shutil.copy2(output_path, kept)
+    return str(kept)
+
+
+def _load_results(path):
+    """row_id -> last result line recorded in a shard file"""
+    results = {}
+    if Path(path).exists():
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    result = json.loads(line)
+                    results[result['row_id']] = result
+    return results
+
+
+def run_shard(generator, manifest_path, shard, num_shards, results_dir, api_token=None):
+    """Render this node's rows of a manifest; returns (rendered, skipped, failed)"""
+    results_path = shard_results_path(results_dir, shard, num_shards)
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    posters_dir = Path(results_dir) / "posters"
+    done = {row_id: result for row_id, result in _load_results(results_path).items()
+            if result['status'] == 'ok' and _poster_exists(result)}
+    by_hash = {result['param_hash']: result for result in done.values()}
+    api_token = api_token or os.getenv("HF_API_TOKEN", "")
+
+    rendered = skipped = failed = 0
+    with open(results_path, 'a', encoding='utf-8') as out:
+        for row_id, params in read_manifest(manifest_path):
+            if shard_of(params, num_shards) != shard:
+                continue
+            if row_id in done:
+                skipped += 1
+                continue
+
+            digest = param_hash(params)
+            started = time.monotonic()
+            if digest in by_hash and _poster_exists(by_hash[digest]):
+                # Duplicate row: reuse the poster rendered for the same parameters
+                previous = by_hash[digest]
+                result = dict(previous, row_id=row_id, duplicate_of=previous['row_id'], seconds=0.0)
+            else:
+                try:
+                    poster, caption, status_log, _, output_path = generator.generate_poster(
+                        params['prompt'], api_token, params['selected_model'],
+                        params['tone_override'], params['color_scheme'], params['include_logo'],
+                        params['logo_position'], params['poster_size'], params['inference_steps'],
+                        params['guidance_scale'], params['image_style'],
+                        priority=params['priority']
+                    )
+                    if poster is not None and output_path:
+                        result = {
+                            'status': 'ok',
+                            'output_path': _keep_poster(output_path, posters_dir, digest),
+                            'caption': caption
+                        }
+                    else:
+                        result = {'status': 'failed', 'error': status_log.splitlines()[0] if status_log else ""}
+                except Exception as e:
+                    result = {'status': 'failed', 'error': str(e)}
+                result.update(row_id=row_id, param_hash=digest, seconds=round(time.monotonic() - started, 3))
+
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            if result['status'] == 'ok':
+                by_hash[digest] = result
+                rendered += 1
+                print(f"✅ [{shard}/{num_shards}] row {row_id} -> {result['output_path']}")
+            else:
+                failed += 1
+                print(f"❌ [{shard}/{num_shards}] row {row_id}: {result['error']}")
+    return rendered, skipped, failed
+
+
+def merge(manifest_path, num_shards, results_dir, output_path=None):
+    """Assemble shard results in manifest order; returns the list of missing row ids"""
+    results = {}
+    missing_shards = []
+    for shard in range(num_shards):
+        path = shard_results_path(results_dir, shard, num_shards)
+        if not path.exists():
+            missing_shards.append(shard)
+        results.update(_load_results(path))
+
+    output_path = Path(output_path or Path(results_dir) / "merged.csv")
+    missing = []
+    fieldnames = ['id', *JOB_PARAM_DEFAULTS, 'shard', 'status', 'output_path', 'caption', 'error']
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        total = 0
+        for row_id, params in read_manifest(manifest_path):
+            total += 1
+            result = results.get(row_id)
+            if result is not None and result['status'] == 'ok' and not _poster_exists(result):
+                result = dict(result, status='missing_file', error="poster file not found")
+            if result is None or result['status'] != 'ok':
+                missing.append(row_id)
+            result = result or {'status': 'missing'}
+            writer.writerow({
+                'id': row_id, **params,
+                'shard': shard_of(params, num_shards),
+                'status': result['status'],
+                'output_path': result.get('output_path', ""),
+                'caption': result.get('caption', ""),
+                'error': result.get('error', "")
+            })
+
+    print(f"📦 Merged {total - len(missing)}/{total} rows into {output_path}")
+    if missing_shards:
+        print(f"⚠️  No results file for shard(s): {missing_shards}")
+    if missing:
+        preview = ", ".join(missing[:20]) + (" ..." if len(missing) > 20 else "")
+        print(f"⚠️  {len(missing)} row(s) missing or failed: {preview}")
+    return missing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded batch rendering of poster manifests")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="render one shard of a manifest")
+    run_parser.add_argument("manifest")
+    run_parser.add_argument("--shard", type=int, required=True)
+    run_parser.add_argument("--num-shards", type=int, required=True)
+    run_parser.add_argument("--results-dir", default="batch_results")
+    run_parser.add_argument("--token", default=None, help="HF API token (default: HF_API_TOKEN)")
+
+    merge_parser = subparsers.add_parser("merge", help="merge shard results into one manifest")
+    merge_parser.add_argument("manifest")
+    merge_parser.add_argument("--num-shards", type=int, required=True)
+    merge_parser.add_argument("--results-dir", default="batch_results")
+    merge_parser.add_argument("--output", default=None)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        if not 0 <= args.shard < args.num_shards:
+            parser.error("--shard must be between 0 and --num-shards - 1")
+        from app import APIPosterGenerator
+
+        # Only the rendering pipeline: no job workers on the shared jobs database,
+        # no keep-warm pings and no example precompute
+        generator = APIPosterGenerator(precompute_examples=False, job_queue=False, model_warmup=False)
+        rendered, skipped, failed = run_shard(
+            generator, args.manifest, args.shard, args.num_shards,
+            args.results_dir, api_token=args.token
+        )
+        print(f"\n✅ Shard {args.shard}/{args.num_shards}: {rendered} rendered, "
+              f"{skipped} already done, {failed} failed")
+    else:
+        missing = merge(args.manifest, args.num_shards, args.results_dir, args.output)
+        raise SystemExit(1 if missing else 0)
@@ -5,6 +5,7 @@ class Branding:
     def __init__(self, logo_path):
         self.logo_path = Path(logo_path)
         self.logo = self._load_logo()
+        self._resized_logos = {}
         
     def _load_logo(self):
         """Load or create default logo"""
@@ -25,21 +26,38 @@ class Branding:
         draw.rectangle([40, 85, 160, 115], fill=(255, 255, 255, 255))
         return img
     
+    def _get_resized_logo(self, logo_size):
+        """Return the logo resized to logo_size, resizing only once per size"""
+        if logo_size not in self._resized_logos:
+            self._resized_logos[logo_size] = self.logo.resize(logo_size, Image.Resampling.LANCZOS)
+        return self._resized_logos[logo_size]
+    
+    def warm(self, logo_size=(120, 120)):
+        """Pre-resize the logo so add_logo only has to paste"""
+        if self.logo is not None:
+            self._get_resized_logo(logo_size)
+    
+    def logo_placement(self, poster_size, position='top-right', scale=1.0):
+        """Resized logo and its top-left corner for a poster size (scale 1 = 120px logo)"""
+        side = max(1, round(120 * scale))
+        margin = round(20 * scale)
+        logo_size = (side, side)
+        logo_resized = self._get_resized_logo(logo_size)
+        width, height = poster_size
+        
+        positions = {
+            'top-right': (width - logo_size[0] - margin, margin),
+            'top-left': (margin, margin),
+            'bottom-right': (width - logo_size[0] - margin, height - logo_size[1] - margin),
+            'bottom-left': (margin, height - logo_size[1] - margin)
+        }
+        return logo_resized, positions.get(position, positions['top-right'])
+    
     def add_logo(self, poster, position='top-right'):
         """Add logo to poster"""
         if self.logo is None:
             return poster
         
-        logo_size = (120, 120)
-        logo_resized = self.logo.resize(logo_size, Image.Resampling.LANCZOS)
-        
-        positions = {
-            'top-right': (poster.width - logo_size[0] - 20, 20),
-            'top-left': (20, 20),
-            'bottom-right': (poster.width - logo_size[0] - 20, poster.height - logo_size[1] - 20),
-            'bottom-left': (20, poster.height - logo_size[1] - 20)
-        }
-        
-        x, y = positions.get(position, positions['top-right'])
+        logo_resized, (x, y) = self.logo_placement(poster.size, position)
         poster.paste(logo_resized, (x, y), logo_resized)
-        return poster
\ No newline at end of file
+        return poster
@@ -0,0 +1,345 @@
+"""
+Pluggable cache backends for generated images and pipeline artifacts.
+
+All backends store opaque bytes under string keys:
+- LRUCacheBackend: in-process, bounded by total bytes
+- FileCacheBackend: shared filesystem (NFS/EFS), atomic writes + file locks,
+  bounded by total bytes
+- NetworkCacheBackend: HTTP key-value service; `python -m modules.cache_backends serve`
+  starts a local stand-in server with the same protocol
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+from abc import ABC, abstractmethod
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: atomic os.replace still protects readers
+    fcntl = None
+
+
+def cache_key(namespace, *parts):
+    """Build a backend key from a namespace and plain-Python parts"""
+    digest = hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+    return f"{namespace}-{digest}"
+
+
+class CacheBackend(ABC):
+    """Interface shared by all cache backends"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, key):
+        """Return cached bytes or None"""
+
+    @abstractmethod
+    def set(self, key, value):
+        """Store bytes under key"""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove key if present"""
+
+    def _record(self, value):
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self):
+        """Return hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            'backend': type(self).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-process LRU bounded by the total size of stored values"""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return self._record(value)
+
+    def set(self, key, value):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+            self._items[key] = value
+            self.total_bytes += len(value)
+            while self.total_bytes > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def delete(self, key):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+
+
+class FileCacheBackend(CacheBackend):
+    """
+    Cache on a filesystem shared by several replicas.
+
+    Writes go to a temporary file that is atomically renamed into place, so
+    readers never see partial values. Entries live in 256 shard directories
+    (last two hex digits of the key), each with one lock file that
+    serializes writers, so lock files never accumulate per key.
+
+    With max_bytes set, the total size is tracked per process from the
+    writes it makes; when that estimate passes the cap the shard
+    directories are re-scanned (the true total across replicas) and the
+    least recently used entries (hits refresh the mtime) are removed down to
+    90% of the cap.
+    """
+
+    LOCK_NAME = ".lock"
+
+    def __init__(self, root, max_bytes=None):
+        super().__init__()
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes or None
+        self._size_lock = threading.Lock()
+        self.total_bytes = sum(size for _, _, size in self._scan())
+
+    def _path(self, key):
+        return self.root / key[-2:] / key
+
+    @contextmanager
+    def _locked(self, shard_dir):
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(shard_dir / self.LOCK_NAME, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _scan(self):
+        """(path, mtime, size) of every entry, skipping shard locks and unfinished writes"""
+        entries = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir() or len(shard.name) != 2:
+                continue  # e.g. the pixel cache living under the same root
+            for entry in os.scandir(shard.path):
+                if entry.name == self.LOCK_NAME or entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is at 90% of max_bytes"""
+        entries = sorted(self._scan(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        removed = 0
+        for path, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        with self._size_lock:
+            self.total_bytes = total
+        if removed:
+            print(f"🧹 File cache: evicted {removed} entries ({total / 1024 / 1024:.0f} MB left)")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = f.read()
+        except FileNotFoundError:
+            return self._record(None)
+        if self.max_bytes:
+            try:
+                os.utime(path)  # recency for eviction
+            except OSError:
+                pass
+        return self._record(value)
+
+    def set(self, key, value):
+        path = self._path(key)
+        with self._locked(path.parent):
+            try:
+                previous = path.stat().st_size
+            except FileNotFoundError:
+                previous = 0
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(value)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        with self._size_lock:
+            self.total_bytes += len(value) - previous
+            over = self.max_bytes is not None and self.total_bytes > self.max_bytes
+        if over:
+            self._evict()
+
+    def delete(self, key):
+        path = self._path(key)
+        with self._locked(path.parent):
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                return
+        with self._size_lock:
+            self.total_bytes -= size
+
+
+class NetworkCacheBackend(CacheBackend):
+    """
+    HTTP key-value cache: GET/PUT/DELETE <base_url>/cache/<key>.
+
+    Network errors are treated as misses so a cache outage never fails a
+    poster request.
+    """
+
+    def __init__(self, base_url, timeout=5.0):
+        super().__init__()
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method, key, data=None):
+        request = urllib.request.Request(f"{self.base_url}/cache/{key}", data=data, method=method)
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def get(self, key):
+        try:
+            with self._request("GET", key) as response:
+                return self._record(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                print(f"Warning: Cache GET failed: {e}")
+        except (urllib.error.URLError, OSError) as e:
+            print(f"Warning: Cache server unreachable: {e}")
+        return self._record(None)
+
+    def set(self, key, value):
+        try:
+            with self._request("PUT", key, data=value):
+                pass
+        except (urllib.error.URLError, OSError) as e:
+            print(f"Warning: Cache PUT failed: {e}")
+
+    def delete(self, key):
+        try:
+            with self._request("DELETE", key):
+                pass
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                print(f"Warning: Cache DELETE failed: {e}")
+        except (urllib.error.URLError, OSError) as e:
+            print(f"Warning: Cache DELETE failed: {e}")
+
+
+def create_cache_backend(kind, cache_dir=None, cache_url=None, max_bytes=None):
+    """Build the backend named by CACHE_BACKEND (None for 'none')"""
+    kind = (kind or "memory").lower()
+    if kind == "none":
+        return None
+    if kind == "file":
+        return FileCacheBackend(cache_dir, max_bytes)
+    if kind == "network":
+        return NetworkCacheBackend(cache_url)
+    return LRUCacheBackend(max_bytes or 256 * 1024 * 1024)
+
+
+def make_cache_server(host="127.0.0.1", port=8765, max_bytes=1024 * 1024 * 1024):
+    """Create a stand-in HTTP cache server backed by an in-process LRU"""
+    store = LRUCacheBackend(max_bytes)
+
+    class CacheRequestHandler(BaseHTTPRequestHandler):
+        def _key(self):
+            prefix = "/cache/"
+            return self.path[len(prefix):] if self.path.startswith(prefix) else None
+
+        def do_GET(self):
+            key = self._key()
+            value = store.get(key) if key else None
+            if value is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(value)))
+            self.end_headers()
+            self.wfile.write(value)
+
+        def do_PUT(self):
+            key = self._key()
+            if not key:
+                self.send_error(400)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            store.set(key, self.rfile.read(length))
+            self.send_response(204)
+            self.end_headers()
+
+        def do_DELETE(self):
+            key = self._key()
+            if key:
+                store.delete(key)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), CacheRequestHandler)
+    server.store = store
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in network cache server")
+    parser.add_argument("command", choices=["serve"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-mb", type=float, default=1024)
+    args = parser.parse_args()
+
+    server = make_cache_server(args.host, args.port, int(args.max_mb * 1024 * 1024))
+    print(f"🗄️  Cache server listening on http://{args.host}:{args.port}/cache/")
+    server.serve_forever()
@@ -0,0 +1,202 @@
+"""
+Corpus mode for EnhancedTextAnalyzer.
+
+Analyzes large collections of candidate texts in chunks across worker
+processes (each worker loads NLTK and the analyzer once), streams the
+per-text results in input order and aggregates condition, tone and
+percentage distributions, plus the background combinations the texts
+would request. Run with:
+
+    python -m modules.corpus_analyzer texts.txt [--output results.jsonl] [--workers 8] [--top 15]
+
+Input is a .txt file (one text per line), a .jsonl file or a .csv file
+(`text` or `prompt` field).
+"""
+
+import argparse
+import csv
+import json
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+# Per-worker analyzer, created once by _init_worker
+_worker_components = {}
+
+
+def _init_worker():
+    from modules.text_analyzer import EnhancedTextAnalyzer
+
+    _worker_components['analyzer'] = EnhancedTextAnalyzer()
+
+
+def _analyze_chunk(texts):
+    """Pool task: analyze a list of texts with this worker's analyzer"""
+    analyzer = _worker_components['analyzer']
+    results = []
+    for text in texts:
+        result = analyzer.analyze(text)
+        result['key_phrases'].pop('full_text', None)  # the caller already has the text
+        results.append(result)
+    return results
+
+
+def _chunks(texts, chunk_size):
+    iterator = iter(texts)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyze_corpus(texts, workers=None, chunk_size=200):
+    """Yield (index, text, result) for every text, in input order.
+
+    `texts` may be any iterable (including a generator over a large file);
+    it is consumed lazily, with at most two chunks per worker in flight.
+    Each result is EnhancedTextAnalyzer.analyze() output without
+    key_phrases['full_text']. workers=1 analyzes in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, int(chunk_size))
+    index = 0
+
+    if workers == 1:
+        _init_worker()
+        for chunk in _chunks(texts, chunk_size):
+            for text, result in zip(chunk, _analyze_chunk(chunk)):
+                yield index, text, result
+                index += 1
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        in_flight = deque()
+        chunks = _chunks(texts, chunk_size)
+        for chunk in chunks:
+            in_flight.append((chunk, executor.submit(_analyze_chunk, chunk)))
+            if len(in_flight) >= workers * 2:
+                break
+        while in_flight:
+            chunk, future = in_flight.popleft()
+            results = future.result()
+            next_chunk = next(chunks, None)
+            if next_chunk is not None:
+                in_flight.append((next_chunk, executor.submit(_analyze_chunk, next_chunk)))
+            for text, result in zip(chunk, results):
+                yield index, text, result
+                index += 1
+
+
+class CorpusStats:
+    """
+    Aggregate distributions over analyzed texts.
+
+    `combinations` counts (condition, accuracy, tone) as the background
+    prompt would use them (HuggingFaceAPIGenerator.build_prompt: first
+    condition or 'medical', first percentage or '95%'), i.e. how many texts
+    would share each pre-generated background per image style. With a
+    PromptCanonicalizer the combinations are its canonical inputs instead.
+    """
+
+    def __init__(self, canonicalizer=None):
+        self.canonicalizer = canonicalizer
+        self.texts = 0
+        self.conditions = Counter()
+        self.tones = Counter()
+        self.percentages = Counter()
+        self.combinations = Counter()
+
+    def add(self, result):
+        key_phrases = result['key_phrases']
+        tone = result['tone']['primary_tone']
+        self.texts += 1
+        self.conditions.update(key_phrases['conditions'] or ['(none)'])
+        self.tones[tone] += 1
+        self.percentages.update(key_phrases['percentages'] or ['(none)'])
+        if self.canonicalizer is not None:
+            canonical = self.canonicalizer.canonical_inputs(key_phrases, tone, None)
+            condition, accuracy, tone = canonical['condition'], canonical['accuracy'], canonical['tone']
+        else:
+            condition = key_phrases['conditions'][0] if key_phrases['conditions'] else 'medical'
+            accuracy = key_phrases['percentages'][0] if key_phrases['percentages'] else '95%'
+        self.combinations[(condition, accuracy, tone)] += 1
+
+    def to_dict(self, top=None):
+        return {
+            'texts': self.texts,
+            'conditions': dict(self.conditions.most_common(top)),
+            'tones': dict(self.tones.most_common(top)),
+            'percentages': dict(self.percentages.most_common(top)),
+            'combinations': [
+                {'condition': condition, 'accuracy': accuracy, 'tone': tone, 'texts': count}
+                for (condition, accuracy, tone), count in self.combinations.most_common(top)
+            ]
+        }
+
+    def report(self, top=15):
+        """Print the distributions and the most shared background combinations"""
+        print(f"📚 {self.texts} text(s) analyzed\n")
+        for title, counter in (("Conditions", self.conditions), ("Tones", self.tones),
+                               ("Percentages", self.percentages)):
+            print(f"{title}:")
+            for value, count in counter.most_common(top):
+                print(f"  {value:<16} {count:>7}  ({100 * count / max(1, self.texts):.1f}%)")
+            print()
+
+        print("Background combinations to pre-generate (condition, accuracy, tone):")
+        covered = 0
+        for (condition, accuracy, tone), count in self.combinations.most_common(top):
+            covered += count
+            print(f"  {condition:<12} {accuracy:<6} {tone:<13} {count:>7}  "
+                  f"(cumulative {100 * covered / max(1, self.texts):.1f}%)")
+        print(f"  {len(self.combinations)} distinct combination(s) in total")
+
+
+def read_texts(path):
+    """Yield texts from a .txt (one per line), .jsonl or .csv file"""
+    path = Path(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        suffix = path.suffix.lower()
+        if suffix in ('.jsonl', '.ndjson'):
+            records = (json.loads(line) for line in f if line.strip())
+        elif suffix == '.csv':
+            records = csv.DictReader(f)
+        else:
+            records = ({'text': line.strip()} for line in f if line.strip())
+        for record in records:
+            text = record.get('text') or record.get('prompt')
+            if text:
+                yield text
+
+
+if __name__ == "__main__":
+    from config import CORPUS_WORKERS, CORPUS_CHUNK_SIZE, PROMPT_CANONICALIZATION, ACCURACY_BUCKETS
+    from modules.prompt_canonicalizer import PromptCanonicalizer
+
+    parser = argparse.ArgumentParser(description="Analyze a corpus of candidate poster texts")
+    parser.add_argument("texts", help=".txt (one text per line), .jsonl or .csv file")
+    parser.add_argument("--output", default=None, help="write per-text results as JSONL")
+    parser.add_argument("--stats", default=None, help="write the aggregate distributions as JSON")
+    parser.add_argument("--workers", type=int, default=CORPUS_WORKERS or None)
+    parser.add_argument("--chunk-size", type=int, default=CORPUS_CHUNK_SIZE)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    stats = CorpusStats(PromptCanonicalizer(ACCURACY_BUCKETS) if PROMPT_CANONICALIZATION else None)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        for index, text, result in analyze_corpus(read_texts(args.texts), args.workers, args.chunk_size):
+            stats.add(result)
+            if out is not None:
+                out.write(json.dumps({'index': index, 'text': text, **result}) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+
+    stats.report(args.top)
+    if args.stats:
+        with open(args.stats, 'w', encoding='utf-8') as f:
+            json.dump(stats.to_dict(), f, indent=2)
@@ -0,0 +1,126 @@
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+# Timed-out calls still running in their helper threads. Abandoned API calls
+# end on their own (generate_image stops retrying once its deadline is gone),
+# but a hung endpoint could pile them up, so past this many no new call is
+# started and callers fall back at once.
+MAX_ABANDONED_CALLS = 16
+_abandoned_calls = 0
+_abandoned_lock = threading.Lock()
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of its latency budget"""
+    pass
+
+
+class Deadline:
+    """
+    End-to-end latency budget for a single poster request.
+
+    A budget of None or 0 means "no deadline": remaining() is infinite and
+    check() never raises.
+    """
+    
+    def __init__(self, budget_seconds=None):
+        self.budget = budget_seconds if budget_seconds and budget_seconds > 0 else None
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + self.budget if self.budget else None
+    
+    def elapsed(self):
+        """Seconds since the request started"""
+        return time.monotonic() - self.started_at
+    
+    def remaining(self, reserve=0.0):
+        """Seconds left, minus an optional reserve kept for later stages"""
+        if self.expires_at is None:
+            return float('inf')
+        return max(0.0, self.expires_at - time.monotonic() - reserve)
+    
+    def expired(self):
+        """True once the budget is used up"""
+        return self.remaining() <= 0
+    
+    def check(self, stage):
+        """Raise DeadlineExceeded if the budget ran out before `stage`"""
+        if self.expired():
+            raise DeadlineExceeded(f"Latency budget of {self.budget:.0f}s exceeded before {stage}")
+    
+    def with_reserve(self, seconds):
+        """Return a Deadline that expires `seconds` earlier, leaving time for later stages"""
+        child = Deadline()
+        child.budget = self.budget
+        child.started_at = self.started_at
+        if self.expires_at is not None:
+            child.expires_at = self.expires_at - seconds
+        return child
+    
+    def sleep(self, seconds, stage="retry"):
+        """Sleep for a backoff period, refusing to sleep past the deadline"""
+        if seconds >= self.remaining():
+            raise DeadlineExceeded(f"Latency budget of {self.budget:.0f}s exceeded during {stage}")
+        time.sleep(seconds)
+
+
+def abandoned_calls():
+    """Timed-out calls whose helper threads are still running"""
+    return _abandoned_calls
+
+
+def _call_finished(future):
+    global _abandoned_calls
+    with _abandoned_lock:
+        _abandoned_calls -= 1
+
+
+def call_with_deadline(deadline, fn):
+    """Run fn() in a helper thread and wait at most deadline.remaining() seconds.
+
+    On timeout the call keeps running in the background and its result is
+    discarded; DeadlineExceeded is raised to the caller. Each call gets its
+    own daemon thread, so waiting calls never queue behind abandoned ones;
+    with MAX_ABANDONED_CALLS abandoned calls still running, DeadlineExceeded
+    is raised without starting fn.
+    """
+    global _abandoned_calls
+    if deadline is None or deadline.expires_at is None:
+        return fn()
+
+    with _abandoned_lock:
+        if _abandoned_calls >= MAX_ABANDONED_CALLS:
+            raise DeadlineExceeded(
+                f"{_abandoned_calls} timed-out calls are still running; not starting another"
+            )
+
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="deadline-call", daemon=True).start()
+    try:
+        return wait_with_deadline(deadline, future)
+    except DeadlineExceeded:
+        with _abandoned_lock:
+            _abandoned_calls += 1
+        future.add_done_callback(_call_finished)
+        raise
+
+
+def wait_with_deadline(deadline, future):
+    """Wait for a concurrent.futures.Future at most deadline.remaining() seconds.
+
+    The future is left running on timeout; DeadlineExceeded is raised.
+    """
+    timeout = None if deadline is None or deadline.expires_at is None else deadline.remaining()
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise DeadlineExceeded(f"Latency budget of {deadline.budget:.0f}s exceeded waiting for a result")
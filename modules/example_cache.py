@@ -0,0 +1,172 @@
+"""
+Precomputed posters for the built-in example prompts.
+
+Every example prompt is rendered for each configured poster size with the
+other settings at their UI defaults. Posters live in the output store; a
+manifest (<store>/examples.json) maps each (prompt, settings) combination to
+its poster and caption. Entries are tagged with a version hash of the
+layout, branding, background, analysis and caption code plus the
+palettes, so they are re-rendered automatically after such changes.
+Regenerate by hand with:
+
+    python -m modules.example_cache regenerate [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from modules.job_api import JOB_PARAM_DEFAULTS
+from modules.stage_cache import fingerprint
+
+# Code whose changes make stored example posters stale (relative to the repo root)
+VERSIONED_MODULES = [
+    'modules/layout_designer.py', 'modules/text_fitter.py', 'modules/branding.py', 'modules/style_selector.py',
+    'modules/text_analyzer.py', 'modules/caption_generator.py', 'modules/hf_api_generator.py',
+    'modules/prompt_canonicalizer.py', 'modules/image_generator.py', 'utils/image_utils.py'
+]
+
+# Settings that select a stored example poster
+EXAMPLE_SETTINGS = [name for name in JOB_PARAM_DEFAULTS if name not in ('prompt', 'priority')]
+
+
+def render_version(palettes):
+    """Hash of the rendering code and palettes"""
+    digest = hashlib.sha256()
+    repo_root = Path(__file__).resolve().parent.parent
+    for name in VERSIONED_MODULES:
+        path = repo_root / name
+        if path.exists():
+            digest.update(path.read_bytes())
+    digest.update(json.dumps(palettes, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class ExampleCache:
+    """
+    Manifest of precomputed example posters in the output store.
+
+    lookup() is a dict access plus an existence check, so a click on an
+    example is served without analysis or an API call.
+    """
+
+    MANIFEST_NAME = "examples.json"
+
+    def __init__(self, output_store, prompts, poster_sizes, version, defaults=None):
+        self.output_store = output_store
+        self.prompts = list(prompts)
+        self.poster_sizes = list(poster_sizes)
+        self.version = version
+        self.defaults = dict(defaults or JOB_PARAM_DEFAULTS)
+        self.manifest_path = Path(output_store.root) / self.MANIFEST_NAME
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self._thread = None
+
+    def _load(self):
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def _write(self):
+        """Persist the manifest (caller holds the lock)"""
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def key(self, prompt, settings):
+        return fingerprint("example", prompt, *(settings[name] for name in EXAMPLE_SETTINGS))
+
+    def combinations(self):
+        """(prompt, settings) for every example poster to precompute"""
+        for prompt in self.prompts:
+            for poster_size in self.poster_sizes:
+                settings = {name: self.defaults[name] for name in EXAMPLE_SETTINGS}
+                settings['poster_size'] = poster_size
+                yield prompt, settings
+
+    def lookup(self, prompt, settings):
+        """Stored entry for an example with these settings (None if absent or stale)"""
+        if prompt not in self.prompts or any(name not in settings for name in EXAMPLE_SETTINGS):
+            return None
+        with self._lock:
+            entry = self._entries.get(self.key(prompt, settings))
+        if entry is None or entry['version'] != self.version or not Path(entry['output_path']).exists():
+            return None
+        return entry
+
+    def precompute(self, generate, api_token, force=False):
+        """Render missing or stale examples; returns (rendered, up to date, failed)
+
+        generate is APIPosterGenerator.generate_poster.
+        """
+        rendered = current = failed = 0
+        for prompt, settings in self.combinations():
+            if not force and self.lookup(prompt, settings) is not None:
+                current += 1
+                continue
+            try:
+                poster, caption, status_log, _, output_path = generate(
+                    prompt, api_token, settings['selected_model'], settings['tone_override'],
+                    settings['color_scheme'], settings['include_logo'], settings['logo_position'],
+                    settings['poster_size'], settings['inference_steps'], settings['guidance_scale'],
+                    settings['image_style'], priority='batch'
+                )
+            except Exception as e:
+                poster, status_log = None, str(e)
+            if poster is None:
+                failed += 1
+                print(f"❌ Example '{prompt[:40]}...' ({settings['poster_size']}): "
+                      f"{status_log.splitlines()[0] if status_log else 'failed'}")
+                continue
+            with self._lock:
+                self._entries[self.key(prompt, settings)] = {
+                    'prompt': prompt,
+                    'poster_size': settings['poster_size'],
+                    'output_path': output_path,
+                    'caption': caption,
+                    'version': self.version,
+                    'rendered_at': time.time()
+                }
+                self._write()
+            rendered += 1
+        return rendered, current, failed
+
+    def start(self, generate, api_token):
+        """Precompute in a background thread (no-op without a token)"""
+        if not api_token or self._thread is not None:
+            return False
+
+        def run():
+            rendered, current, failed = self.precompute(generate, api_token)
+            print(f"💡 Example posters: {rendered} rendered, {current} up to date, {failed} failed")
+
+        self._thread = threading.Thread(target=run, name="example-precompute", daemon=True)
+        self._thread.start()
+        return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the example posters shown in the UI")
+    parser.add_argument("command", choices=["regenerate"])
+    parser.add_argument("--force", action="store_true", help="re-render even up-to-date examples")
+    parser.add_argument("--token", default=None, help="HF API token (default: HF_API_TOKEN)")
+    args = parser.parse_args()
+
+    from app import APIPosterGenerator
+
+    generator = APIPosterGenerator(precompute_examples=False)
+    rendered, current, failed = generator.example_cache.precompute(
+        generator.generate_poster, args.token or os.getenv("HF_API_TOKEN", ""), force=args.force
+    )
+    print(f"\n💡 Example posters: {rendered} rendered, {current} up to date, {failed} failed")
+    raise SystemExit(1 if failed else 0)
@@ -1,35 +1,79 @@
+import io
 import os
 from PIL import Image, ImageEnhance
 from huggingface_hub import InferenceClient
 import time
+from contextlib import nullcontext
+from modules.deadline import DeadlineExceeded
+from modules.scheduler import QuotaExceeded, mask_token
+from modules.token_pool import classify_api_error
+from modules.cache_backends import cache_key
+
+NEGATIVE_PROMPT = "blurry, bad quality, distorted, ugly, bad anatomy, watermark, text, signature, low resolution, deformed"
 
 class HuggingFaceAPIGenerator:
     """
     Image generator using Hugging Face Inference API (InferenceClient)
     """
     
-    def __init__(self, api_token=None, model_id="black-forest-labs/FLUX.1-schnell"):
+    def __init__(self, api_token=None, model_id="black-forest-labs/FLUX.1-schnell", cache=None,
+                 scheduler=None, latency_observer=None, canonicalizer=None, token_pool=None):
         """
         Initialize HF API generator
         
         Args:
             api_token: Hugging Face API token
             model_id: Model to use (default: FLUX.1-schnell - fast, free, good quality)
+            cache: Optional CacheBackend shared with other generators/replicas
+            scheduler: Optional FairScheduler enforcing per-token quotas across users
+            latency_observer: Optional callable(model_id, seconds, loading=False, steps=None,
+                size=None) told about every API response (e.g. ModelWarmer.observe)
+            canonicalizer: Optional PromptCanonicalizer normalizing prompt inputs
+            token_pool: Optional TokenPool; every API call then uses the least-loaded
+                pooled token instead of api_token
         """
+        self.token_pool = token_pool
+        if token_pool is not None and not api_token:
+            api_token = token_pool.tokens[0]
         self.api_token = api_token or os.environ.get("HF_API_TOKEN", "")
         self.model_id = model_id
         self.request_count = 0
+        self.cache = cache
+        self.scheduler = scheduler
+        self.latency_observer = latency_observer
+        self.canonicalizer = canonicalizer
         
         # Initialize InferenceClient
         if self.api_token:
             self.client = InferenceClient(token=self.api_token)  # Use 'token' not 'api_key'
         else:
             self.client = None
+        self._clients = {self.api_token: self.client} if self.client else {}
         
     def set_api_token(self, token):
         """Set or update API token"""
         self.api_token = token
         self.client = InferenceClient(token=self.api_token)
+        self._clients[token] = self.client
+    
+    def _acquire_token(self, priority):
+        """Token and client for one API call (the pool's least-loaded token when pooled)"""
+        if self.token_pool is None:
+            return self.api_token, self.client
+        token = self.token_pool.acquire(priority)
+        if token not in self._clients:
+            self._clients[token] = InferenceClient(token=token)
+        return token, self._clients[token]
+    
+    def _release_token(self, token, outcome):
+        if self.token_pool is not None:
+            self.token_pool.release(token, outcome)
+    
+    def quota_token(self, priority='interactive'):
+        """Token whose scheduler quota the next call would use"""
+        if self.token_pool is not None:
+            return self.token_pool.peek(priority) or self.api_token
+        return self.api_token
     
     def get_api_status(self):
         """Return API usage stats"""
@@ -38,6 +82,7 @@ class HuggingFaceAPIGenerator:
             "requests": self.request_count,
             "using_api": True,
             "token_set": bool(self.api_token),
+            "pooled_tokens": len(self.token_pool) if self.token_pool is not None else 0,
             "method": "huggingface_hub.InferenceClient"
         }
     
@@ -82,6 +127,38 @@ class HuggingFaceAPIGenerator:
         
         return ", ".join(prompt_parts)
     
+    def build_prompt(self, key_phrases, tone, style="photorealistic"):
+        """Build the API prompt from text-analysis results (no API call)"""
+        if self.canonicalizer is not None:
+            canonical = self.canonicalizer.canonical_inputs(key_phrases, tone, style)
+            return self._build_medical_prompt(
+                canonical['condition'], canonical['accuracy'], canonical['tone'], canonical['style']
+            )
+        
+        # Extract and process conditions
+        conditions = key_phrases.get('conditions', [])
+        if conditions and len(conditions) > 0:
+            condition = str(conditions[0])
+        else:
+            condition = 'medical'
+        
+        # FIXED: Handle percentages properly - extract first element if it's a list/tuple
+        percentages_data = key_phrases.get('percentages', ['95%'])
+        if isinstance(percentages_data, (list, tuple)) and len(percentages_data) > 0:
+            percentages = str(percentages_data[0])  # Extract first element and convert to string
+        elif isinstance(percentages_data, str):
+            percentages = percentages_data
+        else:
+            percentages = '95%'
+        
+        # Get tone value
+        if isinstance(tone, dict):
+            tone_value = str(tone.get('primary_tone', 'professional'))
+        else:
+            tone_value = str(tone)
+        
+        return self._build_medical_prompt(condition, percentages, tone_value, style)
+    
     def _enhance_image(self, image):
         """Basic enhancement"""
         try:
@@ -95,96 +172,233 @@ class HuggingFaceAPIGenerator:
             print(f"Enhancement warning: {e}")
         return image
     
+    def enhance_image(self, image):
+        """Apply the standard contrast/sharpness/color enhancement"""
+        return self._enhance_image(image)
+    
+    def image_cache_key(self, prompt, num_inference_steps, guidance_scale, width=1024, height=1024, seed=None):
+        """Cache key for a raw API image with these generation parameters"""
+        parts = [
+            "background", self.model_id, prompt, NEGATIVE_PROMPT,
+            int(num_inference_steps), float(guidance_scale), width, height
+        ]
+        if seed is not None:
+            parts.append(int(seed))
+        return cache_key(*parts)
+    
+    def _cache_get_image(self, key):
+        """Decode a cached image (None on miss or if no cache is configured)"""
+        if self.cache is None:
+            return None
+        data = self.cache.get(key)
+        if data is None:
+            return None
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+            return image
+        except Exception as e:
+            print(f"Warning: Discarding unreadable cached image: {e}")
+            self.cache.delete(key)
+            return None
+    
+    def _cache_put_image(self, key, image):
+        """Store a raw API image in the cache as PNG"""
+        if self.cache is None:
+            return
+        try:
+            buffer = io.BytesIO()
+            image.save(buffer, "PNG")
+            self.cache.set(key, buffer.getvalue())
+        except Exception as e:
+            print(f"Warning: Could not cache image: {e}")
+    
+    def _api_slot(self, user_id, priority, deadline, token=None):
+        """Scheduler slot for one API call (no-op without a scheduler)"""
+        if self.scheduler is None:
+            return nullcontext()
+        max_wait = deadline.remaining() if deadline is not None else None
+        return self.scheduler.slot(token or self.api_token, user_id, priority, max_wait=max_wait)
+    
+    def _observe(self, seconds, loading=False, steps=None, size=None):
+        """Report an API latency (or a 503 model-loading response) to the observer"""
+        if self.latency_observer is not None:
+            try:
+                self.latency_observer(self.model_id, seconds, loading=loading, steps=steps, size=size)
+            except Exception as e:
+                print(f"Warning: Latency observer failed: {e}")
+    
+    def ping(self, num_inference_steps=1, size=256, user_id="warmup", priority="batch"):
+        """Minimal low-step, small-size request that makes HF load the model.
+        
+        Returns the latency in seconds; raises like generate_image on failure.
+        """
+        if not self.api_token or not self.client:
+            raise ValueError("❌ HF API TOKEN MISSING: Please enter your Hugging Face API token")
+        
+        token, client = self._acquire_token(priority)
+        started = time.monotonic()
+        outcome = 'error'
+        try:
+            with self._api_slot(user_id, priority, None, token):
+                client.text_to_image(
+                    prompt="medical clinic",
+                    model=self.model_id,
+                    num_inference_steps=num_inference_steps,
+                    height=size,
+                    width=size
+                )
+            outcome = 'ok'
+        except QuotaExceeded:
+            outcome = None  # local scheduler quota, not an API answer
+            raise
+        except Exception as e:
+            if "loading" in str(e).lower() or "503" in str(e):
+                outcome = None
+                self._observe(time.monotonic() - started, loading=True)
+            else:
+                outcome = classify_api_error(str(e))
+            raise
+        finally:
+            self._release_token(token, outcome)
+        latency = time.monotonic() - started
+        self._observe(latency, steps=num_inference_steps, size=(size, size))
+        return latency
+    
     def generate_image(self, key_phrases, tone, colors, 
                       num_inference_steps=25,
                       guidance_scale=7.5,
-                      style="photorealistic"):
+                      style="photorealistic",
+                      deadline=None,
+                      enhance=True,
+                      user_id="anonymous",
+                      priority="interactive",
+                      stats=None,
+                      width=1024,
+                      height=1024,
+                      seed=None):
         """
         Generate image using Hugging Face InferenceClient
+        
+        Args:
+            deadline: Optional Deadline; retries and backoff waits stop once it is used up
+            enhance: Apply enhance_image() before returning (False returns the raw API image)
+            user_id: Caller identity for fair scheduling (e.g. the session id)
+            priority: Scheduler priority class ('interactive' or 'batch')
+            stats: Optional dict filled with 'cache' ('hit'/'miss'), 'attempts' and,
+                with a token pool, 'token' (masked)
+            width, height: Requested image size (drafts use a smaller one)
+            seed: Optional seed so a draft can be re-generated at full quality
         """
+        stats = stats if stats is not None else {}
         # Check if API token is set
         if not self.api_token or not self.client:
             raise ValueError("❌ HF API TOKEN MISSING: Please enter your Hugging Face API token")
         
-        # Extract and process conditions
-        conditions = key_phrases.get('conditions', [])
-        if conditions and len(conditions) > 0:
-            condition = str(conditions[0])
-        else:
-            condition = 'medical'
-        
-        # FIXED: Handle percentages properly - extract first element if it's a list/tuple
-        percentages_data = key_phrases.get('percentages', ['95%'])
-        if isinstance(percentages_data, (list, tuple)) and len(percentages_data) > 0:
-            percentages = str(percentages_data[0])  # Extract first element and convert to string
-        elif isinstance(percentages_data, str):
-            percentages = percentages_data
-        else:
-            percentages = '95%'
-        
-        # Get tone value
-        if isinstance(tone, dict):
-            tone_value = str(tone.get('primary_tone', 'professional'))
-        else:
-            tone_value = str(tone)
+        prompt = self.build_prompt(key_phrases, tone, style)
         
-        # Build prompt
-        prompt = self._build_medical_prompt(condition, percentages, tone_value, style)
+        # Shared cache (possibly filled by another replica)
+        image_key = self.image_cache_key(prompt, num_inference_steps, guidance_scale, width, height, seed)
+        image = self._cache_get_image(image_key)
+        stats['cache'] = 'hit' if image is not None else 'miss'
+        stats['attempts'] = 0
+        if image is not None:
+            print(f"♻️ Cache hit for {self.model_id} background")
+            return self._enhance_image(image) if enhance else image
         
         print(f"\n{'='*50}")
         print(f"🚀 USING HUGGING FACE INFERENCE CLIENT")
         print(f"{'='*50}")
         print(f"📤 Model: {self.model_id}")
         print(f"📤 Request #{self.request_count + 1}")
-        print(f"📤 Condition: {condition}")
-        print(f"📤 Accuracy: {percentages}")
         print(f"📤 Prompt: {prompt[:100]}...")
+        if seed is not None:
+            print(f"📤 Seed: {seed} ({width}x{height}, {num_inference_steps} steps)")
         print(f"{'='*50}")
         
         # Make API request with retry logic
         max_retries = 3
         for attempt in range(max_retries):
+            if deadline is not None:
+                deadline.check(f"HF API attempt {attempt + 1}")
+            stats['attempts'] = attempt + 1
+            token, client = self._acquire_token(priority)
+            if self.token_pool is not None:
+                stats['token'] = mask_token(token)
+            outcome = 'error'
             try:
                 # Use InferenceClient's text_to_image method with proper parameters
-                image = self.client.text_to_image(
-                    prompt=prompt,
-                    model=self.model_id,
-                    negative_prompt="blurry, bad quality, distorted, ugly, bad anatomy, watermark, text, signature, low resolution, deformed",
-                    guidance_scale=guidance_scale,
-                    num_inference_steps=num_inference_steps,
-                    height=1024,
-                    width=1024
-                )
+                # Older huggingface_hub releases have no seed argument
+                extra = {'seed': int(seed)} if seed is not None else {}
+                with self._api_slot(user_id, priority, deadline, token):
+                    started = time.monotonic()
+                    image = client.text_to_image(
+                        prompt=prompt,
+                        model=self.model_id,
+                        negative_prompt=NEGATIVE_PROMPT,
+                        guidance_scale=guidance_scale,
+                        num_inference_steps=num_inference_steps,
+                        height=height,
+                        width=width,
+                        **extra
+                    )
                 
                 # Success!
+                outcome = 'ok'
+                self._observe(time.monotonic() - started, steps=num_inference_steps, size=(width, height))
                 self.request_count += 1
-                image = self._enhance_image(image)
+                self._cache_put_image(image_key, image)
+                if enhance:
+                    image = self._enhance_image(image)
                 print(f"✅ Image generated via HF API! (Request #{self.request_count})")
                 return image
                     
+            except (DeadlineExceeded, QuotaExceeded):
+                outcome = None  # no API answer to hold against the token
+                raise
             except Exception as e:
                 error_str = str(e)
+                loading = "loading" in error_str.lower() or "503" in error_str
+                outcome = None if loading else classify_api_error(error_str)
+                self._release_token(token, outcome)
+                token = None
+                
+                # A pooled token that is rate limited or rejected: retry at once on another one
+                if self.token_pool is not None and outcome in ('rate_limited', 'invalid') \
+                        and self.token_pool.available() and attempt < max_retries - 1:
+                    print(f"🔑 {error_str[:80]} — retrying on another pooled token")
+                    continue
                 
                 # Check if model is loading
-                if "loading" in error_str.lower() or "503" in error_str:
+                if loading:
+                    self._observe(None, loading=True)
                     if attempt < max_retries - 1:
                         wait_time = 10 * (attempt + 1)
                         print(f"⏳ Model loading on HF servers. Waiting {wait_time} seconds... (Attempt {attempt + 1}/{max_retries})")
-                        time.sleep(wait_time)
+                        if deadline is not None:
+                            deadline.sleep(wait_time, "model loading wait")
+                        else:
+                            time.sleep(wait_time)
                         continue
                     else:
                         raise Exception("Model failed to load after multiple retries")
                 
-                # Check for quota/exceeded errors
-                elif "quota" in error_str.lower() or "exceeded" in error_str.lower() or "429" in error_str:
+                # Check for quota/rate-limit errors (connection errors are retried below)
+                elif outcome == 'rate_limited':
                     raise Exception(f"API quota exceeded or rate limited: {error_str}")
                 
                 # Other errors
                 if attempt < max_retries - 1:
                     print(f"⚠️ Error: {error_str}. Retrying... (Attempt {attempt + 1}/{max_retries})")
-                    time.sleep(5)
+                    if deadline is not None:
+                        deadline.sleep(5, "retry backoff")
+                    else:
+                        time.sleep(5)
                 else:
                     raise Exception(f"Failed to generate image: {error_str}")
+            finally:
+                if token is not None:
+                    self._release_token(token, outcome)
         
         raise Exception("Failed to generate image after multiple attempts")
     
@@ -1,54 +1,132 @@
 # Fallback Template Generator
 from PIL import Image, ImageDraw, ImageFilter
+import numpy as np
 import random
 import math
 import hashlib
 from pathlib import Path
 
 class DynamicImageGenerator:
+    ICON_SIZE = 100
+    
+    # Placeholder colours for icons missing from icons_dir
+    PLACEHOLDER_ICONS = {
+        "heart": (255, 99, 132),
+        "diabetes": (54, 162, 235),
+        "brain": (153, 102, 255),
+        "stethoscope": (75, 192, 192),
+        "ecg": (255, 159, 64),
+        "pill": (255, 205, 86),
+        "hospital": (201, 203, 207),
+        "doctor": (255, 99, 132)
+    }
+    
+    # Icons shown for each condition found by EnhancedTextAnalyzer
+    CONDITION_ICONS = {
+        "heart": ["heart", "ecg"],
+        "diabetes": ["diabetes", "pill"],
+        "brain": ["brain"],
+        "cancer": ["doctor", "hospital"],
+        "respiratory": ["stethoscope"],
+        "general": ["hospital", "doctor"]
+    }
+    
     def __init__(self, icons_dir):
         self.icons_dir = Path(icons_dir)
-        self.icons = self._load_icons()
+        self.icon_atlas, self.icon_boxes = self._build_icon_atlas(self._load_icons())
         
     def _load_icons(self):
-        """Load medical icons"""
+        """Decode medical icons from icons_dir once, resized to ICON_SIZE"""
         icons = {}
         if self.icons_dir.exists():
-            for icon_file in self.icons_dir.glob("*.png"):
-                icons[icon_file.stem] = str(icon_file)
+            for icon_file in sorted(self.icons_dir.glob("*.png")):
+                try:
+                    with Image.open(icon_file) as icon:
+                        icons[icon_file.stem] = icon.convert('RGBA').resize(
+                            (self.ICON_SIZE, self.ICON_SIZE), Image.Resampling.LANCZOS
+                        )
+                except Exception as e:
+                    print(f"Warning: Could not load icon {icon_file}: {e}")
         return icons
     
-    def _create_placeholder_icons(self):
-        """Create simple placeholder icons"""
-        icon_colors = {
-            "heart": (255, 99, 132),
-            "diabetes": (54, 162, 235),
-            "brain": (153, 102, 255),
-            "stethoscope": (75, 192, 192),
-            "ecg": (255, 159, 64),
-            "pill": (255, 205, 86),
-            "hospital": (201, 203, 207),
-            "doctor": (255, 99, 132)
-        }
+    def _create_placeholder_icon(self, icon_name, color):
+        """Draw a simple placeholder icon in memory"""
+        img = Image.new('RGBA', (100, 100), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        
+        if icon_name == "heart":
+            draw.polygon([(50, 25), (30, 45), (50, 65), (70, 45)], fill=color)
+            draw.ellipse([25, 15, 45, 35], fill=color)
+            draw.ellipse([55, 15, 75, 35], fill=color)
+        elif icon_name == "diabetes":
+            draw.polygon([(50, 20), (30, 60), (70, 60)], fill=color)
+            draw.ellipse([40, 50, 60, 70], fill=color)
+        else:
+            draw.rectangle([40, 20, 60, 80], fill=color)
+            draw.rectangle([20, 40, 80, 60], fill=color)
+        
+        if img.size != (self.ICON_SIZE, self.ICON_SIZE):
+            img = img.resize((self.ICON_SIZE, self.ICON_SIZE), Image.Resampling.LANCZOS)
+        return img
+    
+    def _build_icon_atlas(self, icons):
+        """Pack loaded and placeholder icons into one RGBA sheet.
+        
+        Returns (atlas, boxes) where boxes maps icon name to its crop box.
+        """
+        for icon_name, color in self.PLACEHOLDER_ICONS.items():
+            if icon_name not in icons:
+                icons[icon_name] = self._create_placeholder_icon(icon_name, color)
+        
+        names = sorted(icons)
+        columns = max(1, math.ceil(math.sqrt(len(names))))
+        rows = max(1, math.ceil(len(names) / columns))
+        atlas = Image.new('RGBA', (columns * self.ICON_SIZE, rows * self.ICON_SIZE), (0, 0, 0, 0))
+        
+        boxes = {}
+        for i, name in enumerate(names):
+            x = (i % columns) * self.ICON_SIZE
+            y = (i // columns) * self.ICON_SIZE
+            atlas.paste(icons[name], (x, y))
+            boxes[name] = (x, y, x + self.ICON_SIZE, y + self.ICON_SIZE)
+        return atlas, boxes
+    
+    def get_icon(self, name):
+        """Crop an icon from the atlas (None if unknown)"""
+        box = self.icon_boxes.get(name)
+        if box is None:
+            return None
+        return self.icon_atlas.crop(box)
+    
+    def _icons_for(self, key_phrases):
+        """Pick atlas icons for the detected conditions"""
+        names = []
+        for condition in key_phrases.get('conditions', []) or ['general']:
+            for name in self.CONDITION_ICONS.get(condition, self.CONDITION_ICONS['general']):
+                if name in self.icon_boxes and name not in names:
+                    names.append(name)
+        return names or [name for name in ("hospital", "doctor") if name in self.icon_boxes]
+    
+    def _place_icons(self, image, icon_names, rng, opacity=0.35):
+        """Scatter condition icons across the upper part of the background"""
+        width, height = image.size
+        if not icon_names:
+            return image
         
-        for icon_name, color in icon_colors.items():
-            icon_path = self.icons_dir / f"{icon_name}.png"
-            if not icon_path.exists():
-                img = Image.new('RGBA', (100, 100), (0, 0, 0, 0))
-                draw = ImageDraw.Draw(img)
-                
-                if icon_name == "heart":
-                    draw.polygon([(50, 25), (30, 45), (50, 65), (70, 45)], fill=color)
-                    draw.ellipse([25, 15, 45, 35], fill=color)
-                    draw.ellipse([55, 15, 75, 35], fill=color)
-                elif icon_name == "diabetes":
-                    draw.polygon([(50, 20), (30, 60), (70, 60)], fill=color)
-                    draw.ellipse([40, 50, 60, 70], fill=color)
-                else:
-                    draw.rectangle([40, 20, 60, 80], fill=color)
-                    draw.rectangle([20, 40, 80, 60], fill=color)
-                
-                img.save(icon_path)
+        canvas = image.convert('RGBA')
+        slot_width = width // len(icon_names)
+        for i, name in enumerate(icon_names):
+            icon = self.get_icon(name)
+            scale = rng.uniform(0.9, 1.6)
+            icon_size = int(self.ICON_SIZE * scale)
+            icon = icon.resize((icon_size, icon_size), Image.Resampling.BILINEAR)
+            alpha = icon.getchannel('A').point(lambda a: int(a * opacity))
+            icon.putalpha(alpha)
+            
+            x = i * slot_width + rng.randint(0, max(0, slot_width - icon_size))
+            y = rng.randint(height // 10, max(height // 10, height // 2 - icon_size))
+            canvas.alpha_composite(icon, (x, y))
+        return canvas.convert('RGB')
     
     def _create_gradient_background(self, size, colors, style="radial"):
         """Create gradient background"""
@@ -63,35 +141,51 @@ class DynamicImageGenerator:
                 b = colors['gradient_start'][2] + (colors['gradient_end'][2] - colors['gradient_start'][2]) * i // height
                 draw.line([(0, i), (width, i)], fill=(r, g, b))
         else:
+            # Vectorised radial gradient (one numpy pass instead of a per-pixel loop)
             center_x, center_y = width // 2, height // 2
             max_dist = math.sqrt(center_x**2 + center_y**2)
             
-            for x in range(width):
-                for y in range(height):
-                    dist = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                    ratio = dist / max_dist
-                    r = int(colors['gradient_start'][0] * (1 - ratio) + colors['gradient_end'][0] * ratio)
-                    g = int(colors['gradient_start'][1] * (1 - ratio) + colors['gradient_end'][1] * ratio)
-                    b = int(colors['gradient_start'][2] * (1 - ratio) + colors['gradient_end'][2] * ratio)
-                    draw.point((x, y), fill=(r, g, b))
+            ys, xs = np.ogrid[:height, :width]
+            ratio = (np.sqrt((xs - center_x) ** 2 + (ys - center_y) ** 2) / max_dist)[..., None]
+            start = np.array(colors['gradient_start'][:3], dtype=np.float32)
+            end = np.array(colors['gradient_end'][:3], dtype=np.float32)
+            pixels = start * (1 - ratio) + end * ratio
+            image = Image.fromarray(pixels.astype(np.uint8), 'RGB')
         
         return image
     
-    def generate_image(self, key_phrases, tone, colors):
+    def _hex_to_rgb(self, color):
+        """Convert '#RRGGBB' to an RGB tuple (tuples pass through)"""
+        if isinstance(color, (tuple, list)):
+            return tuple(color[:3])
+        color = color.lstrip('#')
+        return tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
+    
+    def _template_colors(self, colors):
+        """Derive gradient colors from a COLOR_PALETTES entry if they are missing"""
+        template_colors = dict(colors)
+        if 'gradient_start' not in template_colors:
+            template_colors['gradient_start'] = self._hex_to_rgb(colors.get('primary', '#2980B9'))
+        if 'gradient_end' not in template_colors:
+            template_colors['gradient_end'] = self._hex_to_rgb(colors.get('secondary', '#3498DB'))
+        template_colors['accent'] = self._hex_to_rgb(colors.get('accent', '#27AE60'))
+        return template_colors
+    
+    def generate_image(self, key_phrases, tone, colors, size=(1080, 1080)):
         """Generate template-based image"""
         # Create seed
         seed_text = str(key_phrases) + str(tone)
         seed = int(hashlib.md5(seed_text.encode()).hexdigest()[:8], 16)
-        random.seed(seed)
+        rng = random.Random(seed)
         
-        size = (1080, 1080)
+        colors = self._template_colors(colors)
         
         # Create gradient background
-        gradient_style = random.choice(["linear", "radial"])
+        gradient_style = rng.choice(["linear", "radial"])
         image = self._create_gradient_background(size, colors, gradient_style)
         
-        # Add medical icons
-        self._create_placeholder_icons()
+        # Add medical icons (cropped from the in-memory atlas)
+        image = self._place_icons(image, self._icons_for(key_phrases), rng)
         
         # Add ECG line
         draw = ImageDraw.Draw(image)
@@ -0,0 +1,135 @@
+"""
+HTTP job API next to the Gradio UI.
+
+    POST   /api/jobs                 submit generate_poster parameters -> {"job_id": ...}
+    GET    /api/jobs/{id}            status, current stage and progress
+    GET    /api/jobs/{id}/poster     the finished poster (PNG, or TIFF for print formats)
+    GET    /api/jobs/{id}/result     caption, poster URL and generation log
+    GET    /api/jobs/{id}/thumbnails manifest of the WebP thumbnail pyramid
+    GET    /api/jobs/{id}/thumbnails/{file}  one thumbnail
+    DELETE /api/jobs/{id}            cancel
+"""
+
+import json
+import mimetypes
+from pathlib import Path
+
+from fastapi import APIRouter, Body, HTTPException
+from fastapi.responses import FileResponse
+
+from utils.image_utils import thumbnail_manifest_path
+
+# generate_poster parameters accepted by the job API, with the UI defaults
+JOB_PARAM_DEFAULTS = {
+    'prompt': None,
+    'selected_model': "FLUX.1 Schnell (Fast & Quality)",
+    'tone_override': "Auto-detect",
+    'color_scheme': "Auto-detect",
+    'include_logo': True,
+    'logo_position': "Top-right",
+    'poster_size': "Instagram Square (1080x1080)",
+    'inference_steps': 25,
+    'guidance_scale': 7.5,
+    'image_style': "photorealistic",
+    'priority': "batch"
+}
+
+
+def _public_job(job):
+    """Job fields safe to return to clients"""
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'progress': job['progress'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at']
+    }
+
+
+def create_job_router(job_queue):
+    """Build the FastAPI router for a JobQueue"""
+    router = APIRouter(prefix="/api/jobs")
+
+    def _file_response(path, media_type=None):
+        """Serve a stored file; 404 once the output store's sweeper has removed it"""
+        if not Path(path).is_file():
+            raise HTTPException(status_code=404, detail="File no longer available")
+        media_type = media_type or mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+        return FileResponse(path, media_type=media_type)
+
+    def _get_job(job_id):
+        job = job_queue.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job")
+        return job
+
+    @router.post("")
+    def submit_job(payload: dict = Body(...)):
+        if not payload.get('prompt'):
+            raise HTTPException(status_code=422, detail="'prompt' is required")
+        unknown = set(payload) - set(JOB_PARAM_DEFAULTS) - {'api_token'}
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown parameters: {sorted(unknown)}")
+
+        params = {name: payload.get(name, default) for name, default in JOB_PARAM_DEFAULTS.items()}
+        job_id = job_queue.submit(params, api_token=payload.get('api_token'))
+        return {'job_id': job_id, 'status': 'queued'}
+
+    @router.get("/{job_id}")
+    def job_status(job_id: str):
+        return _public_job(_get_job(job_id))
+
+    @router.get("/{job_id}/result")
+    def job_result(job_id: str):
+        job = _get_job(job_id)
+        if job['status'] != 'done':
+            raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+        return dict(
+            _public_job(job),
+            caption=job['caption'],
+            poster_url=f"{router.prefix}/{job_id}/poster",
+            status_log=job['status_log']
+        )
+
+    @router.get("/{job_id}/poster")
+    def job_poster(job_id: str):
+        job = _get_job(job_id)
+        if job['status'] != 'done' or not job['result_path']:
+            raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+        return _file_response(job['result_path'])
+
+    def _thumbnail_manifest(job_id):
+        job = _get_job(job_id)
+        if job['status'] != 'done' or not job['result_path']:
+            raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+        manifest_path = Path(thumbnail_manifest_path(job['result_path']))
+        if not manifest_path.exists():
+            raise HTTPException(status_code=404, detail="No thumbnails for this poster")
+        with open(manifest_path, encoding="utf-8") as f:
+            return manifest_path.parent, json.load(f)
+
+    @router.get("/{job_id}/thumbnails")
+    def job_thumbnails(job_id: str):
+        _, manifest = _thumbnail_manifest(job_id)
+        for entry in manifest['levels'] + [manifest['placeholder']]:
+            entry['url'] = f"{router.prefix}/{job_id}/thumbnails/{entry['file']}"
+        return manifest
+
+    @router.get("/{job_id}/thumbnails/{name}")
+    def job_thumbnail(job_id: str, name: str):
+        directory, manifest = _thumbnail_manifest(job_id)
+        files = {entry['file'] for entry in manifest['levels'] + [manifest['placeholder']]}
+        if name not in files:
+            raise HTTPException(status_code=404, detail="Unknown thumbnail")
+        return _file_response(directory / name, media_type="image/webp")
+
+    @router.delete("/{job_id}")
+    def cancel_job(job_id: str):
+        _get_job(job_id)
+        if not job_queue.cancel(job_id):
+            raise HTTPException(status_code=409, detail="Job already finished")
+        return _public_job(job_queue.get(job_id))
+
+    return router
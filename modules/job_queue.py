@@ -0,0 +1,193 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Order of the progress stages reported by generate_poster
+JOB_STAGES = ["queued", "analysis", "image", "layout", "caption", "save", "done"]
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when the client cancelled it"""
+    pass
+
+
+class JobQueue:
+    """
+    Persistent poster job queue backed by SQLite.
+
+    Jobs survive restarts: anything left 'running' by a crash is put back
+    to 'queued' on startup. API tokens are never written to disk; a job
+    whose token was lost in a restart falls back to HF_API_TOKEN.
+    """
+
+    def __init__(self, db_path, run_job, num_workers=2, poll_interval=1.0):
+        """
+        Args:
+            db_path: SQLite file
+            run_job: callable(params, progress_callback) -> (output_path, caption, status_log)
+            num_workers: number of background worker threads
+        """
+        self.db_path = str(db_path)
+        self.run_job = run_job
+        self.poll_interval = poll_interval
+        self._tokens = {}  # job id -> API token (memory only)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._init_db()
+
+        self._workers = []
+        for i in range(num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection, commit on success and always close it"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        """Create the schema and requeue jobs interrupted by a restart"""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    params TEXT NOT NULL,
+                    result_path TEXT,
+                    caption TEXT,
+                    status_log TEXT,
+                    error TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', stage = 'queued', progress = 0, updated_at = ? "
+                "WHERE status = 'running'", (time.time(),)
+            )
+
+    def submit(self, params, api_token=None):
+        """Queue a job and return its id immediately"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, stage, params, created_at, updated_at) "
+                "VALUES (?, 'queued', 'queued', ?, ?, ?)",
+                (job_id, json.dumps(params), now, now)
+            )
+        if api_token:
+            self._tokens[job_id] = api_token
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """Return the job record as a dict (None if unknown)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or ask a running one to stop. Returns False if unknown/finished"""
+        now = time.time()
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, updated_at = ? "
+                "WHERE id = ? AND status = 'queued'", (now, job_id)
+            ).rowcount
+            if not updated:
+                updated = conn.execute(
+                    "UPDATE jobs SET cancel_requested = 1, updated_at = ? "
+                    "WHERE id = ? AND status = 'running'", (now, job_id)
+                ).rowcount
+        if updated:
+            self._tokens.pop(job_id, None)
+        return bool(updated)
+
+    def _update(self, job_id, **fields):
+        """Set columns on a job row"""
+        fields['updated_at'] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _claim_next(self):
+        """Atomically move the oldest queued job to 'running'"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', stage = 'analysis', updated_at = ? WHERE id = ?",
+                (time.time(), row['id'])
+            )
+            return row['id']
+
+    def _progress_callback(self, job_id):
+        """Build the progress_callback handed to generate_poster for one job"""
+        def report(stage, fraction=None):
+            job = self.get(job_id)
+            if job is None or job['cancel_requested']:
+                raise JobCancelled(f"Job {job_id} cancelled")
+            if fraction is None:
+                fraction = JOB_STAGES.index(stage) / (len(JOB_STAGES) - 1) if stage in JOB_STAGES else job['progress']
+            self._update(job_id, stage=stage, progress=round(fraction, 3))
+        return report
+
+    def _worker_loop(self):
+        """Claim and run queued jobs until the process exits"""
+        while True:
+            job_id = self._claim_next()
+            if job_id is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            job = self.get(job_id)
+            api_token = self._tokens.pop(job_id, None) or os.getenv("HF_API_TOKEN", "")
+            try:
+                output_path, caption, status_log = self.run_job(
+                    dict(job['params'], api_token=api_token), self._progress_callback(job_id)
+                )
+                if self.get(job_id)['cancel_requested']:
+                    self._update(job_id, status='cancelled', status_log=status_log)
+                elif output_path:
+                    self._update(
+                        job_id, status='done', stage='done', progress=1.0,
+                        result_path=output_path, caption=caption, status_log=status_log
+                    )
+                else:
+                    self._update(job_id, status='failed', error=status_log, status_log=status_log)
+            except JobCancelled:
+                self._update(job_id, status='cancelled')
+            except Exception as e:
+                self._update(job_id, status='failed', error=str(e))
+
+    def counts(self):
+        """Number of jobs per status"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
@@ -1,10 +1,21 @@
-from PIL import Image, ImageDraw, ImageFont
-import textwrap
+from PIL import Image, ImageDraw
+from modules.text_fitter import TextFitter
+
+# Text boxes as fractions of the poster (left, top, width, height); the
+# fitter picks the largest font that fits each box, so every format works
+LAYOUT_BOXES = {
+    'headline': (0.06, 0.575, 0.88, 0.15),
+    'features': (0.10, 0.735, 0.80, 0.155),
+    'cta': (0.10, 0.90, 0.80, 0.07)
+}
 
 class EnhancedLayoutDesigner:
     def __init__(self, font_path, bold_font_path):
         self.font_path = font_path
         self.bold_font_path = bold_font_path
+        self.title_fitter = TextFitter(bold_font_path, min_size=14, line_spacing=1.1)
+        self.body_fitter = TextFitter(font_path, min_size=12, line_spacing=1.35)
+        self._overlay_cache = {}
     
     def _hex_to_rgb(self, hex_color):
         """Convert hex color to RGB tuple"""
@@ -13,6 +24,32 @@ class EnhancedLayoutDesigner:
         hex_color = hex_color.lstrip('#')
         return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
     
+    def _get_overlay(self, width, overlay_height):
+        """Return the cached gradient overlay layer for a poster width"""
+        key = (width, overlay_height)
+        if key not in self._overlay_cache:
+            overlay = Image.new('RGBA', (width, overlay_height), (0, 0, 0, 0))
+            overlay_draw = ImageDraw.Draw(overlay)
+            
+            for y in range(overlay_height):
+                alpha = int(180 * (1 - y / overlay_height))
+                overlay_draw.line([(0, y), (width, y)], fill=(0, 0, 0, alpha))
+            
+            self._overlay_cache[key] = overlay
+        return self._overlay_cache[key]
+    
+    def _box(self, name, width, height):
+        """Pixel box (left, top, width, height) for a layout region"""
+        left, top, box_width, box_height = LAYOUT_BOXES[name]
+        return int(left * width), int(top * height), int(box_width * width), int(box_height * height)
+    
+    def warm(self, sizes=()):
+        """Pre-build overlay layers and font sizes so the first poster pays no setup cost"""
+        for width, height in sizes:
+            self._get_overlay(width, int(height * 0.45))
+            self.title_fitter.fit("Warm up the headline cache", *self._box('headline', width, height)[2:])
+            self.body_fitter.fit_lines(["Warm up"], *self._box('features', width, height)[2:])
+    
     def _add_text_with_outline(self, draw, text, position, font, text_color, outline_color, outline_width=2):
         """Add text with outline"""
         x, y = position
@@ -32,94 +69,170 @@ class EnhancedLayoutDesigner:
         # Draw main text
         draw.text((x, y), text, font=font, fill=text_color, anchor="mm")
     
-    def design_poster(self, image, text_elements, colors, tone):
-        """Design poster layout"""
+    def plan_layout(self, width, height, text_elements, colors, scale=None):
+        """
+        Display list for a poster of this size: [(kind, bbox, params), ...]
+        
+        bbox is the (left, top, right, bottom) pixel area an operation may
+        touch, so render_layout can skip operations outside a tile. Sizes are
+        relative to a 1080px poster unless `scale` is given.
+        """
+        if scale is None:
+            scale = min(width, height) / 1080
+        rgb_colors = {key: self._hex_to_rgb(value) for key, value in colors.items()}
+        ops = []
+        
+        # Semi-transparent overlay for text
+        overlay_height = int(height * 0.45)
+        ops.append(('overlay', (0, height - overlay_height, width, height), {'height': overlay_height}))
+        
+        # Accent lines
+        bar = max(4, int(10 * scale))
+        for xy in ([0, 0, width, bar], [0, height - bar, width, height]):
+            ops.append(('rectangle', (xy[0], xy[1], xy[2] + 1, xy[3] + 1),
+                        {'xy': xy, 'fill': rgb_colors['accent']}))
+        
+        # Headline, centred in its box
+        if 'headline' in text_elements:
+            left, top, box_width, box_height = self._box('headline', width, height)
+            fit = self.title_fitter.fit(
+                text_elements['headline'], box_width, box_height,
+                max_lines=2, max_size=int(80 * scale)
+            )
+            font = self.title_fitter.font(fit.size)
+            y = top + (box_height - len(fit.lines) * fit.line_height + fit.line_height) // 2
+            text_color = rgb_colors.get('text', (255, 255, 255))
+            for i, line in enumerate(fit.lines):
+                ops.append(self._text_op((width//2, y + i * fit.line_height), line, font, text_color, "mm",
+                                         outline=((0, 0, 0), max(1, round(3 * scale)))))
+        
+        # Features: one line each, same size, block centred horizontally
+        features = text_elements.get('features', [])[:3]
+        if features:
+            left, top, box_width, box_height = self._box('features', width, height)
+            fit = self.body_fitter.fit_lines(
+                features, box_width, box_height, max_size=int(42 * scale), extra_width=1.2
+            )
+            font = self.body_fitter.font(fit.size)
+            bullet = fit.size * 0.5
+            block_width = bullet + fit.size * 0.7 + max(self.body_fitter.width(f, fit.size) for f in features)
+            x = (width - block_width) // 2
+            y = top + (box_height - len(features) * fit.line_height + fit.line_height) // 2
+            for i, feature in enumerate(features):
+                feature_y = y + i * fit.line_height
+                xy = [x, feature_y - bullet / 2, x + bullet, feature_y + bullet / 2]
+                ops.append(('ellipse', self._bounds(xy), {'xy': xy, 'fill': rgb_colors['accent']}))
+                ops.append(self._text_op((x + bullet + fit.size * 0.7, feature_y), feature, font,
+                                         (255, 255, 255), "lm"))
+        
+        # CTA
+        if 'cta' in text_elements:
+            left, top, box_width, box_height = self._box('cta', width, height)
+            fit = self.body_fitter.fit(
+                text_elements['cta'], box_width, box_height, max_lines=1, max_size=int(42 * scale)
+            )
+            ops.append(self._text_op((width//2, top + box_height // 2), fit.lines[0] if fit.lines else "",
+                                     self.body_fitter.font(fit.size), rgb_colors['accent'], "mm"))
+        
+        # Percentage badge
+        if text_elements.get('percentage'):
+            badge_text = text_elements['percentage']
+            cx = cy = int(200 * scale)
+            radius = int(50 * scale)
+            inner = int(40 * scale)
+            for r, fill in ((radius, rgb_colors['accent'] + (200,)), (inner, rgb_colors['primary'] + (230,))):
+                xy = [cx - r, cy - r, cx + r, cy + r]
+                ops.append(('ellipse', self._bounds(xy), {'xy': xy, 'fill': fill}))
+            badge_fit = self.title_fitter.fit(badge_text, int(inner * 1.6), inner, max_lines=1, min_size=8)
+            ops.append(self._text_op((cx, cy), badge_text, self.title_fitter.font(badge_fit.size),
+                                     (255, 255, 255), "mm"))
+            label_fit = self.body_fitter.fit("ACCURACY", radius * 2, int(30 * scale), max_lines=1, min_size=8)
+            ops.append(self._text_op((cx, cy + radius + label_fit.size * 0.6), "ACCURACY",
+                                     self.body_fitter.font(label_fit.size), (255, 255, 255), "mm"))
+        
+        return ops
+    
+    @staticmethod
+    def _bounds(xy, margin=0):
+        """Integer bbox covering a float box (inclusive right/bottom edge as drawn by PIL)"""
+        return (int(xy[0]) - margin - 1, int(xy[1]) - margin - 1,
+                int(xy[2]) + margin + 2, int(xy[3]) + margin + 2)
+    
+    def _text_op(self, xy, text, font, fill, anchor, outline=None):
+        left, top, right, bottom = font.getbbox(text, anchor=anchor)
+        margin = outline[1] if outline else 0
+        bbox = self._bounds((xy[0] + left, xy[1] + top, xy[0] + right, xy[1] + bottom), margin)
+        return ('text', bbox, {'xy': xy, 'text': text, 'font': font, 'fill': fill,
+                               'anchor': anchor, 'outline': outline})
+    
+    @staticmethod
+    def image_op(image, xy):
+        """Display-list entry pasting an RGBA image (e.g. the logo) at xy"""
+        return ('image', (xy[0], xy[1], xy[0] + image.width, xy[1] + image.height), {'image': image, 'xy': xy})
+    
+    def _overlay_rows(self, width, overlay_height, first_row, last_row):
+        """Rows [first_row, last_row) of the gradient overlay, without building all of it"""
+        rows = Image.new('RGBA', (width, last_row - first_row), (0, 0, 0, 0))
+        rows_draw = ImageDraw.Draw(rows)
+        for y in range(first_row, last_row):
+            alpha = int(180 * (1 - y / overlay_height))
+            rows_draw.line([(0, y - first_row), (width, y - first_row)], fill=(0, 0, 0, alpha))
+        return rows
+    
+    def render_layout(self, canvas, ops, origin=(0, 0)):
+        """Replay a display list onto an RGBA canvas whose top-left is `origin` in the poster"""
+        ox, oy = origin
+        canvas_width, canvas_height = canvas.size
+        draw = ImageDraw.Draw(canvas, 'RGBA')
+        
+        def shift(xy):
+            return [value - (ox if i % 2 == 0 else oy) for i, value in enumerate(xy)]
+        
+        for kind, (left, top, right, bottom), params in ops:
+            if right <= ox or left >= ox + canvas_width or bottom <= oy or top >= oy + canvas_height:
+                continue
+            if kind == 'overlay':
+                overlay_height = params['height']
+                width = right - left
+                if oy <= top and bottom <= oy + canvas_height:
+                    overlay = self._get_overlay(width, overlay_height)
+                    canvas.paste(overlay, (left - ox, top - oy), overlay)
+                else:
+                    first_row = max(top, oy) - top
+                    last_row = min(bottom, oy + canvas_height) - top
+                    rows = self._overlay_rows(width, overlay_height, first_row, last_row)
+                    canvas.paste(rows, (left - ox, top + first_row - oy), rows)
+            elif kind == 'rectangle':
+                draw.rectangle(shift(params['xy']), fill=params['fill'])
+            elif kind == 'ellipse':
+                draw.ellipse(shift(params['xy']), fill=params['fill'])
+            elif kind == 'text':
+                xy = shift(params['xy'])
+                if params['outline'] and params['outline'][1] > 4:
+                    # Print-scale outlines: one stroked raster instead of (2w+1)^2 offset copies
+                    outline_color, outline_width = params['outline']
+                    draw.text(xy, params['text'], font=params['font'], fill=params['fill'], anchor=params['anchor'],
+                              stroke_width=outline_width, stroke_fill=outline_color)
+                    draw.text(xy, params['text'], font=params['font'], fill=params['fill'], anchor=params['anchor'])
+                elif params['outline']:
+                    self._add_text_with_outline(draw, params['text'], xy, params['font'], params['fill'],
+                                                *params['outline'])
+                else:
+                    draw.text(xy, params['text'], font=params['font'], fill=params['fill'], anchor=params['anchor'])
+            elif kind == 'image':
+                image = params['image']
+                canvas.paste(image, tuple(shift(params['xy'])), image)
+        return canvas
+    
+    def design_poster(self, image, text_elements, colors, tone, ops=None):
+        """Design poster layout (ops: a display list already planned for this size)"""
         # Convert image to RGBA if needed
         if image.mode != 'RGBA':
             poster = image.convert('RGBA')
         else:
             poster = image.copy()
         
-        draw = ImageDraw.Draw(poster, 'RGBA')
-        width, height = poster.size
-        
-        # Convert all colors from hex to RGB
-        rgb_colors = {}
-        for key, value in colors.items():
-            rgb_colors[key] = self._hex_to_rgb(value)
-        
-        # Load fonts
-        try:
-            title_font = ImageFont.truetype(self.bold_font_path, 70)
-            subtitle_font = ImageFont.truetype(self.font_path, 50)
-            body_font = ImageFont.truetype(self.font_path, 40)
-            small_font = ImageFont.truetype(self.font_path, 30)
-        except:
-            title_font = ImageFont.load_default()
-            subtitle_font = ImageFont.load_default()
-            body_font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
-        
-        # Add semi-transparent overlay for text
-        overlay_height = 450
-        overlay = Image.new('RGBA', (width, overlay_height), (0, 0, 0, 0))
-        overlay_draw = ImageDraw.Draw(overlay)
-        
-        for y in range(overlay_height):
-            alpha = int(180 * (1 - y / overlay_height))
-            overlay_draw.line([(0, y), (width, y)], fill=(0, 0, 0, alpha))
-        
-        poster.paste(overlay, (0, height - overlay_height), overlay)
-        
-        # Draw accent lines
-        draw.rectangle([0, 0, width, 10], fill=rgb_colors['accent'])
-        draw.rectangle([0, height-10, width, height], fill=rgb_colors['accent'])
-        
-        # Position text
-        y_position = height - 350
-        
-        # Draw headline
-        if 'headline' in text_elements:
-            headline = text_elements['headline']
-            wrapped_lines = textwrap.wrap(headline, width=25)
-            
-            for i, line in enumerate(wrapped_lines[:2]):
-                y_offset = y_position + i * 80
-                self._add_text_with_outline(
-                    draw, line, (width//2, y_offset),
-                    title_font if i == 0 else subtitle_font,
-                    rgb_colors.get('text', (255, 255, 255)),
-                    (0, 0, 0), 3
-                )
-            
-            y_position += len(wrapped_lines[:2]) * 80 + 20
-        
-        # Draw features
-        if 'features' in text_elements:
-            for i, feature in enumerate(text_elements['features'][:3]):
-                feature_y = y_position + i * 60
-                # Draw bullet point
-                draw.ellipse([width//2 - 100, feature_y - 10, width//2 - 80, feature_y + 10], 
-                           fill=rgb_colors['accent'])
-                # Draw feature text
-                draw.text((width//2 - 50, feature_y), feature, font=body_font, 
-                         fill=(255, 255, 255), anchor="lm")
-            
-            y_position += 200
-        
-        # Draw CTA
-        if 'cta' in text_elements:
-            draw.text((width//2, height - 70), text_elements['cta'], 
-                     font=body_font, fill=rgb_colors['accent'], anchor="mm")
-        
-        # Draw percentage badge
-        if text_elements.get('percentage'):
-            badge_text = text_elements['percentage']
-            # Draw badge background
-            draw.ellipse([150, 150, 250, 250], fill=rgb_colors['accent'] + (200,))
-            draw.ellipse([160, 160, 240, 240], fill=rgb_colors['primary'] + (230,))
-            # Draw text
-            draw.text((200, 200), badge_text, font=title_font, fill=(255, 255, 255), anchor="mm")
-            draw.text((200, 250), "ACCURACY", font=small_font, fill=(255, 255, 255), anchor="mm")
-        
-        return poster.convert('RGB')
\ No newline at end of file
+        if ops is None:
+            ops = self.plan_layout(poster.width, poster.height, text_elements, colors)
+        self.render_layout(poster, ops)
+        return poster.convert('RGB')
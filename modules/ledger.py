@@ -0,0 +1,254 @@
+"""
+Append-only ledger of generate_poster runs for latency and cost analytics.
+
+Entries are queued by the request thread and written in batches by a
+background thread into SQLite (WAL mode). Report with:
+
+    python -m modules.ledger report [--db outputs/ledger.sqlite3] [--since-hours 24] [--top 10]
+"""
+
+import argparse
+import json
+import math
+import queue
+import sqlite3
+import threading
+import time
+
+LEDGER_COLUMNS = [
+    'created_at', 'param_hash', 'prompt_hash', 'generation_key', 'prompt', 'model', 'steps', 'guidance',
+    'size', 'style', 'priority', 'quality', 'outcome', 'cache_outcome', 'retries', 'total_seconds',
+    'stage_timings', 'output_bytes', 'error'
+]
+
+
+class StageClock:
+    """Wall-clock seconds per pipeline stage, measured between stage starts"""
+
+    def __init__(self):
+        self.timings = {}
+        self._stage = None
+        self._started = None
+
+    def start(self, stage):
+        """Close the running stage (if any) and start timing `stage`"""
+        self.finish()
+        self._stage = stage
+        self._started = time.monotonic()
+
+    def finish(self):
+        if self._stage is not None:
+            elapsed = time.monotonic() - self._started
+            self.timings[self._stage] = round(self.timings.get(self._stage, 0.0) + elapsed, 4)
+            self._stage = None
+
+
+class GenerationLedger:
+    """
+    Batched SQLite writer for generation records.
+
+    record() never touches the database; a writer thread drains the queue
+    every `flush_interval` seconds (or once `batch_size` entries are
+    waiting) and inserts them in a single transaction.
+    """
+
+    def __init__(self, db_path, flush_interval=2.0, batch_size=100):
+        self.db_path = str(db_path)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._init_db()
+        self._closed = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name="ledger-writer", daemon=True)
+        self._writer.start()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS generations (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        created_at REAL NOT NULL,
+                        param_hash TEXT NOT NULL,
+                        prompt_hash TEXT NOT NULL,
+                        generation_key TEXT,
+                        prompt TEXT,
+                        model TEXT,
+                        steps INTEGER,
+                        guidance REAL,
+                        size TEXT,
+                        style TEXT,
+                        priority TEXT,
+                        quality TEXT,
+                        outcome TEXT NOT NULL,
+                        cache_outcome TEXT,
+                        retries INTEGER NOT NULL DEFAULT 0,
+                        total_seconds REAL,
+                        stage_timings TEXT,
+                        output_bytes INTEGER,
+                        error TEXT
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS generations_created ON generations (created_at)")
+                conn.execute("CREATE INDEX IF NOT EXISTS generations_prompt ON generations (prompt_hash)")
+        finally:
+            conn.close()
+
+    def record(self, **entry):
+        """Queue one generation record (see LEDGER_COLUMNS)"""
+        entry.setdefault('created_at', time.time())
+        entry.setdefault('retries', 0)  # an explicit NULL would fail the NOT NULL column
+        if isinstance(entry.get('stage_timings'), dict):
+            entry['stage_timings'] = json.dumps(entry['stage_timings'])
+        self._queue.put(tuple(entry.get(column) for column in LEDGER_COLUMNS))
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch):
+        placeholders = ", ".join("?" for _ in LEDGER_COLUMNS)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO generations ({', '.join(LEDGER_COLUMNS)}) VALUES ({placeholders})", batch
+                )
+        finally:
+            conn.close()
+
+    def _write_loop(self):
+        while not (self._closed.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Let a few more entries accumulate before opening a transaction
+            if self._queue.qsize() + 1 < self.batch_size and not self._closed.is_set():
+                self._closed.wait(self.flush_interval)
+            batch = self._drain(first)
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"Warning: Ledger write of {len(batch)} entries failed: {e}")
+
+    def close(self, timeout=10):
+        """Flush queued entries and stop the writer"""
+        self._closed.set()
+        self._writer.join(timeout)
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def report(db_path, since_hours=None, top=10):
+    """Print latency percentiles by model and size, cache hit rate and repeated prompts"""
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        where, params = "", ()
+        if since_hours:
+            where, params = "WHERE created_at >= ?", (time.time() - since_hours * 3600,)
+        rows = conn.execute(f"SELECT * FROM generations {where}", params).fetchall()
+    finally:
+        conn.close()
+
+    if not rows:
+        print(f"No generations recorded in {db_path}")
+        return
+
+    print(f"📒 {len(rows)} generation(s) in {db_path}\n")
+
+    print("Latency by model and size (seconds):")
+    print(f"  {'model':<45} {'size':<30} {'n':>5} {'p50':>7} {'p90':>7} {'p99':>7} {'retries':>8}")
+    groups = {}
+    for row in rows:
+        size = row['size'] or '-'
+        if row['quality'] == 'draft':
+            size += " [draft]"
+        groups.setdefault((row['model'] or '-', size), []).append(row)
+    for (model, size), group in sorted(groups.items()):
+        latencies = sorted(row['total_seconds'] for row in group if row['total_seconds'] is not None)
+        retries = sum(row['retries'] or 0 for row in group)
+        p50, p90, p99 = (_percentile(latencies, pct) for pct in (50, 90, 99))
+        print(f"  {model[:45]:<45} {size[:30]:<30} {len(group):>5} "
+              f"{p50 or 0:>7.2f} {p90 or 0:>7.2f} {p99 or 0:>7.2f} {retries:>8}")
+
+    print("\nStage p50 / p90 (seconds):")
+    stages = {}
+    for row in rows:
+        for stage, seconds in json.loads(row['stage_timings'] or "{}").items():
+            stages.setdefault(stage, []).append(seconds)
+    for stage, values in stages.items():
+        values.sort()
+        print(f"  {stage:<12} {_percentile(values, 50):>7.2f} {_percentile(values, 90):>7.2f}")
+
+    print("\nOutcomes:")
+    outcomes = {}
+    for row in rows:
+        outcomes[row['outcome']] = outcomes.get(row['outcome'], 0) + 1
+    for outcome, count in sorted(outcomes.items(), key=lambda item: -item[1]):
+        print(f"  {outcome:<12} {count:>6}")
+
+    cache_rows = [row for row in rows if row['cache_outcome']]
+    hits = sum(1 for row in cache_rows if row['cache_outcome'] not in ('miss', 'fallback'))
+    print(f"\nBackground cache hit rate: {hits}/{len(cache_rows)} "
+          f"({100 * hits / max(1, len(cache_rows)):.1f}%)")
+    by_cache = {}
+    for row in cache_rows:
+        by_cache[row['cache_outcome']] = by_cache.get(row['cache_outcome'], 0) + 1
+    for cache_outcome, count in sorted(by_cache.items(), key=lambda item: -item[1]):
+        print(f"  {cache_outcome:<12} {count:>6}")
+
+    output_sizes = [row['output_bytes'] for row in rows if row['output_bytes']]
+    if output_sizes:
+        print(f"\nOutput size: avg {sum(output_sizes) / len(output_sizes) / 1024:.0f} KB, "
+              f"total {sum(output_sizes) / 1024 / 1024:.1f} MB")
+
+    print("\nMost repeated prompts (caching candidates):")
+    prompts = {}
+    for row in rows:
+        count, prompt = prompts.get(row['prompt_hash'], (0, row['prompt']))
+        prompts[row['prompt_hash']] = (count + 1, prompt)
+    for count, prompt in sorted(prompts.values(), key=lambda item: -item[0])[:top]:
+        if count < 2:
+            break
+        print(f"  {count:>5}x  {(prompt or '')[:90]}")
+
+    keyed = [row for row in rows if row['generation_key']]
+    if keyed:
+        print("\nGeneration keys shared by the most distinct prompts (canonicalization):")
+        keys = {}
+        for row in keyed:
+            keys.setdefault(row['generation_key'], {'prompts': set(), 'runs': 0})
+            keys[row['generation_key']]['prompts'].add(row['prompt_hash'])
+            keys[row['generation_key']]['runs'] += 1
+        distinct_prompts = len({row['prompt_hash'] for row in keyed})
+        print(f"  {distinct_prompts} distinct prompt(s) -> {len(keys)} generation key(s)")
+        ranked = sorted(keys.items(), key=lambda item: (-len(item[1]['prompts']), -item[1]['runs']))
+        for key, entry in ranked[:top]:
+            print(f"  {key}  {len(entry['prompts']):>5} prompt(s)  {entry['runs']:>6} run(s)")
+
+
+if __name__ == "__main__":
+    from config import LEDGER_DB_PATH
+
+    parser = argparse.ArgumentParser(description="Query the generation ledger")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("--db", default=str(LEDGER_DB_PATH))
+    parser.add_argument("--since-hours", type=float, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    report(args.db, args.since_hours, args.top)
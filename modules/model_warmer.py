@@ -0,0 +1,207 @@
+import threading
+import time
+
+STATUS_BADGES = {
+    'warm': "🟢",
+    'loading': "🟡",
+    'cold': "🔵",
+    'unknown': "⚪"
+}
+
+
+class _ModelState:
+    """What we have observed about one model on the HF servers"""
+
+    def __init__(self):
+        self.last_success = None   # monotonic time of the last successful response
+        self.last_latency = None
+        self.loading_since = None  # set by a 503 "model loading", cleared by a success
+        self.pings = 0
+        self.fastest = {}          # (steps, size) -> fastest latency seen, the warm baseline
+        self.idle_warm = None      # longest idle gap after which the model still answered fast
+        self.idle_cold = None      # shortest idle gap followed by a cold start (slow answer or 503)
+
+    def note_idle(self, idle, cold):
+        """Learn how long the model stays loaded; the latest contradicting evidence wins"""
+        if idle is None:
+            return
+        if cold:
+            self.idle_cold = idle if self.idle_cold is None else min(self.idle_cold, idle)
+            if self.idle_warm is not None and self.idle_warm >= idle:
+                self.idle_warm = None
+        else:
+            self.idle_warm = max(self.idle_warm or 0.0, idle)
+            if self.idle_cold is not None and self.idle_cold <= idle:
+                self.idle_cold = None
+
+
+class ModelWarmer:
+    """
+    Keeps HF models loaded and tracks which ones are warm.
+
+    Every response from HuggingFaceAPIGenerator is reported through
+    observe(). A response more than `cold_factor` times slower than the
+    fastest one seen for the same steps and size is a cold start, as is a
+    503. The idle gaps before cold starts and before fast answers show how
+    long HF keeps the model loaded. That learned window (initially
+    `warm_ttl`) decides whether the model is still warm. After a 503 the
+    model is 'loading' until it answers or `loading_timeout` passes. When
+    started, a background thread pings every configured
+    model at startup and then each `interval` seconds with a minimal request,
+    but only models that real traffic has not kept warm and only while the
+    warm-up token is idle with enough quota headroom. Models still loading
+    are re-pinged after `loading_timeout`.
+    """
+
+    def __init__(self, models, get_generator=None, scheduler=None, api_token=None,
+                 interval=600, warm_ttl=900, min_headroom=0.5, ping_names=None,
+                 cold_factor=3.0, loading_timeout=120):
+        """
+        Args:
+            models: {display name: model id} to track and keep warm
+            get_generator: callable(token, display name) -> HuggingFaceAPIGenerator,
+                without side effects on the app's current generator
+            scheduler: FairScheduler used to check that the token is idle
+            api_token: Token used for warm-up pings (no pings without one)
+            ping_names: Display names to keep warm (None = all models)
+        """
+        self.models = dict(models)
+        self.ping_names = [name for name in (ping_names or self.models) if name in self.models]
+        self.get_generator = get_generator
+        self.scheduler = scheduler
+        self.api_token = api_token
+        self.interval = interval
+        self.warm_ttl = warm_ttl
+        self.min_headroom = min_headroom
+        self.cold_factor = cold_factor
+        self.loading_timeout = loading_timeout
+        self._states = {model_id: _ModelState() for model_id in self.models.values()}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def observe(self, model_id, seconds, loading=False, steps=None, size=None):
+        """Record an API response for a model (seconds is None when unknown)"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.setdefault(model_id, _ModelState())
+            idle = None
+            if state.last_success is not None:
+                idle = max(0.0, now - (seconds or 0.0) - state.last_success)
+            if loading:
+                if state.loading_since is None:
+                    state.loading_since = now
+                    state.note_idle(idle, cold=True)
+                return
+            if state.loading_since is None:
+                state.note_idle(idle, cold=self._is_cold_start(state, seconds, steps, size))
+            state.last_success = now
+            state.last_latency = seconds
+            state.loading_since = None
+
+    def _is_cold_start(self, state, seconds, steps, size):
+        """Compare a latency with the fastest one seen for the same request shape"""
+        if seconds is None:
+            return False
+        key = (steps, tuple(size) if size else None)
+        fastest = state.fastest.get(key)
+        if fastest is None or seconds < fastest:
+            state.fastest[key] = seconds
+        return fastest is not None and seconds > fastest * self.cold_factor
+
+    def _warm_window(self, state):
+        """Idle seconds the model stays loaded: warm_ttl, adjusted by what was observed"""
+        window = max(self.warm_ttl, state.idle_warm or 0.0)
+        if state.idle_cold is not None:
+            window = min(window, state.idle_cold)
+        return window
+
+    def _is_loading(self, state, now):
+        return state.loading_since is not None and now - state.loading_since <= self.loading_timeout
+
+    def status(self, model_id):
+        """'warm', 'loading', 'cold' or 'unknown'"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(model_id)
+            if state is None:
+                return 'unknown'
+            if self._is_loading(state, now):
+                return 'loading'
+            if state.last_success is None:
+                return 'cold' if state.loading_since is not None else 'unknown'
+            if now - state.last_success <= self._warm_window(state):
+                return 'warm'
+            return 'cold'
+
+    def label(self, name):
+        """Dropdown label for a model, e.g. '🟢 FLUX.1 Schnell (Fast & Quality) · 2.1s'"""
+        model_id = self.models.get(name)
+        status = self.status(model_id)
+        label = f"{STATUS_BADGES[status]} {name}"
+        with self._lock:
+            state = self._states.get(model_id)
+            latency = state.last_latency if state is not None else None
+        if status == 'warm' and latency is not None:
+            label += f" · {latency:.1f}s"
+        elif status in ('loading', 'cold'):
+            label += f" · {status}"
+        return label
+
+    def choices(self):
+        """(label, name) pairs for the model dropdown, in HF_MODELS order"""
+        return [(self.label(name), name) for name in self.models]
+
+    def _traffic_is_low(self):
+        if self.scheduler is None:
+            return True
+        return (self.scheduler.pending(self.api_token) == 0 and
+                self.scheduler.headroom(self.api_token) >= self.min_headroom)
+
+    def warm_up(self):
+        """Ping every model not kept warm by real traffic; returns {name: status}"""
+        results = {}
+        for name in self.ping_names:
+            model_id = self.models[name]
+            if self._stop.is_set():
+                break
+            with self._lock:
+                state = self._states[model_id]
+                last_success, window = state.last_success, self._warm_window(state)
+            if last_success is not None and time.monotonic() - last_success < min(self.interval, window):
+                results[name] = 'skipped (recent traffic)'
+                continue
+            if not self._traffic_is_low():
+                results[name] = 'skipped (busy)'
+                continue
+            try:
+                latency = self.get_generator(self.api_token, name).ping()
+                results[name] = f"warm ({latency:.1f}s)"
+            except Exception as e:
+                results[name] = f"failed ({str(e)[:80]})"
+            with self._lock:
+                self._states[model_id].pings += 1
+        return results
+
+    def start(self):
+        """Start the keep-warm thread (no-op without a token or with interval 0)"""
+        if not self.api_token or self.interval <= 0 or self._thread is not None:
+            return False
+        self._thread = threading.Thread(target=self._run, name="model-warmer", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _next_wait(self):
+        """Seconds until the next round: loading models are re-pinged after loading_timeout"""
+        with self._lock:
+            loading = any(state.loading_since is not None for state in self._states.values())
+        return min(self.interval, self.loading_timeout) if loading else self.interval
+
+    def _run(self):
+        while not self._stop.is_set():
+            results = self.warm_up()
+            print("🔥 Model warm-up: " + ", ".join(f"{name}: {result}" for name, result in results.items()))
+            self._stop.wait(self._next_wait())
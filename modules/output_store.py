@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from utils.image_utils import write_thumbnails
+
+
+class OutputStore:
+    """
+    Content-addressed store for generated posters.
+
+    Posters are saved as <root>/<sha[:2]>/<sha>.png with a <sha>.json sidecar
+    holding the caption and generation parameters, so identical posters are
+    stored once. A poster's thumbnail pyramid (save_thumbnails) is stored
+    next to it and shares its index entry. An in-memory index ordered by
+    last use (oldest first) makes finding expired entries O(1); it is
+    persisted as an append-only journal that is compacted on startup and
+    by sweep() once it outgrows the index, so the directory is never
+    scanned.
+    """
+
+    JOURNAL_NAME = "index.journal"
+    # sweep() rewrites the journal once it has this many lines per index entry
+    # (plus JOURNAL_SLACK), so a long-running server's journal stays bounded
+    JOURNAL_COMPACT_RATIO = 4
+    JOURNAL_SLACK = 1000
+
+    def __init__(self, root, max_age_seconds=None, max_total_bytes=None, sweep_interval=None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_age_seconds = max_age_seconds or None
+        self.max_total_bytes = max_total_bytes or None
+        self.journal_path = self.root / self.JOURNAL_NAME
+
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # digest -> {'size': bytes, 'last_used': ts}
+        self.total_bytes = 0
+        self._journal_lines = 0
+        self._load_journal()
+
+        self._stop = threading.Event()
+        self._sweeper = None
+        if sweep_interval:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(sweep_interval,),
+                name="output-store-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    def path_for(self, digest, suffix=".png"):
+        """Location of a stored artifact"""
+        return self.root / digest[:2] / f"{digest}{suffix}"
+
+    def _load_journal(self):
+        """Rebuild the index from the journal and rewrite it compacted"""
+        if not self.journal_path.exists():
+            return
+        entries = {}
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn final line after a crash
+                if record.get('op') == 'put':
+                    entries[record['digest']] = {
+                        'size': record['size'], 'last_used': record['ts'],
+                        'suffix': record.get('suffix', '.png'),
+                        'thumbnail_bytes': record.get('thumbnail_bytes', 0)
+                    }
+                elif record.get('op') == 'del':
+                    entries.pop(record['digest'], None)
+
+        for digest, entry in sorted(entries.items(), key=lambda item: item[1]['last_used']):
+            if self.path_for(digest, entry['suffix']).exists():
+                self._index[digest] = entry
+                self.total_bytes += entry['size']
+
+        self._compact_journal()
+
+    def _compact_journal(self):
+        """Rewrite the journal as one 'put' per index entry (caller holds the lock)"""
+        tmp_path = self.journal_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for digest, entry in self._index.items():
+                f.write(json.dumps({
+                    'op': 'put', 'digest': digest, 'size': entry['size'],
+                    'ts': entry['last_used'], 'suffix': entry['suffix'],
+                    'thumbnail_bytes': entry['thumbnail_bytes']
+                }) + "\n")
+        os.replace(tmp_path, self.journal_path)
+        self._journal_lines = len(self._index)
+
+    def _append_journal(self, record):
+        """Append one index change to the journal"""
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        self._journal_lines += 1
+
+    def _put_entry(self, digest, size, now, suffix, thumbnail_bytes=None):
+        """Add or refresh an index entry (caller holds the lock); size excludes thumbnails"""
+        entry = self._index.pop(digest, None)
+        if entry is not None:
+            self.total_bytes -= entry['size']
+            if thumbnail_bytes is None:
+                thumbnail_bytes = entry['thumbnail_bytes']
+        thumbnail_bytes = thumbnail_bytes or 0
+        entry = {'size': size + thumbnail_bytes, 'last_used': now, 'suffix': suffix,
+                 'thumbnail_bytes': thumbnail_bytes}
+        self._index[digest] = entry
+        self.total_bytes += entry['size']
+        self._append_journal({
+            'op': 'put', 'digest': digest, 'size': entry['size'], 'ts': now, 'suffix': suffix,
+            'thumbnail_bytes': thumbnail_bytes
+        })
+
+    def save(self, data, metadata=None, suffix=".png"):
+        """
+        Store `data` (encoded image bytes) and its metadata sidecar.
+
+        Returns the stored file path. Saving identical bytes again only
+        refreshes the entry's age and sidecar.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, suffix)
+        now = time.time()
+
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if not path.exists():
+                tmp_path = path.with_suffix(path.suffix + ".tmp")
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+
+            if metadata is not None:
+                sidecar = dict(metadata, digest=digest, bytes=len(data), saved_at=now)
+                with open(self.path_for(digest, ".json"), "w", encoding="utf-8") as f:
+                    json.dump(sidecar, f, indent=2, default=str)
+
+            self._put_entry(digest, len(data), now, suffix)
+
+        self.sweep()
+        return str(path)
+
+    def save_file(self, source_path, metadata=None, suffix=".tif"):
+        """
+        Move an already-written file (e.g. a large print TIFF) into the store.
+
+        Like save(), but hashes the file in chunks instead of holding it in
+        memory. The source file is consumed.
+        """
+        source_path = Path(source_path)
+        sha = hashlib.sha256()
+        with open(source_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        size = source_path.stat().st_size
+        path = self.path_for(digest, suffix)
+        now = time.time()
+
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists():
+                source_path.unlink()
+            else:
+                os.replace(source_path, path)
+
+            if metadata is not None:
+                sidecar = dict(metadata, digest=digest, bytes=size, saved_at=now)
+                with open(self.path_for(digest, ".json"), "w", encoding="utf-8") as f:
+                    json.dump(sidecar, f, indent=2, default=str)
+
+            self._put_entry(digest, size, now, suffix)
+
+        self.sweep()
+        return str(path)
+
+    def save_thumbnails(self, poster_path, pyramid):
+        """
+        Store a thumbnail_pyramid() next to a stored poster.
+
+        Files are named <sha>_<width>w.webp / <sha>_placeholder.webp with the
+        manifest <sha>.thumbnails.json; their bytes count towards the poster's
+        entry and they are removed together with it. Returns the manifest.
+        """
+        poster_path = Path(poster_path)
+        digest = poster_path.stem
+        with self._lock:
+            manifest = write_thumbnails(pyramid, poster_path.parent, digest)
+            entry = self._index.get(digest)
+            if entry is not None:
+                self._put_entry(digest, entry['size'] - entry['thumbnail_bytes'], entry['last_used'],
+                                entry['suffix'], thumbnail_bytes=manifest['total_bytes'])
+        self.sweep()
+        return manifest
+
+    def thumbnails(self, digest):
+        """Thumbnail manifest for a stored poster (None if it has none)"""
+        manifest_path = self.path_for(digest, ".thumbnails.json")
+        if not manifest_path.exists():
+            return None
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _remove_thumbnails(self, digest):
+        """Delete a poster's thumbnail files and manifest (caller holds the lock)"""
+        manifest = self.thumbnails(digest)
+        if manifest is None:
+            return
+        names = [level['file'] for level in manifest['levels']] + [manifest['placeholder']['file']]
+        for name in names:
+            try:
+                (self.path_for(digest).parent / name).unlink()
+            except FileNotFoundError:
+                pass
+        self.path_for(digest, ".thumbnails.json").unlink(missing_ok=True)
+
+    def metadata(self, digest):
+        """Return the sidecar metadata for a stored poster (None if missing)"""
+        sidecar = self.path_for(digest, ".json")
+        if not sidecar.exists():
+            return None
+        with open(sidecar, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def sweep(self):
+        """Remove entries older than max_age_seconds or beyond max_total_bytes.
+
+        Only the oldest end of the index is inspected, so each removal is O(1).
+        The journal is compacted here once it has outgrown the index.
+        Returns the number of entries removed.
+        """
+        removed = 0
+        cutoff = time.time() - self.max_age_seconds if self.max_age_seconds else None
+        with self._lock:
+            while self._index:
+                digest, entry = next(iter(self._index.items()))
+                too_old = cutoff is not None and entry['last_used'] < cutoff
+                too_big = self.max_total_bytes is not None and self.total_bytes > self.max_total_bytes
+                if not (too_old or too_big):
+                    break
+                self._index.popitem(last=False)
+                self.total_bytes -= entry['size']
+                self._remove_thumbnails(digest)
+                for suffix in (entry['suffix'], ".json"):
+                    try:
+                        self.path_for(digest, suffix).unlink()
+                    except FileNotFoundError:
+                        pass
+                self._append_journal({'op': 'del', 'digest': digest})
+                removed += 1
+            if self._journal_lines > self.JOURNAL_COMPACT_RATIO * len(self._index) + self.JOURNAL_SLACK:
+                self._compact_journal()
+        if removed:
+            print(f"🧹 Output store: removed {removed} expired poster(s)")
+        return removed
+
+    def stats(self):
+        """Return entry count and total size"""
+        with self._lock:
+            return {'entries': len(self._index), 'bytes': self.total_bytes}
+
+    def _sweep_loop(self, interval):
+        """Background sweeper thread body"""
+        while not self._stop.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Warning: Output store sweep failed: {e}")
+
+    def close(self):
+        """Stop the background sweeper"""
+        self._stop.set()
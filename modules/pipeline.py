@@ -0,0 +1,89 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class TaskGraph:
+    """
+    Small dependency-graph executor for one request.
+
+    add() registers a named task with the names of the tasks it depends on;
+    the task is submitted to the executor as soon as all of them have
+    finished and receives their results as positional arguments. Tasks are
+    launched from completion callbacks, so no worker thread ever blocks on
+    another task. A failed dependency fails its dependents with the same
+    exception. Results are read with result(name).
+
+    Tasks are meant for CPU work: a blocking call that waits on the network
+    would hold a shared worker for its whole duration, so the request thread
+    makes those itself. With task_profiles (see modules/profiling.py) each
+    task runs under its own cProfile profiler.
+    """
+
+    def __init__(self, executor, task_profiles=None):
+        self.executor = executor
+        self.task_profiles = task_profiles
+        self.timings = {}  # name -> seconds spent running the task
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, fn, deps=()):
+        """Register `fn(*dependency results)` as task `name`; returns its Future"""
+        future = Future()
+        dep_futures = [self._futures[dep] for dep in deps]
+        self._futures[name] = future
+        remaining = [len(dep_futures)]
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            profiler = self.task_profiles.start() if self.task_profiles is not None else None
+            started = time.monotonic()
+            error = None
+            try:
+                result = fn(*(dep.result() for dep in dep_futures))
+            except BaseException as e:
+                error = e
+            seconds = time.monotonic() - started
+            # Record before resolving the future, so a waiting request sees the timing
+            if self.task_profiles is not None:
+                self.task_profiles.finish(name, profiler, seconds)
+            with self._lock:
+                self.timings[name] = seconds
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        def dependency_done(dep):
+            with self._lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if dep.exception() is not None:
+                if not future.done():
+                    try:
+                        future.set_exception(dep.exception())
+                    except Exception:
+                        pass  # another dependency already failed it
+                return
+            if ready and not future.done():
+                self.executor.submit(run)
+
+        if not dep_futures:
+            self.executor.submit(run)
+        for dep in dep_futures:
+            dep.add_done_callback(dependency_done)
+        return future
+
+    def future(self, name):
+        """The Future of task `name`"""
+        return self._futures[name]
+
+    def result(self, name, timeout=None):
+        """Wait for a task and return its result (re-raises its exception)"""
+        return self._futures[name].result(timeout=timeout)
+
+    def overlapped_seconds(self, exclude=()):
+        """Total run time of finished tasks, e.g. the CPU work hidden behind the API wait"""
+        with self._lock:
+            return sum(seconds for name, seconds in self.timings.items() if name not in exclude)
@@ -0,0 +1,186 @@
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+
+from modules.cache_backends import cache_key
+
+
+class MmapPixelCache:
+    """
+    Hot tier of enhanced, already-resized backgrounds stored as raw RGB.
+
+    Each entry is a `<key>-<w>x<h>.rgb` file of width * height * 3 bytes.
+    A hit memory-maps the file and copies the pixels out with
+    Image.frombytes (Pillow cannot wrap RGB buffers without a copy anyway),
+    so no PNG decode, enhancement or resize is needed. Every process reading
+    the same entry shares its pages through the OS page cache, and the
+    mapping is closed before get() returns.
+
+    Promotion: a background enters the tier once it has been used
+    `promote_after` times in this process. Demotion: on every promotion the
+    directory is re-scanned, so entries written or read by other processes
+    count (reads refresh the file mtime); entries idle for more than
+    `idle_seconds` are dropped, then least recently used entries until the
+    tier fits `max_bytes` across all processes.
+    """
+
+    def __init__(self, root, max_bytes=512 * 1024 * 1024, promote_after=2, idle_seconds=3600):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.promote_after = max(1, int(promote_after))
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._uses = OrderedDict()   # key -> uses seen before promotion
+        self._index = OrderedDict()  # file stem -> (bytes, last access), LRU order
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.promotions = 0
+        self.demotions = 0
+        with self._lock:
+            self._scan()
+
+    def _scan(self):
+        """Rebuild the index from the directory, the state shared with other processes (caller holds the lock)"""
+        entries = []
+        for path in self.root.glob("*.rgb"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # evicted by another process meanwhile
+            known = self._index.get(path.stem)
+            last_access = max(stat.st_mtime, known[1]) if known else stat.st_mtime
+            entries.append((last_access, path.stem, stat.st_size))
+        self._index.clear()
+        self.total_bytes = 0
+        for last_access, stem, size in sorted(entries):
+            self._index[stem] = (size, last_access)
+            self.total_bytes += size
+
+    def key(self, *parts):
+        """Tier key for generation parameters (include the target size)"""
+        return cache_key("pixels", *parts)
+
+    def _stem(self, key, size):
+        return f"{key}-{size[0]}x{size[1]}"
+
+    def _path(self, stem):
+        return self.root / f"{stem}.rgb"
+
+    def get(self, key, size):
+        """Image for key at size, copied from the mapped raw bytes without a PNG decode (None on miss)"""
+        stem = self._stem(key, size)
+        path = self._path(stem)
+        expected = size[0] * size[1] * 3
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if len(mapped) != expected:
+                    image = None
+                else:
+                    image = Image.frombytes('RGB', tuple(size), mapped)
+        except (FileNotFoundError, ValueError):  # ValueError: empty file
+            with self._lock:
+                self._forget(stem)
+                self.misses += 1
+            return None
+
+        if image is None:
+            self._remove(stem)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        now = time.time()
+        with self._lock:
+            self._index[stem] = (expected, now)
+            self._index.move_to_end(stem)
+            self.hits += 1
+        try:
+            os.utime(path, (now, now))  # recency for other processes' scans
+        except OSError:
+            pass
+        return image
+
+    def record_use(self, key):
+        """Count a use of a background; True once it qualifies for promotion"""
+        with self._lock:
+            uses = self._uses.pop(key, 0) + 1
+            self._uses[key] = uses
+            while len(self._uses) > 10000:
+                self._uses.popitem(last=False)
+            return uses >= self.promote_after
+
+    def put(self, key, image):
+        """Store an enhanced, resized background (RGB) in the tier"""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        data = image.tobytes()
+        if len(data) > self.max_bytes:
+            return False
+
+        stem = self._stem(key, image.size)
+        path = self._path(stem)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._scan()
+            self._index[stem] = (len(data), time.time())
+            self._index.move_to_end(stem)
+            self._uses.pop(key, None)
+            self.promotions += 1
+            self._demote()
+        return True
+
+    def _forget(self, stem):
+        """Drop an index entry (caller holds the lock)"""
+        entry = self._index.pop(stem, None)
+        if entry is not None:
+            self.total_bytes -= entry[0]
+
+    def _remove(self, stem):
+        with self._lock:
+            self._forget(stem)
+        try:
+            self._path(stem).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _demote(self):
+        """Evict idle entries, then LRU entries above the size cap (caller holds the lock)"""
+        now = time.time()
+        victims = [stem for stem, (_, last_access) in self._index.items()
+                   if self.idle_seconds and now - last_access > self.idle_seconds]
+        total = self.total_bytes - sum(self._index[stem][0] for stem in victims)
+        for stem, (size, _) in self._index.items():
+            if total <= self.max_bytes or len(self._index) - len(victims) <= 1:
+                break
+            if stem not in victims:
+                victims.append(stem)
+                total -= size
+        for stem in victims:
+            self._forget(stem)
+            try:
+                self._path(stem).unlink()
+            except FileNotFoundError:
+                pass
+            self.demotions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._index),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'promotions': self.promotions,
+                'demotions': self.demotions
+            }
@@ -0,0 +1,43 @@
+from PIL import Image
+
+from utils.image_utils import StripTiffWriter
+
+
+def print_pixel_size(paper_mm, dpi=300):
+    """Pixel size of a paper format, e.g. (297, 420) mm at 300 dpi -> (3508, 4961)"""
+    return tuple(int(round(mm / 25.4 * dpi)) for mm in paper_mm)
+
+
+def render_print(layout_designer, branding, background, size, text_elements, colors, output_path,
+                 dpi=300, include_logo=True, logo_position='top-right', strip_height=256):
+    """
+    Render a large-format poster strip by strip into a TIFF file.
+
+    The layout is planned once as a display list; for each horizontal strip
+    the matching band of the background is upsampled on its own (resize with
+    a source box, so strips join seamlessly) and the display list is replayed
+    with the strip's offset. Text, overlay, badge and logo scale with the
+    pixel size, i.e. with the DPI for a given paper format. Peak memory is a
+    few strips, whatever the output size.
+
+    Returns output_path.
+    """
+    width, height = size
+    scale = min(width, height) / 1080
+    ops = layout_designer.plan_layout(width, height, text_elements, colors, scale=scale)
+    if include_logo and branding is not None and branding.logo is not None:
+        logo, xy = branding.logo_placement(size, logo_position.lower(), scale=scale)
+        ops.append(layout_designer.image_op(logo, xy))
+
+    if background.mode != 'RGB':
+        background = background.convert('RGB')
+    source_width, source_height = background.size
+
+    with StripTiffWriter(output_path, size, rows_per_strip=strip_height, dpi=dpi) as writer:
+        for top in range(0, height, strip_height):
+            rows = min(strip_height, height - top)
+            source_box = (0, top * source_height / height, source_width, (top + rows) * source_height / height)
+            strip = background.resize((width, rows), Image.Resampling.LANCZOS, box=source_box).convert('RGBA')
+            layout_designer.render_layout(strip, ops, origin=(0, top))
+            writer.write_strip(strip.convert('RGB').tobytes())
+    return output_path
@@ -0,0 +1,169 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from PIL import Image
+
+# Per-worker components, created once by _init_worker
+_worker_components = {}
+
+
+def image_to_shared_memory(image):
+    """Copy an image's raw pixels into a new shared-memory block.
+
+    Returns (shm, descriptor). The caller owns shm and must close/unlink it.
+    """
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGB')
+    data = image.tobytes()
+    shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    shm.buf[:len(data)] = data
+    descriptor = {'name': shm.name, 'mode': image.mode, 'size': image.size}
+    return shm, descriptor
+
+
+def image_from_shared_memory(descriptor):
+    """Rebuild an image from a shared-memory descriptor (the pixels are copied)"""
+    shm = shared_memory.SharedMemory(name=descriptor['name'])
+    try:
+        width, height = descriptor['size']
+        nbytes = width * height * len(descriptor['mode'])
+        return Image.frombytes(descriptor['mode'], descriptor['size'], bytes(shm.buf[:nbytes]))
+    finally:
+        shm.close()
+
+
+def compose_poster(layout_designer, branding, image, target_size, text_elements,
+                   colors, tone, include_logo=True, logo_position='top-right', layout_ops=None):
+    """Run the post-API stages: resize, layout, branding and PNG encoding.
+
+    layout_ops is an optional display list from layout_designer.plan_layout
+    for target_size, planned while waiting for the background.
+    Returns (final_poster, png_bytes). Used both in-process and inside pool workers.
+    """
+    if image.size != tuple(target_size):
+        try:
+            image = image.resize(target_size, Image.Resampling.LANCZOS)
+        except Exception as e:
+            print(f"Warning: Resize failed: {e}")
+
+    final_poster = layout_designer.design_poster(image, text_elements, colors, tone, ops=layout_ops)
+
+    if include_logo:
+        try:
+            final_poster = branding.add_logo(final_poster, position=logo_position.lower())
+        except Exception as e:
+            print(f"Warning: Logo addition failed: {e}")
+
+    buffer = io.BytesIO()
+    final_poster.save(buffer, "PNG")
+    return final_poster, buffer.getvalue()
+
+
+def _init_worker(font_path, bold_font_path, logo_path, warm_sizes):
+    """Build and warm the layout and branding components once per worker"""
+    from modules.layout_designer import EnhancedLayoutDesigner
+    from modules.branding import Branding
+
+    layout_designer = EnhancedLayoutDesigner(font_path, bold_font_path)
+    layout_designer.warm(warm_sizes)
+    branding = Branding(logo_path)
+    branding.warm()
+
+    _worker_components['layout_designer'] = layout_designer
+    _worker_components['branding'] = branding
+
+
+def _compose_in_worker(source, output, target_size, text_elements, colors, tone,
+                       include_logo, logo_position):
+    """Pool task: read the background from shared memory, write the poster back"""
+    image = image_from_shared_memory(source)
+    if image.size != tuple(target_size):
+        image = image.resize(target_size, Image.Resampling.LANCZOS)
+    final_poster, png_bytes = compose_poster(
+        _worker_components['layout_designer'], _worker_components['branding'],
+        image, target_size, text_elements, colors, tone, include_logo, logo_position
+    )
+
+    final_poster = final_poster.convert('RGB')
+    if final_poster.size != tuple(output['size']):
+        final_poster = final_poster.resize(tuple(output['size']), Image.Resampling.LANCZOS)
+    data = final_poster.tobytes()
+    shm = shared_memory.SharedMemory(name=output['name'])
+    try:
+        shm.buf[:len(data)] = data
+    finally:
+        shm.close()
+    return png_bytes
+
+
+class CompositingPool:
+    """
+    Optional process pool for the CPU-bound compositing stages.
+
+    Background and poster pixels cross the process boundary through shared
+    memory; only small dicts and the encoded PNG are pickled.
+    """
+
+    def __init__(self, font_path, bold_font_path, logo_path, max_workers=None, warm_sizes=()):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(str(font_path), str(bold_font_path), str(logo_path), tuple(warm_sizes))
+        )
+
+    def compose(self, image, target_size, text_elements, colors, tone,
+                include_logo=True, logo_position='top-right'):
+        """Compose a poster in a worker process. Returns (final_poster, png_bytes)"""
+        source_shm, source = image_to_shared_memory(image)
+        output_shm = shared_memory.SharedMemory(create=True, size=target_size[0] * target_size[1] * 3)
+        output = {'name': output_shm.name, 'mode': 'RGB', 'size': target_size}
+        try:
+            future = self.executor.submit(
+                _compose_in_worker, source, output, target_size,
+                text_elements, colors, tone, include_logo, logo_position
+            )
+            png_bytes = future.result()
+            final_poster = image_from_shared_memory(output)
+            return final_poster, png_bytes
+        finally:
+            for shm in (source_shm, output_shm):
+                shm.close()
+                shm.unlink()
+
+    def compose_many(self, image, target_size, jobs, tone, include_logo=True):
+        """Compose several layouts of one background in parallel.
+
+        The background is resized once and shared by every worker through a
+        single shared-memory block. Each job is a dict with 'text_elements',
+        'colors' and 'logo_position'. Returns [(final_poster, png_bytes), ...]
+        in job order.
+        """
+        if image.size != tuple(target_size):
+            image = image.resize(target_size, Image.Resampling.LANCZOS)
+        source_shm, source = image_to_shared_memory(image)
+        output_shms = []
+        try:
+            futures = []
+            for job in jobs:
+                output_shm = shared_memory.SharedMemory(create=True, size=target_size[0] * target_size[1] * 3)
+                output_shms.append(output_shm)
+                output = {'name': output_shm.name, 'mode': 'RGB', 'size': target_size}
+                futures.append((output, self.executor.submit(
+                    _compose_in_worker, source, output, target_size,
+                    job['text_elements'], job['colors'], tone, include_logo, job['logo_position']
+                )))
+            results = []
+            for output, future in futures:
+                png_bytes = future.result()
+                results.append((image_from_shared_memory(output), png_bytes))
+            return results
+        finally:
+            for shm in [source_shm] + output_shms:
+                shm.close()
+                shm.unlink()
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
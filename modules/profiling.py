@@ -0,0 +1,207 @@
+"""
+On-demand profiling of the generate_poster hot path.
+
+A request is profiled when the UI debug toggle is on, when POSTER_PROFILE=1,
+or for 1 in POSTER_PROFILE_SAMPLE_RATE requests. cProfile only sees the
+thread it is enabled in, so the request thread gets one profiler and every
+task of the request's TaskGraph gets its own on the pipeline worker that
+runs it. The task profiles are merged into the request's report, which also
+lists each task's wall time. The HF API call runs in call_with_deadline's
+own thread and shows up as the request thread's wait in fetch_background.
+Compositing-pool processes are not included. On Python 3.12+, where only
+one profiler can be active, tasks report wall time only.
+
+Each profiled request writes a cProfile dump (<timestamp>-<label>.prof,
+readable by pstats, snakeviz or flameprof) and a short text summary into
+the profiles directory.
+
+Aggregate reports across requests with:
+
+    python -m modules.profiling aggregate [profiles_dir] [--top 30]
+"""
+
+import argparse
+import cProfile
+import datetime
+import io
+import itertools
+import pstats
+import threading
+from pathlib import Path
+
+# Function names (or file.py:name) for the stages we usually ask about
+HOT_PATH_FUNCTIONS = {
+    'HF API wait': ['fetch_background', 'call_with_deadline', 'text_to_image'],
+    'Text outlines': ['_add_text_with_outline'],
+    'Overlay/layout': ['design_poster', 'plan_layout', 'layout_designer.py:warm'],
+    'Logo': ['add_logo'],
+    'PNG encoding': ['PngImagePlugin.py:_save'],
+    'Text analysis': ['extract_key_phrases', 'determine_tone'],
+    'Thumbnails': ['thumbnail_pyramid']
+}
+
+_local = threading.local()
+
+
+def current_task_profiles():
+    """TaskProfiles of the request being profiled on this thread (None otherwise)"""
+    return getattr(_local, 'task_profiles', None)
+
+
+class TaskProfiles:
+    """Per-task profilers and wall times of one profiled request's TaskGraph"""
+
+    def __init__(self):
+        self.profilers = []
+        self.timings = {}  # task name -> wall seconds
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Enable a profiler on the calling worker thread (None if another one is active)"""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None
+        return profiler
+
+    def finish(self, name, profiler, seconds):
+        if profiler is not None:
+            profiler.disable()
+        with self._lock:
+            if profiler is not None:
+                self.profilers.append(profiler)
+            self.timings[name] = seconds
+
+    def snapshot(self):
+        """(profilers, timings) of the tasks finished so far"""
+        with self._lock:
+            return list(self.profilers), dict(self.timings)
+
+
+class RequestProfiler:
+    """Decides which requests to profile and writes their reports"""
+
+    def __init__(self, profiles_dir, always=False, sample_rate=0):
+        self.profiles_dir = Path(profiles_dir)
+        self.always = always
+        self.sample_rate = int(sample_rate or 0)
+        self._counter = itertools.count(1)
+
+    def should_profile(self, requested=False):
+        """True if this request should be profiled (cheap when disabled)"""
+        if requested or self.always:
+            return True
+        if self.sample_rate > 0:
+            return next(self._counter) % self.sample_rate == 0
+        return False
+
+    def run(self, label, fn, *args, **kwargs):
+        """Run fn under cProfile. Returns (result, report_path)
+
+        report_path is None when another profiler is already active (Python
+        3.12+ allows only one at a time); the request then runs unprofiled.
+        """
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            print(f"Warning: Profiling skipped: {e}")
+            return fn(*args, **kwargs), None
+        task_profiles = _local.task_profiles = TaskProfiles()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            _local.task_profiles = None
+        return result, self._write_report(profiler, label, task_profiles)
+
+    def _write_report(self, profiler, label, task_profiles=None):
+        """Dump the merged .prof file and its text summary"""
+        self.profiles_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        base = self.profiles_dir / f"{stamp}-{label}"
+        prof_path = base.with_suffix(".prof")
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profiler, stream=summary)
+        task_profilers, task_timings = task_profiles.snapshot() if task_profiles else ([], {})
+        for task_profiler in task_profilers:
+            stats.add(task_profiler)
+        stats.dump_stats(str(prof_path))
+
+        summary.write(format_hot_path(stats) + "\n\n")
+        if task_timings:
+            summary.write(format_task_timings(task_timings) + "\n\n")
+        stats.sort_stats("cumulative").print_stats(40)
+        base.with_suffix(".txt").write_text(summary.getvalue(), encoding="utf-8")
+        return str(prof_path)
+
+
+def hot_path_times(stats):
+    """Cumulative seconds spent in each HOT_PATH_FUNCTIONS stage, over all profiled threads
+
+    Only calls from outside the stage's own functions count, so nested
+    matches (design_poster -> plan_layout) are not counted twice.
+    """
+    times = {}
+    for stage, fragments in HOT_PATH_FUNCTIONS.items():
+        matched = {
+            func for func in stats.stats
+            if any(fragment == func[2] or fragment == f"{Path(func[0]).name}:{func[2]}" for fragment in fragments)
+        }
+        total = 0.0
+        for func in matched:
+            cc, nc, tt, ct, callers = stats.stats[func]
+            if not callers:
+                total += ct  # entry point of a profile
+                continue
+            total += sum(value[3] for caller, value in callers.items()
+                         if caller not in matched and isinstance(value, tuple))
+        times[stage] = total
+    return times
+
+
+def format_hot_path(stats):
+    """One line per hot-path stage with its cumulative time"""
+    total = stats.total_tt or 1e-9
+    lines = ["Hot path (cumulative seconds, % of profiled time over all threads):"]
+    for stage, seconds in hot_path_times(stats).items():
+        lines.append(f"  {stage:<16} {seconds:8.3f}s  {100 * seconds / total:5.1f}%")
+    return "\n".join(lines)
+
+
+def format_task_timings(timings):
+    """One line per pipeline task with its wall time on the worker"""
+    lines = ["Pipeline tasks (wall seconds on pipeline workers):"]
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        lines.append(f"  {name:<16} {seconds:8.3f}s")
+    return "\n".join(lines)
+
+
+def aggregate(profiles_dir, top=30, sort="cumulative"):
+    """Merge every .prof in profiles_dir and print a combined report"""
+    paths = sorted(Path(profiles_dir).glob("*.prof"))
+    if not paths:
+        print(f"No profiles found in {profiles_dir}")
+        return None
+    stats = pstats.Stats(str(paths[0]))
+    for path in paths[1:]:
+        stats.add(str(path))
+    print(f"Aggregated {len(paths)} profiled request(s) from {profiles_dir}\n")
+    print(format_hot_path(stats))
+    print()
+    stats.sort_stats(sort).print_stats(top)
+    return stats
+
+
+if __name__ == "__main__":
+    from config import PROFILES_DIR
+
+    parser = argparse.ArgumentParser(description="Aggregate generate_poster profiles")
+    parser.add_argument("command", choices=["aggregate"])
+    parser.add_argument("profiles_dir", nargs="?", default=str(PROFILES_DIR))
+    parser.add_argument("--top", type=int, default=30)
+    parser.add_argument("--sort", default="cumulative", choices=["cumulative", "tottime", "ncalls"])
+    args = parser.parse_args()
+    aggregate(args.profiles_dir, args.top, args.sort)
@@ -0,0 +1,139 @@
+import re
+import threading
+from collections import OrderedDict
+
+from modules.stage_cache import fingerprint
+
+# Primary-condition preference: specific conditions first, 'general' last
+CONDITION_ORDER = ['cancer', 'heart', 'brain', 'diabetes', 'respiratory', 'general']
+
+TONES = ['professional', 'urgent', 'trust', 'innovative']
+TONE_ALIASES = {
+    'trustworthy': 'trust',
+    'trusted': 'trust',
+    'innovation': 'innovative',
+    'urgency': 'urgent',
+    'clinical': 'professional'
+}
+
+STYLES = ['photorealistic', 'cinematic', 'illustration', 'abstract', 'minimalist']
+STYLE_ALIASES = {
+    'photo': 'photorealistic',
+    'realistic': 'photorealistic',
+    'photo-realistic': 'photorealistic',
+    'cinema': 'cinematic',
+    'illustrated': 'illustration',
+    'minimal': 'minimalist'
+}
+
+
+def _normalize(value, known, aliases, default):
+    value = re.sub(r'[\s_]+', '-', str(value or '').strip().lower())
+    value = aliases.get(value, value)
+    return value if value in known else default
+
+
+class PromptCanonicalizer:
+    """
+    Normalizes background-prompt inputs into a stable generation key.
+
+    The accuracy shown in the prompt is floored to a bucket (the exact value
+    is rendered by the layout badge), the primary condition is chosen by
+    CONDITION_ORDER instead of match order, and tone and style are
+    lower-cased, de-aliased and mapped to the values the prompt builder
+    knows (unknown values already produced the default modifiers).
+    Semantically identical campaigns therefore share one prompt, one cache
+    entry and one in-flight API call.
+
+    record() counts how many distinct raw inputs collapse into each key.
+    """
+
+    def __init__(self, accuracy_buckets=(90, 95, 99), max_keys=10000):
+        self.accuracy_buckets = sorted(accuracy_buckets)
+        self.max_keys = max_keys
+        self._keys = OrderedDict()  # key -> {'canonical', 'raw', 'uses'}
+        self._lock = threading.Lock()
+
+    def bucket_accuracy(self, accuracy):
+        """'98%' -> '95%' with the default buckets; below the lowest bucket
+        the value is kept ('80%' -> '80%'); None -> '95%'
+        """
+        match = re.search(r'\d+(?:\.\d+)?', str(accuracy or ''))
+        if not match or not self.accuracy_buckets:
+            return '95%'
+        value = float(match.group())
+        bucket = value  # never round a weaker claim up to a bucket
+        for threshold in self.accuracy_buckets:
+            if value >= threshold:
+                bucket = threshold
+        return f"{bucket:g}%"
+
+    def primary_condition(self, conditions):
+        """Canonical first condition ('medical' when none was found)"""
+        found = {str(condition).strip().lower() for condition in conditions or () if condition}
+        for condition in CONDITION_ORDER:
+            if condition in found:
+                return condition
+        return min(found) if found else 'medical'
+
+    def canonical_inputs(self, key_phrases, tone, style):
+        """Return {'condition', 'accuracy', 'tone', 'style'} for the prompt builder"""
+        if isinstance(tone, dict):
+            tone = tone.get('primary_tone', 'professional')
+        percentages = key_phrases.get('percentages') or []
+        if isinstance(percentages, str):
+            percentages = [percentages]
+        return {
+            'condition': self.primary_condition(key_phrases.get('conditions')),
+            'accuracy': self.bucket_accuracy(percentages[0] if percentages else None),
+            'tone': _normalize(tone, TONES, TONE_ALIASES, 'professional'),
+            'style': _normalize(style, STYLES, STYLE_ALIASES, 'photorealistic')
+        }
+
+    def generation_key(self, canonical):
+        return fingerprint("generation", canonical['condition'], canonical['accuracy'],
+                           canonical['tone'], canonical['style'])
+
+    @staticmethod
+    def _raw_inputs(key_phrases, tone, style):
+        """What the prompt was built from before canonicalization"""
+        if isinstance(tone, dict):
+            tone = tone.get('primary_tone')
+        conditions = key_phrases.get('conditions') or []
+        percentages = key_phrases.get('percentages') or []
+        if isinstance(percentages, str):
+            percentages = [percentages]
+        return (
+            str(conditions[0]) if conditions else None,
+            str(percentages[0]) if percentages else None,
+            str(tone), str(style)
+        )
+
+    def record(self, key_phrases, tone, style):
+        """Count one request; returns (key, distinct raw inputs sharing the key)"""
+        canonical = self.canonical_inputs(key_phrases, tone, style)
+        key = self.generation_key(canonical)
+        raw = self._raw_inputs(key_phrases, tone, style)
+        with self._lock:
+            entry = self._keys.pop(key, None) or {'canonical': canonical, 'raw': set(), 'uses': 0}
+            entry['raw'].add(raw)
+            entry['uses'] += 1
+            self._keys[key] = entry
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+            return key, len(entry['raw'])
+
+    def stats(self, top=10):
+        """Keys ordered by how many raw inputs collapse into them"""
+        with self._lock:
+            entries = [(key, dict(entry, raw=len(entry['raw']))) for key, entry in self._keys.items()]
+        entries.sort(key=lambda item: (-item[1]['raw'], -item[1]['uses']))
+        return {
+            'keys': len(entries),
+            'raw_inputs': sum(entry['raw'] for _, entry in entries),
+            'requests': sum(entry['uses'] for _, entry in entries),
+            'top': [
+                {'key': key, **entry['canonical'], 'raw_inputs': entry['raw'], 'requests': entry['uses']}
+                for key, entry in entries[:top]
+            ]
+        }
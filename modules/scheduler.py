@@ -0,0 +1,196 @@
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Lower value = served first
+PRIORITY_CLASSES = {
+    'interactive': 0,
+    'batch': 1
+}
+
+
+class QuotaExceeded(Exception):
+    """Raised when a request cannot be served within its allowed wait"""
+
+    def __init__(self, message, eta_seconds):
+        super().__init__(message)
+        self.eta_seconds = eta_seconds
+
+
+def mask_token(token):
+    """Short, log-safe form of an API token"""
+    token = token or ""
+    return f"{token[:8]}...{token[-4:]}" if len(token) > 12 else "***"
+
+
+class _TokenState:
+    """Rolling-window usage and wait queue for one API token"""
+
+    def __init__(self):
+        self.sent = deque()       # timestamps of requests inside the window
+        self.in_flight = 0
+        self.waiting = []         # tickets, kept sorted by (priority, finish tag, seq)
+        self.virtual_time = 0.0
+        self.user_finish = {}     # user -> last virtual finish tag
+        self.total_requests = 0
+        self.rejected = 0
+
+
+class FairScheduler:
+    """
+    Quota-aware, weighted-fair scheduler for API calls on shared tokens.
+
+    Each token has a budget of `requests_per_window` calls per rolling
+    `window_seconds` and at most `max_concurrent` calls in flight. Waiting
+    requests are ordered by priority class, then by weighted-fair-queuing
+    finish tag per user, so one heavy user cannot starve the others. A
+    request whose estimated wait exceeds its allowance is rejected at once
+    with QuotaExceeded carrying the ETA.
+    """
+
+    def __init__(self, requests_per_window=300, window_seconds=3600, max_concurrent=4,
+                 max_wait=None):
+        self.requests_per_window = requests_per_window
+        self.window_seconds = window_seconds
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait or {'interactive': 30, 'batch': 600}
+        self._tokens = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _state(self, token):
+        if token not in self._tokens:
+            self._tokens[token] = _TokenState()
+        return self._tokens[token]
+
+    def _expire(self, state, now):
+        while state.sent and state.sent[0] <= now - self.window_seconds:
+            state.sent.popleft()
+
+    def _eta(self, state, position, now):
+        """Seconds until the request at queue `position` (0 = head) can be sent"""
+        free_now = self.requests_per_window - len(state.sent)
+        if position < free_now:
+            return 0.0
+        needed = position - free_now  # index of the window slot that must expire
+        if needed < len(state.sent):
+            return max(0.0, state.sent[needed] + self.window_seconds - now)
+        windows = needed // max(1, self.requests_per_window) + 1
+        return windows * self.window_seconds
+
+    def estimate_wait(self, token, priority='interactive'):
+        """ETA in seconds for a new request of this priority on this token"""
+        with self._cond:
+            state = self._state(token)
+            now = time.time()
+            self._expire(state, now)
+            rank = PRIORITY_CLASSES.get(priority, 1)
+            ahead = sum(1 for ticket in state.waiting if ticket[0] <= rank)
+            return self._eta(state, ahead, now)
+
+    def headroom(self, token):
+        """Fraction of the token's window budget still unused (1.0 = idle)"""
+        with self._cond:
+            state = self._state(token)
+            self._expire(state, time.time())
+            used = len(state.sent) + len(state.waiting)
+            return max(0.0, 1.0 - used / max(1, self.requests_per_window))
+
+    def pending(self, token):
+        """Calls on this token currently in flight or queued"""
+        with self._cond:
+            state = self._state(token)
+            return state.in_flight + len(state.waiting)
+
+    @contextmanager
+    def slot(self, token, user_id="anonymous", priority='interactive', weight=1.0, max_wait=None):
+        """
+        Wait for a fair turn within the token's budget, then run the body.
+
+        max_wait overrides the priority class allowance (e.g. the remaining
+        request deadline).
+        """
+        rank = PRIORITY_CLASSES.get(priority, 1)
+        allowance = self.max_wait.get(priority, 600)
+        if max_wait is not None:
+            allowance = min(allowance, max_wait)
+
+        with self._cond:
+            state = self._state(token)
+            now = time.time()
+            self._expire(state, now)
+
+            start_tag = max(state.virtual_time, state.user_finish.get(user_id, 0.0))
+            finish_tag = start_tag + 1.0 / max(weight, 1e-6)
+            ticket = (rank, finish_tag, next(self._seq))
+            position = sum(1 for waiting in state.waiting if waiting < ticket)
+
+            eta = self._eta(state, position, now)
+            if eta > allowance:
+                state.rejected += 1
+                raise QuotaExceeded(
+                    f"API quota for token {mask_token(token)} exhausted; "
+                    f"estimated wait {eta:.0f}s exceeds {allowance:.0f}s",
+                    eta
+                )
+
+            state.user_finish[user_id] = finish_tag
+            state.waiting.append(ticket)
+            state.waiting.sort()
+            deadline_at = now + allowance
+            try:
+                while True:
+                    now = time.time()
+                    self._expire(state, now)
+                    is_head = state.waiting[0] == ticket
+                    has_budget = len(state.sent) < self.requests_per_window
+                    has_slot = state.in_flight < self.max_concurrent
+                    if is_head and has_budget and has_slot:
+                        break
+                    if now >= deadline_at:
+                        state.rejected += 1
+                        raise QuotaExceeded(
+                            f"Timed out waiting for API quota on token {mask_token(token)}",
+                            self._eta(state, state.waiting.index(ticket), now)
+                        )
+                    wait = min(1.0, deadline_at - now)
+                    if is_head and not has_budget and state.sent:
+                        wait = min(wait, max(0.01, state.sent[0] + self.window_seconds - now))
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                state.waiting.remove(ticket)
+                self._cond.notify_all()
+                raise
+
+            state.waiting.pop(0)
+            state.virtual_time = max(state.virtual_time, start_tag)
+            state.sent.append(now)
+            state.in_flight += 1
+            state.total_requests += 1
+            self._cond.notify_all()
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                state.in_flight -= 1
+                self._cond.notify_all()
+
+    def get_stats(self):
+        """Per-token usage for the status log and dashboards"""
+        with self._cond:
+            now = time.time()
+            stats = {}
+            for token, state in self._tokens.items():
+                self._expire(state, now)
+                stats[mask_token(token)] = {
+                    'used_in_window': len(state.sent),
+                    'budget': self.requests_per_window,
+                    'in_flight': state.in_flight,
+                    'queued': len(state.waiting),
+                    'total_requests': state.total_requests,
+                    'rejected': state.rejected
+                }
+            return stats
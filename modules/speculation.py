@@ -0,0 +1,121 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Speculator:
+    """
+    Single-flight registry for backgrounds generated ahead of the click.
+
+    While the user edits the prompt or settings, the UI schedules a
+    debounced speculation: each edit restarts a per-user timer, so only the
+    last edit in a burst runs, on the timer thread rather than the UI worker.
+    It submits the derived generation key; at most one speculative call per user and
+    `max_in_flight` overall run at a time. When the user clicks generate,
+    claim() hands back the in-flight or finished future for that key so the
+    request attaches to it instead of calling the API again.
+    """
+
+    def __init__(self, max_in_flight=2, max_entries=32, debounce_seconds=1.0):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_entries = max_entries
+        self.debounce_seconds = debounce_seconds
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="speculate")
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # generation key -> Future
+        self._running_by_user = {}     # user -> generation key
+        self._timers = {}              # user -> pending debounce Timer
+        self._results = OrderedDict()  # user -> return value of the last scheduled run
+        self.stats = {'started': 0, 'attached': 0, 'skipped_busy': 0}
+
+    def schedule(self, user_id, fn):
+        """Run fn() after the debounce period unless the user edits again first; returns at once
+
+        fn's return value is kept for the UI (see result()).
+        """
+        timer = threading.Timer(self.debounce_seconds, lambda: self._run_scheduled(user_id, timer, fn))
+        timer.daemon = True
+        with self._lock:
+            previous = self._timers.get(user_id)
+            if previous is not None:
+                previous.cancel()
+            self._timers[user_id] = timer
+        timer.start()
+
+    def cancel(self, user_id):
+        """Drop the user's pending speculation, if any"""
+        with self._lock:
+            timer = self._timers.pop(user_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _run_scheduled(self, user_id, timer, fn):
+        with self._lock:
+            if self._timers.get(user_id) is not timer:
+                return  # superseded by a newer edit
+            del self._timers[user_id]
+        try:
+            result = fn()
+        except Exception as e:
+            print(f"Warning: Speculative generation skipped: {e}")
+            result = None
+        with self._lock:
+            self._results[user_id] = result
+            self._results.move_to_end(user_id)
+            while len(self._results) > self.max_entries * 8:
+                self._results.popitem(last=False)
+
+    def result(self, user_id):
+        """Return value of the user's last scheduled run (None while one is pending or none ran)"""
+        with self._lock:
+            if user_id in self._timers:
+                return None
+            return self._results.get(user_id)
+
+    def _in_flight(self):
+        return sum(1 for future in self._entries.values() if not future.done())
+
+    def submit(self, user_id, key, fn):
+        """Start fn() for key unless it is known or the caps are reached.
+
+        Returns 'ready', 'running', 'started' or 'busy'.
+        """
+        with self._lock:
+            future = self._entries.get(key)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._entries.move_to_end(key)
+                return 'ready' if future.done() else 'running'
+
+            running_key = self._running_by_user.get(user_id)
+            user_busy = running_key in self._entries and not self._entries[running_key].done()
+            if user_busy or self._in_flight() >= self.max_in_flight:
+                self.stats['skipped_busy'] += 1
+                return 'busy'
+
+            future = self._executor.submit(fn)
+            self._entries[key] = future
+            self._running_by_user[user_id] = key
+            self.stats['started'] += 1
+            while len(self._entries) > self.max_entries:
+                oldest_key, oldest = next(iter(self._entries.items()))
+                if not oldest.done():
+                    break
+                del self._entries[oldest_key]
+            return 'started'
+
+    def status(self, key):
+        """'ready', 'running' or None for a generation key (does not count as an attach)"""
+        with self._lock:
+            future = self._entries.get(key)
+            if future is None or (future.done() and future.exception() is not None):
+                return None
+            return 'ready' if future.done() else 'running'
+
+    def claim(self, key):
+        """Future for a speculated key (None if nothing was speculated)"""
+        with self._lock:
+            future = self._entries.get(key)
+            if future is None or (future.done() and future.exception() is not None):
+                return None
+            self.stats['attached'] += 1
+            return future
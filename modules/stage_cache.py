@@ -0,0 +1,56 @@
+import hashlib
+
+
+def fingerprint(*parts):
+    """Stable short hash of plain-Python stage inputs"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:16]
+
+
+class StageCache:
+    """
+    Per-session cache of intermediate pipeline artifacts.
+
+    Each stage keeps only its latest result together with the fingerprint
+    of the inputs that produced it. A stage's fingerprint also covers the
+    fingerprints of the stages it depends on, so when an upstream stage is
+    recomputed with different inputs every downstream stage misses too.
+    """
+
+    def __init__(self):
+        self._entries = {}  # stage -> (key, value)
+        self.hits = 0
+        self.misses = 0
+
+    def __deepcopy__(self, memo):
+        # gr.State deep-copies its default per session; start each one empty
+        return StageCache()
+
+    def key_of(self, stage):
+        """Fingerprint of the cached result for `stage` (None if absent)"""
+        entry = self._entries.get(stage)
+        return entry[0] if entry else None
+
+    def get_or_compute(self, stage, inputs, compute, depends_on=()):
+        """
+        Return (value, reused) for `stage`.
+
+        `inputs` must be a tuple of plain values; `depends_on` lists upstream
+        stage names whose cached fingerprints are folded into the key.
+        """
+        key = fingerprint(stage, inputs, tuple(self.key_of(dep) for dep in depends_on))
+        entry = self._entries.get(stage)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1], True
+
+        self.misses += 1
+        value = compute()
+        self._entries[stage] = (key, value)
+        return value, False
+
+    def invalidate(self, stage=None):
+        """Drop one stage, or every stage when stage is None"""
+        if stage is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(stage, None)
@@ -65,6 +65,16 @@ class EnhancedTextAnalyzer:
             'full_text': text
         }
     
+    def analyze(self, text):
+        """Run extraction, tone, headlines and features for one text"""
+        key_phrases = self.extract_key_phrases(text)
+        return {
+            'key_phrases': key_phrases,
+            'tone': self.determine_tone(text),
+            'headlines': self.generate_headline(key_phrases),
+            'features': self.generate_features(key_phrases)
+        }
+
     def determine_tone(self, text):
         """Determine the tone of the text"""
         text_lower = text.lower()
@@ -0,0 +1,154 @@
+from functools import lru_cache
+from PIL import ImageFont
+
+
+@lru_cache(maxsize=512)
+def load_font(font_path, size):
+    """Load a font once per (path, size); falls back to Pillow's default font"""
+    try:
+        return ImageFont.truetype(str(font_path), size)
+    except Exception:
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:  # Pillow < 10.1 has no scalable default font
+            return ImageFont.load_default()
+
+
+@lru_cache(maxsize=65536)
+def text_width(font_path, size, text):
+    """Rendered width of text in pixels, cached per (font, size, string)"""
+    return load_font(font_path, size).getlength(text)
+
+
+@lru_cache(maxsize=4096)
+def line_height(font_path, size):
+    """Ascent + descent of a font size in pixels"""
+    font = load_font(font_path, size)
+    try:
+        ascent, descent = font.getmetrics()
+        return ascent + descent
+    except AttributeError:
+        return size
+
+
+class FitResult:
+    """Font size and wrapped lines chosen for a text box"""
+
+    def __init__(self, size, lines, line_height):
+        self.size = size
+        self.lines = lines
+        self.line_height = line_height
+
+    def __repr__(self):
+        return f"FitResult(size={self.size}, lines={self.lines!r})"
+
+
+class TextFitter:
+    """
+    Picks the largest font size at which text fits a pixel box.
+
+    Widths come from the real font metrics and are cached per
+    (font, size, string), so a binary search over sizes costs a handful of
+    dictionary lookups once the cache is warm.
+    """
+
+    def __init__(self, font_path, min_size=12, max_size=120, line_spacing=1.15):
+        self.font_path = str(font_path)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.line_spacing = line_spacing
+
+    def font(self, size):
+        """Font object for a size"""
+        return load_font(self.font_path, size)
+
+    def width(self, text, size):
+        """Pixel width of text at size"""
+        return text_width(self.font_path, size, text)
+
+    def line_step(self, size):
+        """Vertical distance between consecutive lines at size"""
+        return int(line_height(self.font_path, size) * self.line_spacing)
+
+    def wrap(self, text, size, max_width):
+        """Greedy word wrap by pixel width"""
+        lines = []
+        current = ""
+        for word in text.split():
+            candidate = f"{current} {word}" if current else word
+            if current and self.width(candidate, size) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        if current:
+            lines.append(current)
+        return lines
+
+    def _fits(self, text, size, max_width, max_height, max_lines):
+        lines = self.wrap(text, size, max_width)
+        if len(lines) > max_lines:
+            return None
+        if any(self.width(line, size) > max_width for line in lines):
+            return None
+        if len(lines) * self.line_step(size) > max_height:
+            return None
+        return lines
+
+    def _search(self, fits, min_size, max_size):
+        """Largest size in [min_size, max_size] for which fits(size) is truthy"""
+        best = None
+        low, high = min_size, max_size
+        while low <= high:
+            mid = (low + high) // 2
+            result = fits(mid)
+            if result is not None:
+                best = (mid, result)
+                low = mid + 1
+            else:
+                high = mid - 1
+        return best
+
+    def fit(self, text, max_width, max_height, max_lines=2, min_size=None, max_size=None):
+        """Fit wrapped text into a box. Returns a FitResult.
+
+        If even min_size does not fit, the text is wrapped at min_size and
+        cut to max_lines with an ellipsis.
+        """
+        min_size = min_size or self.min_size
+        max_size = max(min_size, min(max_size or self.max_size, int(max_height)))
+        best = self._search(
+            lambda size: self._fits(text, size, max_width, max_height, max_lines),
+            min_size, max_size
+        )
+        if best is not None:
+            size, lines = best
+            return FitResult(size, lines, self.line_step(size))
+
+        lines = self.wrap(text, min_size, max_width)
+        if len(lines) > max_lines:
+            lines = lines[:max_lines]
+            lines[-1] = lines[-1].rstrip(".,;:") + "…"
+        return FitResult(min_size, lines, self.line_step(min_size))
+
+    def fit_lines(self, texts, max_width, max_height, min_size=None, max_size=None, extra_width=0):
+        """Largest size at which every text fits on its own line and all lines fit the height.
+
+        extra_width reserves room per line (e.g. for a bullet) and is given as
+        a fraction of the font size.
+        """
+        min_size = min_size or self.min_size
+        max_size = max(min_size, min(max_size or self.max_size, int(max_height)))
+        texts = list(texts)
+
+        def fits(size):
+            room = max_width - extra_width * size
+            if any(self.width(text, size) > room for text in texts):
+                return None
+            if len(texts) * self.line_step(size) > max_height:
+                return None
+            return True
+
+        best = self._search(fits, min_size, max_size)
+        size = best[0] if best else min_size
+        return FitResult(size, texts, self.line_step(size))
@@ -0,0 +1,176 @@
+import threading
+import time
+from pathlib import Path
+
+from modules.scheduler import QuotaExceeded, mask_token
+
+
+def load_tokens(tokens="", tokens_file="", primary=""):
+    """Pool tokens from a comma-separated string, a file (one per line, '#' comments) and HF_API_TOKEN
+
+    Duplicates and blanks are dropped; order is primary, string, file.
+    """
+    candidates = [primary] + str(tokens or "").split(",")
+    if tokens_file and Path(tokens_file).exists():
+        with open(tokens_file, encoding='utf-8') as f:
+            candidates += [line.split("#", 1)[0] for line in f]
+    pool = []
+    for token in candidates:
+        token = token.strip()
+        if token and token not in pool:
+            pool.append(token)
+    return pool
+
+
+def classify_api_error(error_str):
+    """'rate_limited', 'invalid' or 'error' for an InferenceClient failure message"""
+    lowered = error_str.lower()
+    # Not a bare "exceeded": urllib3 reports connection failures as "Max retries exceeded with url"
+    if "429" in error_str or "rate limit" in lowered or "quota" in lowered:
+        return 'rate_limited'
+    if "401" in error_str or "403" in error_str or "unauthorized" in lowered or "invalid token" in lowered \
+            or "invalid username or password" in lowered:
+        return 'invalid'
+    return 'error'
+
+
+class _PooledToken:
+    """Usage counters and cooldown for one pooled token"""
+
+    def __init__(self):
+        self.outstanding = 0
+        self.requests = 0
+        self.successes = 0
+        self.rate_limited = 0
+        self.invalid = 0
+        self.errors = 0
+        self.cooldown_until = 0.0
+        self.cooldown_reason = None
+
+
+class TokenPool:
+    """
+    Spreads API calls over several HF API tokens.
+
+    acquire() hands out the token with the fewest outstanding calls among
+    those not cooling down, preferring tokens the FairScheduler can serve
+    without waiting and then the one with the most window headroom. Every
+    acquire() is paired with release(token, outcome): a 429 takes the token
+    out of rotation for `rate_limit_cooldown` seconds, a 401/403 for
+    `invalid_cooldown` seconds. When every token is cooling down, acquire()
+    raises QuotaExceeded with the time until the first one returns.
+    """
+
+    def __init__(self, tokens, scheduler=None, rate_limit_cooldown=60, invalid_cooldown=3600):
+        self.tokens = list(tokens)
+        self.scheduler = scheduler
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.invalid_cooldown = invalid_cooldown
+        self._state = {token: _PooledToken() for token in self.tokens}
+        self._lock = threading.Lock()
+
+    def __contains__(self, token):
+        return (token or "").strip() in self._state
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def available(self, exclude=()):
+        """Tokens currently in rotation"""
+        now = time.time()
+        with self._lock:
+            return [token for token in self.tokens
+                    if token not in exclude and self._state[token].cooldown_until <= now]
+
+    def _rank(self, token, priority):
+        state = self._state[token]
+        if self.scheduler is None:
+            return (0, state.outstanding, 0.0, state.requests)
+        return (
+            self.scheduler.estimate_wait(token, priority) > 0,
+            state.outstanding,
+            -self.scheduler.headroom(token),
+            state.requests
+        )
+
+    def peek(self, priority='interactive'):
+        """Token the next acquire() would return, without taking it (None if all are cooling down)"""
+        candidates = self.available()
+        with self._lock:
+            return min(candidates, key=lambda token: self._rank(token, priority)) if candidates else None
+
+    def acquire(self, priority='interactive', exclude=()):
+        """Take the least-loaded token in rotation (tokens in `exclude` only as a last resort)"""
+        candidates = self.available(exclude) or self.available()
+        with self._lock:
+            if not candidates:
+                eta = min(state.cooldown_until for state in self._state.values()) - time.time()
+                raise QuotaExceeded(
+                    f"All {len(self.tokens)} pooled API tokens are rate limited or invalid; "
+                    f"next one returns in {max(0.0, eta):.0f}s",
+                    max(0.0, eta)
+                )
+            token = min(candidates, key=lambda token: self._rank(token, priority))
+            state = self._state[token]
+            state.outstanding += 1
+            state.requests += 1
+            return token
+
+    def release(self, token, outcome='ok'):
+        """Return a token; outcome is 'ok', 'rate_limited', 'invalid', 'error' or None (no API answer)"""
+        with self._lock:
+            state = self._state.get(token)
+            if state is None:
+                return
+            state.outstanding = max(0, state.outstanding - 1)
+            if outcome == 'ok':
+                state.successes += 1
+            elif outcome == 'rate_limited':
+                state.rate_limited += 1
+                state.cooldown_until = time.time() + self.rate_limit_cooldown
+                state.cooldown_reason = 'rate limited'
+            elif outcome == 'invalid':
+                state.invalid += 1
+                state.cooldown_until = time.time() + self.invalid_cooldown
+                state.cooldown_reason = 'invalid'
+            elif outcome == 'error':
+                state.errors += 1
+        if outcome in ('rate_limited', 'invalid'):
+            print(f"🔑 Token {mask_token(token)} {state.cooldown_reason}; out of rotation for "
+                  f"{self.rate_limit_cooldown if outcome == 'rate_limited' else self.invalid_cooldown:.0f}s")
+
+    def stats(self):
+        """Per-token usage with masked tokens"""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    'token': mask_token(token),
+                    'outstanding': state.outstanding,
+                    'requests': state.requests,
+                    'successes': state.successes,
+                    'rate_limited': state.rate_limited,
+                    'invalid': state.invalid,
+                    'errors': state.errors,
+                    'cooldown_seconds': max(0.0, state.cooldown_until - now),
+                    'cooldown_reason': state.cooldown_reason if state.cooldown_until > now else None
+                }
+                for token, state in self._state.items()
+            ]
+
+    def report(self):
+        """Markdown table of per-token usage"""
+        lines = [
+            f"**🔑 Token pool** — {len(self.available())}/{len(self.tokens)} in rotation",
+            "",
+            "| Token | In flight | Requests | OK | 429 | 401/403 | Other | Status |",
+            "|---|---|---|---|---|---|---|---|"
+        ]
+        for entry in self.stats():
+            status = (f"{entry['cooldown_reason']}, back in {entry['cooldown_seconds']:.0f}s"
+                      if entry['cooldown_reason'] else "active")
+            lines.append(
+                f"| `{entry['token']}` | {entry['outstanding']} | {entry['requests']} | {entry['successes']} "
+                f"| {entry['rate_limited']} | {entry['invalid']} | {entry['errors']} | {status} |"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,57 @@
+from config import COLOR_PALETTES
+
+LOGO_POSITIONS = ["Top-right", "Top-left", "Bottom-right", "Bottom-left"]
+
+
+def _palette_name(colors):
+    """Find the COLOR_PALETTES key for a palette dict (None if it is custom)"""
+    for name, palette in COLOR_PALETTES.items():
+        if palette == colors:
+            return name
+    return None
+
+
+def _rotate(items, first):
+    """Return items with `first` moved to the front (order otherwise kept)"""
+    items = list(items)
+    if first in items:
+        items.remove(first)
+    return [first] + items if first is not None else items
+
+
+def plan_variants(headlines, colors, logo_position, count):
+    """
+    Plan `count` layout variants of one background.
+
+    Variant 1 is always the user's own selection (first headline, chosen
+    palette, chosen logo position). The rest step through the remaining
+    headline candidates, COLOR_PALETTES entries and logo positions so that
+    neighbouring variants differ in more than one dimension.
+
+    Returns a list of dicts with 'headline', 'colors', 'palette',
+    'logo_position' and 'label'.
+    """
+    headlines = list(headlines) or ["AI Medical Diagnosis"]
+    base_palette = _palette_name(colors)
+    palette_names = _rotate(COLOR_PALETTES.keys(), base_palette)
+    positions = _rotate(LOGO_POSITIONS, logo_position if logo_position in LOGO_POSITIONS else None)
+
+    variants = []
+    for i in range(max(1, count)):
+        headline = headlines[i % len(headlines)]
+        if i == 0 or not palette_names:
+            palette = base_palette or 'custom'
+            variant_colors = colors
+        else:
+            palette = palette_names[i % len(palette_names)]
+            variant_colors = COLOR_PALETTES[palette]
+        position = positions[i % len(positions)]
+
+        variants.append({
+            'headline': headline,
+            'colors': variant_colors,
+            'palette': palette,
+            'logo_position': position,
+            'label': f"#{i + 1} • {palette.title()} • {position}"
+        })
+    return variants
@@ -0,0 +1,128 @@
+import pstats
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from modules.job_queue import JobCancelled
+from modules.profiling import hot_path_times
+
+
+def _nltk_data_installed():
+    try:
+        from nltk.corpus import stopwords
+        from nltk.tokenize import word_tokenize
+        word_tokenize("AI detects cancer early.")
+        stopwords.words("english")
+    except LookupError:
+        return False
+    return True
+
+
+# The text analyzer needs the NLTK punkt and stopwords data
+pytestmark = pytest.mark.skipif(not _nltk_data_installed(), reason="NLTK data not installed")
+
+PROMPT = "Our AI detects lung cancer with 97% accuracy, trusted by radiologists"
+
+
+class FakeInferenceClient:
+    """Stands in for huggingface_hub.InferenceClient with a fixed, slightly slow background"""
+
+    delay = 0.2
+    calls = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def text_to_image(self, **kwargs):
+        self.calls.append(kwargs)
+        time.sleep(self.delay)
+        pixels = np.random.RandomState(0).randint(0, 255, (kwargs.get('height', 512), kwargs.get('width', 512), 3))
+        return Image.fromarray(pixels.astype(np.uint8))
+
+
+@pytest.fixture
+def poster_app(tmp_path, monkeypatch):
+    import app
+    monkeypatch.setattr("modules.hf_api_generator.InferenceClient", FakeInferenceClient)
+    monkeypatch.setattr(FakeInferenceClient, "calls", [])
+    monkeypatch.delenv("HF_API_TOKEN", raising=False)
+    for name, value in {
+        'POSTER_STORE_DIR': tmp_path / "posters",
+        'PROFILES_DIR': tmp_path / "profiles",
+        'LEDGER_ENABLED': False,
+        'CACHE_BACKEND': 'none',
+        'PIXEL_CACHE_MB': 0,
+        'COMPOSITE_WORKERS': 0,
+        'HF_API_TOKENS': "",
+        'HF_API_TOKENS_FILE': ""
+    }.items():
+        monkeypatch.setattr(app, name, value)
+    generator = app.APIPosterGenerator(precompute_examples=False, job_queue=False, model_warmup=False)
+    yield generator
+    generator.pipeline_executor.shutdown(wait=True)
+
+
+def generate(poster_app, **kwargs):
+    return poster_app.generate_poster(
+        PROMPT, "hf_test_token_0000", "SDXL Turbo (Fastest)", "Auto-detect", "Auto-detect",
+        True, "Top-right", "LinkedIn (1200x1200)", 4, 7.5, "photorealistic", **kwargs
+    )
+
+
+def test_cancelled_job_stops_without_an_error(poster_app):
+    stages = []
+
+    def progress(stage, fraction=None):
+        stages.append(stage)
+        if stage == 'layout':
+            raise JobCancelled("cancelled by the client")
+
+    with pytest.raises(JobCancelled):
+        generate(poster_app, progress_callback=progress)
+
+    assert stages == ['analysis', 'image', 'layout']
+    assert poster_app.output_store.stats()['entries'] == 0
+
+
+def test_profiled_generation_reports_each_stage(poster_app, tmp_path):
+    poster, _, status, _, _ = generate(poster_app, profile_request=True)
+
+    assert poster is not None
+    report = status.rsplit("🐞 Profile saved: ", 1)[1].strip()
+    times = hot_path_times(pstats.Stats(report))
+    for stage in ['HF API wait', 'Overlay/layout', 'PNG encoding', 'Text analysis', 'Thumbnails']:
+        assert times[stage] > 0, stage
+    assert times['HF API wait'] >= FakeInferenceClient.delay * 0.9
+    summary = next((tmp_path / "profiles").glob("*.txt")).read_text(encoding="utf-8")
+    assert "Pipeline tasks" in summary
+
+
+def test_finalize_reuses_the_drafts_seed_and_settings(poster_app):
+    from config import DRAFT_SIZE, DRAFT_STEPS
+
+    *draft_result, draft = poster_app.generate_draft(
+        PROMPT, "hf_test_token_0000", "SDXL Turbo (Fastest)", "Auto-detect", "Auto-detect",
+        True, "Top-right", "LinkedIn (1200x1200)", 25, 7.5, "photorealistic"
+    )
+    assert draft_result[0] is not None
+    assert draft['seed'] is not None and draft['inference_steps'] == 25
+
+    final_result = poster_app.finalize_draft(draft)
+    assert final_result[0] is not None
+    assert final_result[0].size == draft_result[0].size == (1200, 1200)
+
+    draft_call, final_call = FakeInferenceClient.calls
+    assert draft_call['seed'] == final_call['seed'] == draft['seed']
+    assert draft_call['prompt'] == final_call['prompt']
+    assert draft_call['guidance_scale'] == final_call['guidance_scale'] == 7.5
+    assert (draft_call['num_inference_steps'], draft_call['width']) == (min(25, DRAFT_STEPS), DRAFT_SIZE)
+    assert (final_call['num_inference_steps'], final_call['width'], final_call['height']) == (25, 1024, 1024)
+
+
+def test_finalize_without_a_draft(poster_app):
+    poster, caption, status, variants, output_path = poster_app.finalize_draft(None)
+    assert poster is None and output_path is None
+    assert "No draft to finalize" in status
+    assert FakeInferenceClient.calls == []
@@ -0,0 +1,99 @@
+import pytest
+
+from config import HF_MODELS, MODEL_PROFILES
+import modules.autotuner as autotuner
+from modules.autotuner import AutoTuner, LatencyModel
+
+FLUX = HF_MODELS["FLUX.1 Schnell (Fast & Quality)"]
+SDXL = HF_MODELS["Stable Diffusion XL (Best Quality)"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(autotuner.time, "time", clock.time)
+    return clock
+
+
+def _latency_model(**kwargs):
+    priors = {HF_MODELS[name]: profile['seconds_per_step'] for name, profile in MODEL_PROFILES.items()}
+    return LatencyModel(priors=priors, **kwargs)
+
+
+def _tuner(latency_model=None, model_status=None):
+    return AutoTuner(HF_MODELS, MODEL_PROFILES, latency_model or _latency_model(), model_status=model_status)
+
+
+@pytest.mark.parametrize("target, choice", [
+    (60, ("Playground v2.5 (Aesthetic)", 30)),  # full quality; the fastest of 30/35/40 steps
+    (11, ("Stable Diffusion XL (Best Quality)", 30)),  # Playground at 30 steps needs 12s
+    (9, ("Stable Diffusion XL (Best Quality)", 25)),
+    (1, ("SDXL Turbo (Fastest)", 15)),  # nothing meets it: the fastest option
+])
+def test_choice_for_target_latency(target, choice):
+    tuner = _tuner()
+    name, steps, seconds, source = tuner.choose(target)
+    assert (name, steps) == choice
+    assert source == 'prior'
+    assert seconds == pytest.approx(MODEL_PROFILES[name]['seconds_per_step'] * steps)
+
+
+def test_choice_is_the_best_quality_that_meets_the_target():
+    tuner = _tuner()
+    for target in (3, 5, 8, 10, 13, 20):
+        name, steps, seconds, _ = tuner.choose(target)
+        assert seconds <= target
+        best = max(tuner.expected_quality(other, other_steps)
+                   for other in MODEL_PROFILES for other_steps in autotuner.STEP_CHOICES
+                   if tuner.predict(other, other_steps)[0] <= target)
+        assert tuner.expected_quality(name, steps) == best
+
+
+def test_cold_models_are_penalised():
+    tuner = _tuner(model_status=lambda model_id: 'cold' if model_id == SDXL else 'warm')
+    seconds, source = tuner.predict("Stable Diffusion XL (Best Quality)", 20)
+    assert seconds == pytest.approx(0.35 * 20 + tuner.cold_penalty)
+    assert source == 'prior, cold'
+    assert tuner.choose(11)[0] != "Stable Diffusion XL (Best Quality)"
+
+
+def test_prediction_source_falls_back(clock):
+    model = _latency_model(min_samples=3)
+    assert model.predict(FLUX, 4) == (pytest.approx(0.6 * 4), 'prior')
+    assert model.predict("unknown/model", 10) == (pytest.approx(0.5 * 10), 'prior')
+
+    model.observe(FLUX, 8.0, 8)  # 1 s per unit of work at 1024x1024
+    assert model.predict(FLUX, 4) == (pytest.approx(4.0), 'scaled')
+    assert model.predict(FLUX, 4, 512, 512) == (pytest.approx(1.0), 'scaled')
+
+    for seconds in (3.0, 5.0, 3.5):
+        model.observe(FLUX, seconds, 4)
+    assert model.predict(FLUX, 4) == (3.5, 'observed')
+
+
+def test_warm_up_pings_are_ignored(clock):
+    model = _latency_model()
+    model.observe(FLUX, 30.0, 1, 256, 256)
+    assert model.predict(FLUX, 4)[1] == 'prior'
+
+
+def test_stale_observations_age_out(clock):
+    model = _latency_model(max_age=3600, min_samples=1)
+    model.observe(SDXL, 20.0, 25)
+    assert model.predict(SDXL, 25) == (20.0, 'observed')
+
+    clock.now += 3599
+    assert model.predict(SDXL, 25)[1] == 'observed'
+    clock.now += 2
+    assert model.predict(SDXL, 25) == (pytest.approx(0.35 * 25), 'prior')
+
+    model.observe(SDXL, 10.0, 25)
+    assert model.predict(SDXL, 25) == (10.0, 'observed')
@@ -0,0 +1,83 @@
+import json
+
+from PIL import Image
+
+from modules.batch import merge, param_hash, read_manifest, run_shard, shard_of
+
+ROWS = [
+    {'id': "a", 'prompt': "AI detects cancer with 97% accuracy"},
+    {'id': "b", 'prompt': "Heart screening in five minutes"},
+    {'id': "c", 'prompt': "AI detects cancer with 97% accuracy"},  # duplicate of a
+    {'id': "d", 'prompt': "Diabetes risk check, 92% accurate", 'inference_steps': 8}
+]
+
+
+class FakeGenerator:
+    """generate_poster stand-in that saves into an 'output store' directory"""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.calls = []
+
+    def generate_poster(self, prompt, api_token, *args, **kwargs):
+        self.calls.append(prompt)
+        self.store_dir.mkdir(exist_ok=True)
+        path = self.store_dir / f"poster-{len(self.calls)}.png"
+        Image.new("RGB", (8, 8), "white").save(path)
+        return object(), f"caption: {prompt}", "ok", [], str(path)
+
+
+def _manifest(tmp_path, rows=ROWS):
+    path = tmp_path / "campaign.jsonl"
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+    return path
+
+
+def test_shard_of_is_stable_and_ignores_priority(tmp_path):
+    rows = dict(read_manifest(_manifest(tmp_path)))
+    assert param_hash(rows["a"]) == param_hash(rows["c"])
+    assert param_hash(rows["a"]) != param_hash(rows["d"])
+    for params in rows.values():
+        assert 0 <= shard_of(params, 3) < 3
+        assert shard_of(dict(params, priority='interactive'), 3) == shard_of(params, 3)
+
+
+def test_run_shard_keeps_posters_outside_the_store(tmp_path):
+    manifest = _manifest(tmp_path)
+    generator = FakeGenerator(tmp_path / "store")
+    results_dir = tmp_path / "results"
+
+    assert run_shard(generator, manifest, 0, 1, results_dir, api_token="hf_x") == (4, 0, 0)
+    assert len(generator.calls) == 3  # the duplicate row reused a's poster
+
+    for path in (tmp_path / "store").iterdir():
+        path.unlink()  # the output store's sweeper removed everything
+    assert merge(manifest, 1, results_dir) == []
+
+    # Resuming skips finished rows whose posters still exist
+    assert run_shard(generator, manifest, 0, 1, results_dir, api_token="hf_x") == (0, 4, 0)
+
+
+def test_missing_poster_files_are_rendered_again_and_reported(tmp_path):
+    manifest = _manifest(tmp_path)
+    generator = FakeGenerator(tmp_path / "store")
+    results_dir = tmp_path / "results"
+    run_shard(generator, manifest, 0, 1, results_dir, api_token="hf_x")
+
+    for path in (results_dir / "posters").iterdir():
+        path.unlink()
+    assert merge(manifest, 1, results_dir) == ["a", "b", "c", "d"]
+
+    assert run_shard(generator, manifest, 0, 1, results_dir, api_token="hf_x") == (4, 0, 0)
+    assert len(generator.calls) == 6
+    assert merge(manifest, 1, results_dir) == []
+
+
+def test_merge_reports_missing_shards(tmp_path):
+    manifest = _manifest(tmp_path)
+    results_dir = tmp_path / "results"
+    run_shard(FakeGenerator(tmp_path / "store"), manifest, 0, 2, results_dir, api_token="hf_x")
+
+    rows = dict(read_manifest(manifest))
+    expected = [row_id for row_id, params in rows.items() if shard_of(params, 2) == 1]
+    assert merge(manifest, 2, results_dir) == expected
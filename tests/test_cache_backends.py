@@ -0,0 +1,81 @@
+import os
+import threading
+
+import pytest
+
+from modules.cache_backends import CacheBackend, FileCacheBackend, NetworkCacheBackend, make_cache_server
+
+
+@pytest.fixture
+def cache_server():
+    server = make_cache_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_network_backend_round_trip(cache_server):
+    backend = NetworkCacheBackend(cache_server, timeout=2.0)
+
+    assert backend.get("poster-ab") is None
+    backend.set("poster-ab", b"\x89PNG bytes")
+    assert backend.get("poster-ab") == b"\x89PNG bytes"
+    backend.delete("poster-ab")
+    assert backend.get("poster-ab") is None
+    backend.delete("poster-ab")  # deleting a missing key is not an error
+
+    assert (backend.hits, backend.misses) == (1, 2)
+
+
+def test_network_backend_outage_is_a_miss():
+    server = make_cache_server(port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.server_close()  # nothing listens on the port any more
+    backend = NetworkCacheBackend(url, timeout=1.0)
+
+    backend.set("poster-ab", b"value")
+    assert backend.get("poster-ab") is None
+
+
+def test_file_backend_evicts_least_recently_used(tmp_path):
+    backend = FileCacheBackend(tmp_path, max_bytes=1400)
+    for index in range(4):
+        key = f"item-{index:02x}"
+        backend.set(key, b"x" * 300)
+        os.utime(backend._path(key), (index, index))
+    backend.get("item-00")  # refreshes its mtime, so item-01 is now the oldest
+
+    backend.set("item-04", b"x" * 300)
+
+    assert backend.get("item-01") is None
+    assert backend.get("item-00") is not None
+    assert backend.get("item-04") is not None
+    assert backend.total_bytes == 1200
+    assert sum(size for _, _, size in backend._scan()) == backend.total_bytes
+
+
+def test_file_backend_keeps_one_lock_per_shard(tmp_path):
+    backend = FileCacheBackend(tmp_path)
+    for index in range(20):
+        backend.set(f"poster-{index}-ab", b"value")
+    backend.delete("poster-3-ab")
+
+    assert sorted(path.name for path in tmp_path.rglob("*.lock")) == [".lock"]
+    assert len(list((tmp_path / "ab").iterdir())) == 20  # 19 entries + the shard lock
+    assert backend.total_bytes == 19 * len(b"value")
+
+
+def test_file_backend_leaves_other_lock_files_alone(tmp_path):
+    other_lock = tmp_path / "ab" / "notes.lock"
+    other_lock.parent.mkdir()
+    other_lock.write_text("mine")
+    backend = FileCacheBackend(tmp_path)
+    backend._scan()
+    assert other_lock.read_text() == "mine"
@@ -0,0 +1,82 @@
+import json
+import time
+
+import modules.corpus_analyzer as corpus_analyzer
+from modules.corpus_analyzer import CorpusStats, analyze_corpus, read_texts
+from modules.prompt_canonicalizer import PromptCanonicalizer
+
+
+def _result(conditions, percentages, tone):
+    return {
+        'key_phrases': {'conditions': conditions, 'percentages': percentages},
+        'tone': {'primary_tone': tone}
+    }
+
+
+def _stub_init_worker():
+    pass
+
+
+def _stub_analyze_chunk(texts):
+    # Earlier chunks take longer, so with several workers they finish last
+    first = int(texts[0].split()[-1])
+    time.sleep(max(0.0, 0.05 - first * 0.002))
+    return [{'seen': text} for text in texts]
+
+
+def test_read_texts_txt(tmp_path):
+    path = tmp_path / "texts.txt"
+    path.write_text("Heart AI 97%\n\n  Lung scans  \n", encoding="utf-8")
+    assert list(read_texts(path)) == ["Heart AI 97%", "Lung scans"]
+
+
+def test_read_texts_jsonl(tmp_path):
+    path = tmp_path / "texts.jsonl"
+    lines = [{'text': "Heart AI"}, {'prompt': "Brain MRI"}, {'id': 3}]
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n\n", encoding="utf-8")
+    assert list(read_texts(path)) == ["Heart AI", "Brain MRI"]
+
+
+def test_read_texts_csv(tmp_path):
+    path = tmp_path / "texts.csv"
+    path.write_text('id,prompt\n1,"Heart AI, 97% accurate"\n2,\n3,Brain MRI\n', encoding="utf-8")
+    assert list(read_texts(path)) == ["Heart AI, 97% accurate", "Brain MRI"]
+
+
+def test_stats_count_the_prompt_inputs():
+    stats = CorpusStats()
+    stats.add(_result(['heart', 'brain'], ['97%'], 'urgent'))
+    stats.add(_result(['heart'], ['97%'], 'urgent'))
+    stats.add(_result([], [], 'professional'))
+
+    summary = stats.to_dict()
+    assert summary['texts'] == 3
+    assert summary['conditions'] == {'heart': 2, 'brain': 1, '(none)': 1}
+    assert summary['tones'] == {'urgent': 2, 'professional': 1}
+    assert summary['percentages'] == {'97%': 2, '(none)': 1}
+    assert summary['combinations'] == [
+        {'condition': 'heart', 'accuracy': '97%', 'tone': 'urgent', 'texts': 2},
+        {'condition': 'medical', 'accuracy': '95%', 'tone': 'professional', 'texts': 1}
+    ]
+    assert len(stats.to_dict(top=1)['combinations']) == 1
+
+
+def test_stats_with_a_canonicalizer():
+    stats = CorpusStats(PromptCanonicalizer((90, 95, 99)))
+    stats.add(_result(['brain', 'cancer'], ['97%'], 'Trustworthy'))
+    stats.add(_result(['cancer'], ['96.5%'], 'trust'))
+    assert stats.to_dict()['combinations'] == [
+        {'condition': 'cancer', 'accuracy': '95%', 'tone': 'trust', 'texts': 2}
+    ]
+
+
+def test_parallel_results_keep_input_order(monkeypatch):
+    monkeypatch.setattr(corpus_analyzer, "_init_worker", _stub_init_worker)
+    monkeypatch.setattr(corpus_analyzer, "_analyze_chunk", _stub_analyze_chunk)
+    texts = (f"text {index}" for index in range(23))  # a generator spanning 12 chunks
+
+    results = list(analyze_corpus(texts, workers=3, chunk_size=2))
+
+    assert [index for index, _, _ in results] == list(range(23))
+    assert [text for _, text, _ in results] == [f"text {index}" for index in range(23)]
+    assert all(result == {'seen': text} for _, text, result in results)
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+from modules import deadline as deadline_module
+from modules.deadline import Deadline, DeadlineExceeded, call_with_deadline
+
+
+def _wait_until_no_abandoned_calls():
+    for _ in range(200):
+        if deadline_module.abandoned_calls() == 0:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_no_budget_never_expires():
+    deadline = Deadline(0)
+    assert deadline.remaining() == float('inf')
+    deadline.check("anything")
+    assert call_with_deadline(deadline, lambda: 42) == 42
+
+
+def test_reserve_expires_earlier():
+    deadline = Deadline(10)
+    child = deadline.with_reserve(4)
+    assert child.remaining() == pytest.approx(deadline.remaining() - 4, abs=0.05)
+
+
+def test_sleep_refuses_to_pass_the_deadline():
+    with pytest.raises(DeadlineExceeded):
+        Deadline(0.05).sleep(1)
+
+
+def test_timed_out_call_is_abandoned_and_counted_until_it_ends():
+    release = threading.Event()
+    with pytest.raises(DeadlineExceeded):
+        call_with_deadline(Deadline(0.05), release.wait)
+    assert deadline_module.abandoned_calls() == 1
+
+    release.set()
+    assert _wait_until_no_abandoned_calls()
+
+
+def test_no_new_calls_once_too_many_are_abandoned(monkeypatch):
+    monkeypatch.setattr(deadline_module, 'MAX_ABANDONED_CALLS', 1)
+    release = threading.Event()
+    started = []
+    try:
+        with pytest.raises(DeadlineExceeded):
+            call_with_deadline(Deadline(0.05), release.wait)
+        with pytest.raises(DeadlineExceeded, match="still running"):
+            call_with_deadline(Deadline(5), lambda: started.append(True))
+        assert started == []
+    finally:
+        release.set()
+        _wait_until_no_abandoned_calls()
+
+
+def test_errors_from_the_call_propagate():
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        call_with_deadline(Deadline(5), fail)
+    assert deadline_module.abandoned_calls() == 0
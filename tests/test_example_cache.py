@@ -0,0 +1,93 @@
+import json
+
+from modules.example_cache import EXAMPLE_SETTINGS, VERSIONED_MODULES, ExampleCache, render_version
+from modules.job_api import JOB_PARAM_DEFAULTS
+from modules.output_store import OutputStore
+
+PROMPTS = ["Heart AI with 97% accuracy", "Lung scans in seconds"]
+SIZES = ["LinkedIn (1200x1200)", "Twitter (1200x675)"]
+
+
+class FakeGenerate:
+    """generate_poster stand-in that stores a poster per call; prompts in `fail` return an error"""
+
+    def __init__(self, store, fail=()):
+        self.store = store
+        self.fail = set(fail)
+        self.calls = []
+
+    def __call__(self, prompt, api_token, *args, priority='interactive'):
+        self.calls.append((prompt, args[5], priority))
+        if prompt in self.fail:
+            return None, "", "❌ API quota exceeded\nmore detail", [], None
+        path = self.store.save(f"{prompt} {args[5]}".encode('utf-8'))
+        return object(), f"Caption for {prompt}", "ok", [], path
+
+
+def _cache(store, version="v1"):
+    return ExampleCache(store, PROMPTS, SIZES, version)
+
+
+def _settings(poster_size):
+    settings = {name: JOB_PARAM_DEFAULTS[name] for name in EXAMPLE_SETTINGS}
+    settings['poster_size'] = poster_size
+    return settings
+
+
+def test_precompute_writes_the_manifest(tmp_path):
+    store = OutputStore(tmp_path)
+    generate = FakeGenerate(store)
+    cache = _cache(store)
+
+    assert cache.precompute(generate, "hf_token") == (4, 0, 0)
+    assert {priority for _, _, priority in generate.calls} == {'batch'}
+    manifest = json.loads((tmp_path / "examples.json").read_text())
+    assert len(manifest) == 4
+    assert {entry['version'] for entry in manifest.values()} == {"v1"}
+
+    entry = _cache(store).lookup(PROMPTS[0], _settings(SIZES[1]))
+    assert entry['caption'] == f"Caption for {PROMPTS[0]}"
+    assert entry['poster_size'] == SIZES[1]
+
+    # Up-to-date entries are not rendered again
+    assert _cache(store).precompute(generate, "hf_token") == (0, 4, 0)
+    assert len(generate.calls) == 4
+
+
+def test_lookup_misses(tmp_path):
+    store = OutputStore(tmp_path)
+    cache = _cache(store)
+    cache.precompute(FakeGenerate(store), "hf_token")
+
+    assert cache.lookup("Some other prompt", _settings(SIZES[0])) is None
+    other_settings = dict(_settings(SIZES[0]), inference_steps=JOB_PARAM_DEFAULTS['inference_steps'] + 5)
+    assert cache.lookup(PROMPTS[0], other_settings) is None
+
+    assert _cache(store, version="v2").lookup(PROMPTS[0], _settings(SIZES[0])) is None
+
+    entry = cache.lookup(PROMPTS[1], _settings(SIZES[0]))
+    (tmp_path / entry['output_path']).unlink()
+    assert cache.lookup(PROMPTS[1], _settings(SIZES[0])) is None
+    assert cache.lookup(PROMPTS[1], _settings(SIZES[1])) is not None
+
+
+def test_failed_renders_are_counted_and_not_stored(tmp_path):
+    store = OutputStore(tmp_path)
+    cache = _cache(store)
+    generate = FakeGenerate(store, fail=[PROMPTS[1]])
+
+    assert cache.precompute(generate, "hf_token") == (2, 0, 2)
+    assert cache.lookup(PROMPTS[1], _settings(SIZES[0])) is None
+    manifest = json.loads((tmp_path / "examples.json").read_text())
+    assert {entry['prompt'] for entry in manifest.values()} == {PROMPTS[0]}
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("connection reset")
+
+    assert _cache(store).precompute(crash, "hf_token") == (0, 2, 2)
+
+
+def test_version_covers_backgrounds_and_image_utils():
+    assert 'modules/image_generator.py' in VERSIONED_MODULES
+    assert 'utils/image_utils.py' in VERSIONED_MODULES
+    assert render_version({'a': {'primary': '#000000'}}) != render_version({'a': {'primary': '#FFFFFF'}})
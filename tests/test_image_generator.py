@@ -0,0 +1,80 @@
+import builtins
+import os
+from pathlib import Path
+
+from PIL import Image
+
+from config import COLOR_PALETTES
+from modules.image_generator import DynamicImageGenerator
+
+ICON = DynamicImageGenerator.ICON_SIZE
+
+
+def test_atlas_holds_every_placeholder_without_icon_files(tmp_path):
+    for icons_dir in (tmp_path, tmp_path / "missing"):
+        generator = DynamicImageGenerator(icons_dir)
+        assert set(generator.icon_boxes) == set(DynamicImageGenerator.PLACEHOLDER_ICONS)
+        for name in DynamicImageGenerator.PLACEHOLDER_ICONS:
+            icon = generator.get_icon(name)
+            assert icon.size == (ICON, ICON) and icon.mode == 'RGBA'
+            assert icon.getbbox() is not None  # something was drawn
+
+
+def test_icon_files_override_placeholders(tmp_path):
+    Image.new('RGBA', (40, 40), (0, 255, 0, 255)).save(tmp_path / "heart.png")
+    Image.new('RGB', (256, 256), (0, 0, 255)).save(tmp_path / "lungs.png")
+    (tmp_path / "notes.txt").write_text("not an icon")
+
+    generator = DynamicImageGenerator(tmp_path)
+    heart = generator.get_icon("heart")
+    assert heart.size == (ICON, ICON)
+    assert heart.getpixel((ICON // 2, ICON // 2)) == (0, 255, 0, 255)
+    assert generator.get_icon("lungs").getpixel((5, 5)) == (0, 0, 255, 255)
+    assert set(generator.icon_boxes) == set(DynamicImageGenerator.PLACEHOLDER_ICONS) | {"lungs"}
+
+    placeholder = DynamicImageGenerator(tmp_path / "missing").get_icon("brain")
+    assert generator.get_icon("brain").tobytes() == placeholder.tobytes()
+    assert generator.get_icon("unknown") is None
+
+
+def test_conditions_map_to_icons(tmp_path):
+    generator = DynamicImageGenerator(tmp_path)
+    assert generator._icons_for({'conditions': ['heart']}) == ["heart", "ecg"]
+    assert generator._icons_for({'conditions': ['heart', 'diabetes']}) == ["heart", "ecg", "diabetes", "pill"]
+    assert generator._icons_for({'conditions': ['kidney']}) == ["hospital", "doctor"]
+    assert generator._icons_for({'conditions': []}) == ["hospital", "doctor"]
+    assert generator._icons_for({}) == ["hospital", "doctor"]
+
+
+def test_generate_image_does_not_touch_the_filesystem(tmp_path, monkeypatch):
+    Image.new('RGBA', (40, 40), (0, 255, 0, 255)).save(tmp_path / "heart.png")
+    generator = DynamicImageGenerator(tmp_path)
+
+    accesses = []
+
+    def recording(name, original):
+        def wrapper(*args, **kwargs):
+            accesses.append((name, args))
+            return original(*args, **kwargs)
+        return wrapper
+
+    images = []
+    with monkeypatch.context() as patch:
+        for target, name in [(Path, "exists"), (Path, "glob"), (Path, "iterdir"), (Path, "stat"),
+                             (Path, "open"), (os, "scandir"), (os, "listdir"), (os, "stat"),
+                             (builtins, "open"), (Image, "open")]:
+            patch.setattr(target, name, recording(name, getattr(target, name)))
+        for conditions in (['heart'], ['brain', 'cancer'], []):
+            images.append(generator.generate_image(
+                {'conditions': conditions}, {'primary_tone': 'professional'},
+                COLOR_PALETTES['professional'], size=(320, 240)
+            ))
+
+    assert accesses == []
+    assert all(image.size == (320, 240) and image.mode == 'RGB' for image in images)
+
+
+def test_generate_image_is_deterministic(tmp_path):
+    generator = DynamicImageGenerator(tmp_path)
+    args = ({'conditions': ['heart']}, {'primary_tone': 'urgent'}, COLOR_PALETTES['urgent'], (200, 200))
+    assert generator.generate_image(*args).tobytes() == generator.generate_image(*args).tobytes()
@@ -0,0 +1,56 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from modules.job_api import create_job_router
+
+
+class FakeJobQueue:
+    """JobQueue.get over a dict, all the poster endpoint needs"""
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+
+def _done_job(job_id, result_path):
+    return {
+        'id': job_id, 'status': 'done', 'stage': 'done', 'progress': 1.0, 'error': None,
+        'created_at': 0.0, 'updated_at': 0.0, 'result_path': str(result_path), 'caption': "", 'status_log': ""
+    }
+
+
+@pytest.fixture
+def client_for():
+    def build(**jobs):
+        app = FastAPI()
+        app.include_router(create_job_router(FakeJobQueue(jobs)))
+        return TestClient(app)
+    return build
+
+
+@pytest.mark.parametrize("name, media_type", [("poster.png", "image/png"), ("poster.tif", "image/tiff")])
+def test_poster_media_type_follows_the_file(tmp_path, client_for, name, media_type):
+    path = tmp_path / name
+    Image.new("RGB", (4, 4), "white").save(path)
+    client = client_for(job=_done_job("job", path))
+
+    response = client.get("/api/jobs/job/poster")
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == media_type
+    assert response.content == path.read_bytes()
+
+
+def test_swept_poster_is_404(tmp_path, client_for):
+    client = client_for(job=_done_job("job", tmp_path / "gone.png"))
+    assert client.get("/api/jobs/job/poster").status_code == 404
+
+
+def test_unfinished_job_is_409(tmp_path, client_for):
+    client = client_for(job=dict(_done_job("job", tmp_path / "p.png"), status='running', result_path=None))
+    assert client.get("/api/jobs/job/poster").status_code == 409
+    assert client.get("/api/jobs/other/poster").status_code == 404
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from modules.job_queue import JobQueue
+
+
+def _wait_for_status(queue, job_id, statuses, timeout=5):
+    deadline = time.time() + timeout
+    while queue.get(job_id)['status'] not in statuses:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+
+def test_job_runs_to_done(tmp_path):
+    def run_job(params, progress):
+        progress('analysis')
+        progress('save')
+        return "poster.png", f"caption for {params['prompt']}", "ok"
+
+    queue = JobQueue(tmp_path / "jobs.sqlite3", run_job, num_workers=1, poll_interval=0.05)
+    job = _wait_for_status(queue, queue.submit({'prompt': "AI"}), ('done', 'failed'))
+
+    assert (job['status'], job['result_path'], job['caption'], job['progress']) == ('done', "poster.png", "caption for AI", 1.0)
+
+
+def test_running_job_stops_at_the_next_stage_after_cancel(tmp_path):
+    started = threading.Event()
+    resume = threading.Event()
+    stages = []
+
+    def run_job(params, progress):
+        progress('analysis')
+        started.set()
+        resume.wait(5)
+        progress('layout')  # raises JobCancelled
+        stages.append('layout')
+        return "poster.png", "", "ok"
+
+    queue = JobQueue(tmp_path / "jobs.sqlite3", run_job, num_workers=1, poll_interval=0.05)
+    job_id = queue.submit({'prompt': "AI"})
+    assert started.wait(5)
+    assert queue.cancel(job_id)
+    resume.set()
+
+    job = _wait_for_status(queue, job_id, ('cancelled', 'done', 'failed'))
+    assert job['status'] == 'cancelled'
+    assert job['result_path'] is None
+    assert stages == []
@@ -0,0 +1,91 @@
+import json
+import sqlite3
+
+from modules.ledger import LEDGER_COLUMNS, GenerationLedger, _percentile, report
+
+
+def _rows(db_path):
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    try:
+        return conn.execute("SELECT * FROM generations ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def _entry(seconds, **extra):
+    entry = {
+        'param_hash': "p", 'prompt_hash': "h1", 'prompt': "heart poster", 'model': "sdxl",
+        'steps': 25, 'size': "LinkedIn (1200x1200)", 'outcome': 'ok', 'cache_outcome': 'miss',
+        'total_seconds': seconds, 'stage_timings': {'analysis': 0.1, 'api': seconds - 0.1}
+    }
+    entry.update(extra)
+    return entry
+
+
+def test_records_are_written_on_close(tmp_path):
+    db_path = tmp_path / "ledger.sqlite3"
+    ledger = GenerationLedger(db_path, flush_interval=0.05, batch_size=3)
+    for seconds in (1.0, 2.0, 3.0, 4.0, 5.0):
+        ledger.record(**_entry(seconds))
+    ledger.record(**_entry(9.0, outcome='error', error="boom", retries=2))
+    ledger.close()
+    assert not ledger._writer.is_alive()
+
+    rows = _rows(db_path)
+    assert [row['total_seconds'] for row in rows] == [1.0, 2.0, 3.0, 4.0, 5.0, 9.0]
+    assert rows[-1]['outcome'] == 'error' and rows[-1]['error'] == "boom" and rows[-1]['retries'] == 2
+    assert rows[0]['retries'] == 0 and rows[0]['created_at'] > 0
+    assert json.loads(rows[0]['stage_timings']) == {'analysis': 0.1, 'api': 0.9}
+    assert {column for column in LEDGER_COLUMNS} <= set(rows[0].keys())
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        conn.close()
+
+
+def test_writer_flushes_without_close(tmp_path):
+    db_path = tmp_path / "ledger.sqlite3"
+    ledger = GenerationLedger(db_path, flush_interval=0.02, batch_size=100)
+    ledger.record(**_entry(1.5))
+    for _ in range(100):
+        if _rows(db_path):
+            break
+        ledger._closed.wait(0.02)
+    assert [row['total_seconds'] for row in _rows(db_path)] == [1.5]
+    ledger.close()
+
+
+def test_nearest_rank_percentiles():
+    values = list(range(1, 101))
+    assert [_percentile(values, pct) for pct in (50, 90, 99)] == [50, 90, 99]
+    assert _percentile([7], 99) == 7
+    assert _percentile([], 50) is None
+
+
+def test_report_percentiles(tmp_path, capsys):
+    db_path = tmp_path / "ledger.sqlite3"
+    ledger = GenerationLedger(db_path, flush_interval=0.01)
+    for seconds in range(1, 11):
+        ledger.record(**_entry(float(seconds)))
+    ledger.record(**_entry(0.5, cache_outcome='pixels', prompt_hash="h2", quality='draft'))
+    ledger.close()
+
+    report(db_path)
+    output = capsys.readouterr().out
+    assert "11 generation(s)" in output
+    full = next(line for line in output.splitlines() if "LinkedIn (1200x1200)" in line and "draft" not in line)
+    assert full.split()[-5:] == ["10", "5.00", "9.00", "10.00", "0"]  # n, p50, p90, p99, retries
+    draft = next(line for line in output.splitlines() if "[draft]" in line)
+    assert draft.split()[-5:] == ["1", "0.50", "0.50", "0.50", "0"]
+    assert "Background cache hit rate: 1/11" in output
+    assert "10x  heart poster" in output
+
+
+def test_report_on_an_empty_ledger(tmp_path, capsys):
+    db_path = tmp_path / "ledger.sqlite3"
+    GenerationLedger(db_path, flush_interval=0.01).close()
+    report(db_path)
+    assert "No generations recorded" in capsys.readouterr().out
@@ -0,0 +1,75 @@
+import pytest
+
+from modules import model_warmer
+from modules.model_warmer import ModelWarmer
+
+MODELS = {"Fast": "org/fast", "Slow": "org/slow"}
+SHAPE = dict(steps=4, size=(1024, 1024))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(model_warmer.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_status_follows_observed_latencies(clock):
+    warmer = ModelWarmer(MODELS, warm_ttl=900, cold_factor=3.0)
+    assert warmer.status("org/fast") == 'unknown'
+
+    warmer.observe("org/fast", 2.0, **SHAPE)
+    clock[0] += 100
+    warmer.observe("org/fast", 2.5, **SHAPE)  # answered fast after ~100s idle
+    assert warmer.status("org/fast") == 'warm'
+
+    clock[0] += 600
+    warmer.observe("org/fast", 20.0, **SHAPE)  # 10x the fastest: a cold start after ~580s idle
+    clock[0] += 500
+    assert warmer.status("org/fast") == 'warm'
+    clock[0] += 100
+    assert warmer.status("org/fast") == 'cold'  # past the learned window, well before warm_ttl
+    assert "· 20.0s" not in warmer.label("Fast")
+
+
+def test_fast_answers_after_long_idle_extend_the_window(clock):
+    warmer = ModelWarmer(MODELS, warm_ttl=300)
+    warmer.observe("org/fast", 2.0, **SHAPE)
+    clock[0] += 1200
+    warmer.observe("org/fast", 2.1, **SHAPE)
+    clock[0] += 1000
+    assert warmer.status("org/fast") == 'warm'
+
+
+def test_loading_expires_and_is_repinged(clock):
+    warmer = ModelWarmer(MODELS, interval=600, loading_timeout=120)
+    warmer.observe("org/slow", None, loading=True)
+    assert warmer.status("org/slow") == 'loading'
+    assert warmer._next_wait() == 120
+
+    clock[0] += 121
+    assert warmer.status("org/slow") == 'cold'
+
+    warmer.observe("org/slow", 30.0, **SHAPE)
+    assert warmer.status("org/slow") == 'warm'
+    assert warmer._next_wait() == 600
+
+
+def test_warm_up_pings_only_models_without_recent_traffic(clock):
+    pinged = []
+
+    class Generator:
+        def __init__(self, name):
+            self.name = name
+
+        def ping(self):
+            pinged.append(self.name)
+            return 1.5
+
+    warmer = ModelWarmer(MODELS, get_generator=lambda token, name: Generator(name), api_token="hf_x")
+    warmer.observe("org/fast", 2.0, **SHAPE)
+
+    results = warmer.warm_up()
+
+    assert pinged == ["Slow"]
+    assert results == {"Fast": 'skipped (recent traffic)', "Slow": "warm (1.5s)"}
@@ -0,0 +1,86 @@
+import os
+import time
+
+from modules.output_store import OutputStore
+
+
+def test_identical_posters_are_stored_once(tmp_path):
+    store = OutputStore(tmp_path)
+    first = store.save(b"poster", {'caption': "one"})
+    second = store.save(b"poster", {'caption': "two"})
+    assert first == second
+    assert store.stats() == {'entries': 1, 'bytes': 6}
+    digest = os.path.basename(first)[:-4]
+    assert store.metadata(digest)['caption'] == "two"
+
+
+def test_index_survives_a_restart(tmp_path):
+    path = OutputStore(tmp_path).save(b"poster")
+    reopened = OutputStore(tmp_path)
+    assert reopened.stats() == {'entries': 1, 'bytes': 6}
+    assert os.path.exists(path)
+
+
+def test_sweep_removes_expired_entries(tmp_path):
+    store = OutputStore(tmp_path, max_age_seconds=0.05)
+    path = store.save(b"old poster", {'caption': "old"})
+    time.sleep(0.1)
+    assert store.sweep() == 1
+    assert not os.path.exists(path)
+    assert not os.path.exists(path[:-4] + ".json")
+    assert store.stats() == {'entries': 0, 'bytes': 0}
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    store = OutputStore(tmp_path, max_total_bytes=25)
+    oldest = store.save(b"a" * 10)
+    middle = store.save(b"b" * 10)
+    store.save(b"a" * 10)  # touching the oldest makes it the most recent
+    newest = store.save(b"c" * 10)
+    assert not os.path.exists(middle)
+    assert os.path.exists(oldest) and os.path.exists(newest)
+    assert store.stats() == {'entries': 2, 'bytes': 20}
+    assert OutputStore(tmp_path).stats() == {'entries': 2, 'bytes': 20}
+
+
+def test_save_file_moves_the_source(tmp_path):
+    store = OutputStore(tmp_path / "store")
+    source = tmp_path / "print.tif.tmp"
+    source.write_bytes(b"tiff data")
+    path = store.save_file(source, {'print': True}, suffix=".tif")
+    assert path.endswith(".tif")
+    assert not source.exists()
+    with open(path, "rb") as f:
+        assert f.read() == b"tiff data"
+
+
+def test_thumbnails_share_the_poster_entry(tmp_path):
+    from PIL import Image
+    from utils.image_utils import thumbnail_pyramid
+
+    pyramid = thumbnail_pyramid(Image.new("RGB", (600, 600)))
+    store = OutputStore(tmp_path, max_age_seconds=0.5)
+    path = store.save(b"poster")
+    digest = os.path.basename(path)[:-4]
+    manifest = store.save_thumbnails(path, pyramid)
+
+    assert store.thumbnails(digest) == manifest
+    assert store.stats() == {'entries': 1, 'bytes': 6 + manifest['total_bytes']}
+    assert OutputStore(tmp_path).stats() == store.stats()
+
+    time.sleep(0.6)
+    assert store.sweep() == 1
+    assert store.thumbnails(digest) is None
+    assert list(tmp_path.glob("*/*.webp")) == []
+
+
+def test_sweep_compacts_the_journal(tmp_path):
+    store = OutputStore(tmp_path)
+    store.JOURNAL_COMPACT_RATIO, store.JOURNAL_SLACK = 2, 5
+    for _ in range(50):
+        store.save(b"same poster")  # every save appends a 'put' for the same entry
+    store.save(b"other poster")
+
+    lines = (tmp_path / "index.journal").read_text().splitlines()
+    assert len(lines) <= 2 * 2 + 5 + 1
+    assert OutputStore(tmp_path).stats() == store.stats() == {'entries': 2, 'bytes': 23}
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules.pipeline import TaskGraph
+from modules.profiling import TaskProfiles
+
+
+def test_tasks_receive_dependency_results():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        graph = TaskGraph(executor)
+        graph.add('a', lambda: 2)
+        graph.add('b', lambda: 3)
+        graph.add('sum', lambda a, b: a + b, deps=('a', 'b'))
+        assert graph.result('sum', timeout=5) == 5
+        assert set(graph.timings) == {'a', 'b', 'sum'}
+
+
+def test_failed_dependency_fails_dependents():
+    def broken():
+        raise RuntimeError("no palette")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        graph = TaskGraph(executor)
+        graph.add('colors', broken)
+        graph.add('layout', lambda colors: colors, deps=('colors',))
+        with pytest.raises(RuntimeError, match="no palette"):
+            graph.result('layout', timeout=5)
+
+
+def test_task_profiles_are_recorded_before_results_are_visible():
+    profiles = TaskProfiles()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        graph = TaskGraph(executor, task_profiles=profiles)
+        graph.add('work', lambda: sum(range(10000)))
+        graph.result('work', timeout=5)
+        profilers, timings = profiles.snapshot()
+    assert list(timings) == ['work']
+    assert len(profilers) == 1
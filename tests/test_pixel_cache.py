@@ -0,0 +1,69 @@
+import os
+
+import pytest
+from PIL import Image
+
+from modules.pixel_cache import MmapPixelCache
+
+SIZE = (40, 30)
+ENTRY_BYTES = SIZE[0] * SIZE[1] * 3
+
+
+def _image(color):
+    return Image.new("RGB", SIZE, color)
+
+
+def test_round_trip_after_promotion(tmp_path):
+    cache = MmapPixelCache(tmp_path, promote_after=2)
+    key = cache.key("background", SIZE)
+    assert cache.get(key, SIZE) is None
+    assert not cache.record_use(key)
+    assert cache.record_use(key)
+
+    assert cache.put(key, _image("red"))
+    image = cache.get(key, SIZE)
+    assert image.size == SIZE and image.getpixel((5, 5)) == (255, 0, 0)
+    assert cache.stats()['hits'] == 1
+
+
+def test_size_cap_holds_across_processes(tmp_path):
+    # Two instances on one directory stand in for two worker processes
+    first = MmapPixelCache(tmp_path, max_bytes=ENTRY_BYTES * 3, idle_seconds=0)
+    second = MmapPixelCache(tmp_path, max_bytes=ENTRY_BYTES * 3, idle_seconds=0)
+    for index, color in enumerate(["red", "green"]):
+        first.put(first.key(color), _image(color))
+        os.utime(first._path(first._stem(first.key(color), SIZE)), (index, index))
+    for color in ["blue", "white"]:
+        second.put(second.key(color), _image(color))
+
+    assert len(list(tmp_path.glob("*.rgb"))) == 3
+    assert second.stats()['bytes'] == ENTRY_BYTES * 3
+    assert second.get(second.key("red"), SIZE) is None  # the other process's oldest entry went first
+    assert first.get(first.key("red"), SIZE) is None
+    assert first.get(first.key("green"), SIZE).getpixel((0, 0)) == (0, 128, 0)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="needs /proc")
+def test_get_leaves_no_mapping_open(tmp_path):
+    cache = MmapPixelCache(tmp_path)
+    key = cache.key("background")
+    cache.put(key, _image("blue"))
+    path = str(cache._path(cache._stem(key, SIZE)))
+
+    image = cache.get(key, SIZE)
+
+    with open("/proc/self/maps") as maps:
+        assert path not in maps.read()
+    assert image.getpixel((0, 0)) == (0, 0, 255)
+
+
+def test_truncated_entry_is_a_miss_and_removed(tmp_path):
+    cache = MmapPixelCache(tmp_path)
+    key = cache.key("background")
+    cache.put(key, _image("blue"))
+    path = cache._path(cache._stem(key, SIZE))
+    path.write_bytes(b"\0" * 10)
+
+    assert cache.get(key, SIZE) is None
+    assert not path.exists()
+    assert cache.stats()['entries'] == 0
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from modules.print_renderer import print_pixel_size
+from utils.image_utils import StripTiffWriter
+
+
+def _pixels(width, height):
+    return np.random.RandomState(1).randint(0, 255, (height, width, 3)).astype(np.uint8)
+
+
+@pytest.mark.parametrize("rows_per_strip, compress", [(7, True), (7, False), (64, True)])
+def test_strip_tiff_round_trips(tmp_path, rows_per_strip, compress):
+    pixels = _pixels(33, 50)
+    path = tmp_path / "poster.tif"
+    with StripTiffWriter(path, (33, 50), rows_per_strip=rows_per_strip, dpi=300, compress=compress) as writer:
+        for top in range(0, 50, rows_per_strip):
+            writer.write_strip(pixels[top:top + rows_per_strip].tobytes())
+
+    with Image.open(path) as image:
+        assert image.size == (33, 50) and image.mode == 'RGB'
+        assert tuple(round(value) for value in image.info['dpi']) == (300, 300)
+        assert np.array_equal(np.asarray(image), pixels)
+
+
+def test_strip_layout_is_checked(tmp_path):
+    pixels = _pixels(10, 10)
+    writer = StripTiffWriter(tmp_path / "poster.tif", (10, 10), rows_per_strip=4)
+    with pytest.raises(ValueError):
+        writer.write_strip(pixels[:3].tobytes())
+    writer.write_strip(pixels[:4].tobytes())
+    with pytest.raises(ValueError):
+        writer.close()  # only 4 of 10 rows
+    assert not (tmp_path / "poster.tif").exists()
+
+
+def test_failed_render_leaves_no_file(tmp_path):
+    path = tmp_path / "poster.tif"
+    with pytest.raises(RuntimeError):
+        with StripTiffWriter(path, (10, 10), rows_per_strip=4) as writer:
+            writer.write_strip(_pixels(10, 4).tobytes())
+            raise RuntimeError("render failed")
+    assert not path.exists()
+
+
+def test_print_pixel_size():
+    assert print_pixel_size((297, 420), 300) == (3508, 4961)
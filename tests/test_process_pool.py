@@ -0,0 +1,53 @@
+from PIL import Image
+
+from config import COLOR_PALETTES, DEFAULT_FONT_PATH, DEFAULT_BOLD_FONT_PATH, DEFAULT_LOGO_PATH
+from modules.branding import Branding
+from modules.layout_designer import EnhancedLayoutDesigner
+from modules.process_pool import (
+    CompositingPool, compose_poster, image_from_shared_memory, image_to_shared_memory
+)
+
+TEXT_ELEMENTS = {
+    'headline': "AI Diagnosis in Minutes",
+    'features': ["95% accuracy", "Instant results"],
+    'cta': "Learn More",
+    'percentage': "95%"
+}
+
+
+def _background():
+    image = Image.new('RGB', (256, 256))
+    image.putdata([(x, y, (x + y) % 256) for y in range(256) for x in range(256)])
+    return image
+
+
+def test_shared_memory_round_trip():
+    image = _background()
+    shm, descriptor = image_to_shared_memory(image)
+    try:
+        assert image_from_shared_memory(descriptor).tobytes() == image.tobytes()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_pool_output_matches_in_process_compose():
+    colors = COLOR_PALETTES['professional']
+    expected, expected_png = compose_poster(
+        EnhancedLayoutDesigner(DEFAULT_FONT_PATH, DEFAULT_BOLD_FONT_PATH), Branding(DEFAULT_LOGO_PATH),
+        _background(), (320, 400), TEXT_ELEMENTS, colors, {'primary_tone': 'professional'},
+        include_logo=True, logo_position='top-right'
+    )
+
+    pool = CompositingPool(DEFAULT_FONT_PATH, DEFAULT_BOLD_FONT_PATH, DEFAULT_LOGO_PATH, max_workers=1)
+    try:
+        poster, png_bytes = pool.compose(
+            _background(), (320, 400), TEXT_ELEMENTS, colors, {'primary_tone': 'professional'},
+            include_logo=True, logo_position='top-right'
+        )
+    finally:
+        pool.shutdown()
+
+    assert png_bytes == expected_png
+    assert poster.size == (320, 400)
+    assert poster.tobytes() == expected.convert('RGB').tobytes()
@@ -0,0 +1,30 @@
+import pytest
+
+from modules.prompt_canonicalizer import PromptCanonicalizer
+
+
+@pytest.mark.parametrize("accuracy, bucket", [
+    ("98%", "95%"),
+    ("99.5%", "99%"),
+    ("95%", "95%"),
+    ("90.0%", "90%"),
+    ("89.9%", "89.9%"),  # below the lowest bucket: unchanged, never rounded up
+    ("80%", "80%"),
+    (None, "95%"),
+    ("n/a", "95%")
+])
+def test_bucket_accuracy(accuracy, bucket):
+    assert PromptCanonicalizer(accuracy_buckets=[99, 90, 95]).bucket_accuracy(accuracy) == bucket
+
+
+def test_equivalent_campaigns_share_a_key():
+    canonicalizer = PromptCanonicalizer()
+    first, _ = canonicalizer.record({'conditions': ['Diabetes', 'cancer'], 'percentages': ['97%']},
+                                    {'primary_tone': 'Professional'}, 'photorealistic')
+    second, distinct = canonicalizer.record({'conditions': ['cancer', 'diabetes'], 'percentages': ['96%']},
+                                            'professional', 'photorealistic')
+    low, _ = canonicalizer.record({'conditions': ['cancer'], 'percentages': ['80%']},
+                                  'professional', 'photorealistic')
+
+    assert first == second and distinct == 2
+    assert low != first
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from modules.scheduler import FairScheduler, QuotaExceeded
+
+
+def _queue_behind_blocker(scheduler, requests):
+    """Hold the only slot, queue `requests` (user, priority) in order, release; return the service order"""
+    served = []
+    release = threading.Event()
+
+    def blocker():
+        with scheduler.slot("tok", user_id="blocker"):
+            release.wait(5)
+
+    def request(user, priority):
+        with scheduler.slot("tok", user_id=user, priority=priority):
+            served.append(user)
+
+    threads = [threading.Thread(target=blocker)]
+    threads[0].start()
+    _wait_for_pending(scheduler, 1)
+    for index, (user, priority) in enumerate(requests, start=2):
+        thread = threading.Thread(target=request, args=(user, priority))
+        thread.start()
+        threads.append(thread)
+        _wait_for_pending(scheduler, index)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return served
+
+
+def _wait_for_pending(scheduler, count):
+    deadline = time.time() + 5
+    while scheduler.pending("tok") < count:
+        assert time.time() < deadline
+        time.sleep(0.005)
+
+
+def test_light_user_is_not_starved_by_a_heavy_one():
+    scheduler = FairScheduler(requests_per_window=100, window_seconds=60, max_concurrent=1)
+    order = _queue_behind_blocker(scheduler, [
+        ("heavy", 'interactive'), ("heavy", 'interactive'), ("heavy", 'interactive'),
+        ("light", 'interactive')
+    ])
+    assert order.index("light") <= 1
+
+
+def test_interactive_requests_go_before_batch():
+    scheduler = FairScheduler(requests_per_window=100, window_seconds=60, max_concurrent=1)
+    order = _queue_behind_blocker(scheduler, [("batch-user", 'batch'), ("person", 'interactive')])
+    assert order == ["person", "batch-user"]
+
+
+def test_exhausted_window_is_rejected_with_an_eta():
+    scheduler = FairScheduler(requests_per_window=2, window_seconds=120, max_concurrent=4)
+    for _ in range(2):
+        with scheduler.slot("tok"):
+            pass
+
+    assert scheduler.estimate_wait("tok") == pytest.approx(120, abs=2)
+    with pytest.raises(QuotaExceeded) as raised:
+        with scheduler.slot("tok", max_wait=5):
+            pass
+    assert raised.value.eta_seconds == pytest.approx(120, abs=2)
+    stats = scheduler.get_stats()["***"]
+    assert (stats['used_in_window'], stats['total_requests'], stats['rejected']) == (2, 2, 1)
+    assert scheduler.headroom("tok") == 0.0
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from modules.speculation import Speculator
+
+
+def test_schedule_returns_at_once_and_runs_only_the_last_edit():
+    speculator = Speculator(debounce_seconds=0.2)
+    runs = []
+    done = threading.Event()
+
+    def edit(text):
+        def run():
+            runs.append(text)
+            done.set()
+            return f"speculated {text}"
+        return run
+
+    started = time.monotonic()
+    for text in ["A", "AI", "AI detects"]:
+        speculator.schedule("user", edit(text))
+    assert time.monotonic() - started < 0.1
+    assert speculator.result("user") is None  # still pending
+
+    assert done.wait(2)
+    time.sleep(0.3)  # superseded timers would have fired by now
+    assert runs == ["AI detects"]
+    assert speculator.result("user") == "speculated AI detects"
+
+
+def test_cancel_drops_a_pending_speculation():
+    speculator = Speculator(debounce_seconds=0.1)
+    runs = []
+    speculator.schedule("user", lambda: runs.append("ran"))
+    speculator.cancel("user")
+    time.sleep(0.3)
+    assert runs == []
+    assert speculator.result("user") is None
+
+
+def test_users_are_debounced_independently():
+    speculator = Speculator(debounce_seconds=0.05)
+    speculator.schedule("alice", lambda: "alice")
+    speculator.schedule("bob", lambda: "bob")
+    time.sleep(0.3)
+    assert (speculator.result("alice"), speculator.result("bob")) == ("alice", "bob")
+
+
+def test_one_speculation_per_key():
+    speculator = Speculator(max_in_flight=2)
+    release = threading.Event()
+    assert speculator.submit("user", "key", lambda: release.wait(2)) == 'started'
+    assert speculator.submit("other", "key", lambda: None) == 'running'
+    assert speculator.submit("user", "key-2", lambda: None) == 'busy'  # the user already has one running
+    release.set()
+    assert speculator.claim("key").result(2) is True
+    assert speculator.status("key") == 'ready'
@@ -0,0 +1,77 @@
+import copy
+
+from modules.stage_cache import StageCache, fingerprint
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, value):
+        def compute():
+            self.calls += 1
+            return value
+        return compute
+
+
+def test_fingerprint_is_stable_and_input_sensitive():
+    assert fingerprint("analysis", ("prompt", "Auto-detect")) == fingerprint("analysis", ("prompt", "Auto-detect"))
+    assert fingerprint("analysis", ("prompt", "Auto-detect")) != fingerprint("analysis", ("prompt", "Urgent"))
+    assert len(fingerprint("x")) == 16
+
+
+def test_hit_and_miss_per_fingerprint():
+    cache = StageCache()
+    compute = Counter()
+
+    assert cache.get_or_compute('analysis', ("heart",), compute("A")) == ("A", False)
+    assert cache.get_or_compute('analysis', ("heart",), compute("B")) == ("A", True)
+    assert cache.get_or_compute('analysis', ("brain",), compute("C")) == ("C", False)
+    assert compute.calls == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_each_stage_keeps_only_its_latest_result():
+    cache = StageCache()
+    cache.get_or_compute('background', ("heart",), lambda: "heart image")
+    cache.get_or_compute('background', ("brain",), lambda: "brain image")
+
+    # The heart result was replaced, so asking for it again recomputes
+    assert cache.get_or_compute('background', ("heart",), lambda: "heart again") == ("heart again", False)
+    assert len(cache._entries) == 1
+
+
+def test_upstream_change_invalidates_downstream_stages():
+    cache = StageCache()
+    cache.get_or_compute('analysis', ("heart",), lambda: "phrases")
+    cache.get_or_compute('enhanced', ("sharpen",), lambda: "enhanced 1", depends_on=('analysis',))
+    assert cache.get_or_compute('enhanced', ("sharpen",), lambda: "x", depends_on=('analysis',))[1]
+
+    cache.get_or_compute('analysis', ("brain",), lambda: "other phrases")
+    assert cache.get_or_compute('enhanced', ("sharpen",), lambda: "enhanced 2", depends_on=('analysis',)) \
+        == ("enhanced 2", False)
+
+
+def test_invalidate():
+    cache = StageCache()
+    cache.get_or_compute('analysis', (1,), lambda: "a")
+    cache.get_or_compute('background', (1,), lambda: "b")
+    cache.invalidate('analysis')
+    assert cache.key_of('analysis') is None and cache.key_of('background') is not None
+    cache.invalidate()
+    assert cache.key_of('background') is None
+
+
+def test_deepcopy_gives_each_session_its_own_empty_cache():
+    # gr.State deep-copies its default value for every session
+    default = StageCache()
+    default.get_or_compute('analysis', ("heart",), lambda: "phrases")
+
+    first, second = copy.deepcopy(default), copy.deepcopy(default)
+    assert isinstance(first, StageCache) and first is not default
+    assert first.key_of('analysis') is None
+    assert (first.hits, first.misses) == (0, 0)
+
+    first.get_or_compute('analysis', ("brain",), lambda: "brain phrases")
+    assert second.key_of('analysis') is None
+    assert default.get_or_compute('analysis', ("heart",), lambda: "recomputed") == ("phrases", True)
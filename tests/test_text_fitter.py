@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import pytest
+
+from config import COLOR_PALETTES
+from modules.layout_designer import EnhancedLayoutDesigner
+from modules.text_fitter import TextFitter
+
+FONT = Path(__file__).resolve().parent.parent / "assets" / "fonts" / "Roboto-Bold.ttf"
+
+
+@pytest.fixture
+def fitter():
+    return TextFitter(FONT, min_size=12, max_size=120, line_spacing=1.1)
+
+
+def test_chosen_size_is_the_largest_that_fits(fitter):
+    text = "AI detects heart disease early"
+    result = fitter.fit(text, 600, 200, max_lines=2)
+    assert fitter._fits(text, result.size, 600, 200, 2) == result.lines
+    assert fitter._fits(text, result.size + 1, 600, 200, 2) is None
+    assert fitter.min_size < result.size < fitter.max_size
+
+
+def test_wrapped_lines_fit_the_width(fitter):
+    text = "Transforming cardiac care with early and accurate detection"
+    result = fitter.fit(text, 400, 300, max_lines=3)
+    assert 1 < len(result.lines) <= 3
+    assert " ".join(result.lines) == text
+    for line in result.lines:
+        assert fitter.width(line, result.size) <= 400
+    assert len(result.lines) * result.line_height <= 300
+
+
+def test_long_word_stops_at_min_size(fitter):
+    result = fitter.fit("Pneumonoultramicroscopicsilicovolcanoconiosis", 80, 200)
+    assert result.size == fitter.min_size
+    assert result.lines == ["Pneumonoultramicroscopicsilicovolcanoconiosis"]
+
+
+def test_tiny_box_stops_at_min_size_with_an_ellipsis(fitter):
+    result = fitter.fit("one two three four five six seven eight nine ten", 60, 10, max_lines=2)
+    assert result.size == fitter.min_size
+    assert len(result.lines) == 2
+    assert result.lines[-1].endswith("…")
+
+
+def test_fit_lines_keeps_each_text_on_one_line(fitter):
+    texts = ["98% accuracy", "Real-time analysis", "FDA cleared"]
+    result = fitter.fit_lines(texts, 500, 240, extra_width=1.2)
+    assert result.lines == texts
+    for text in texts:
+        assert fitter.width(text, result.size) + 1.2 * result.size <= 500
+    larger = result.size + 1
+    assert (any(fitter.width(text, larger) + 1.2 * larger > 500 for text in texts)
+            or len(texts) * fitter.line_step(larger) > 240)
+
+
+@pytest.mark.parametrize("size", [(1080, 1080), (1200, 627), (1080, 1920)])
+def test_overlay_height_scales_with_the_poster(size):
+    width, height = size
+    designer = EnhancedLayoutDesigner(FONT, FONT)
+    ops = designer.plan_layout(width, height, {'headline': "AI Heart Screening"}, COLOR_PALETTES['professional'])
+    overlay = [op for op in ops if op[0] == 'overlay']
+    assert len(overlay) == 1
+    _, bbox, params = overlay[0]
+    assert params['height'] == int(height * 0.45)
+    assert bbox == (0, height - int(height * 0.45), width, height)
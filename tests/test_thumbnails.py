@@ -0,0 +1,65 @@
+import io
+import json
+
+from PIL import Image
+
+from utils.image_utils import thumbnail_pyramid, write_thumbnails, thumbnail_manifest_path, save_poster
+
+
+def _poster(size=(1080, 1350)):
+    return Image.new("RGB", size, (30, 120, 200))
+
+
+def test_levels_keep_the_aspect_ratio():
+    pyramid = thumbnail_pyramid(_poster((1200, 1500)))
+    assert [(level['width'], level['height']) for level in pyramid['levels']] == [
+        (1080, 1350), (720, 900), (480, 600), (240, 300)
+    ]
+    for level in pyramid['levels']:
+        decoded = Image.open(io.BytesIO(level['data']))
+        assert decoded.format == "WEBP" and decoded.size == (level['width'], level['height'])
+        assert level['bytes'] == len(level['data'])
+
+
+def test_width_equal_to_the_poster_is_kept():
+    pyramid = thumbnail_pyramid(_poster((1080, 1080)))
+    assert [level['width'] for level in pyramid['levels']] == [1080, 720, 480, 240]
+
+
+def test_widths_larger_than_the_poster_are_skipped():
+    pyramid = thumbnail_pyramid(_poster((500, 500)), widths=(1080, 720, 480, 240))
+    assert [level['width'] for level in pyramid['levels']] == [480, 240]
+
+
+def test_placeholder_is_a_tiny_blurred_level():
+    pyramid = thumbnail_pyramid(_poster((1080, 1350)), placeholder_width=16)
+    placeholder = pyramid['placeholder']
+    assert (placeholder['width'], placeholder['height']) == (16, 20)
+    assert Image.open(io.BytesIO(placeholder['data'])).size == (16, 20)
+
+
+def test_write_thumbnails_manifest(tmp_path):
+    pyramid = thumbnail_pyramid(_poster())
+    manifest = write_thumbnails(pyramid, tmp_path, "poster")
+
+    assert json.loads((tmp_path / "poster.thumbnails.json").read_text()) == manifest
+    assert [level['file'] for level in manifest['levels']] == [
+        "poster_1080w.webp", "poster_720w.webp", "poster_480w.webp", "poster_240w.webp"
+    ]
+    for level in manifest['levels']:
+        assert (tmp_path / level['file']).stat().st_size == level['bytes']
+    assert manifest['placeholder']['data_uri'].startswith("data:image/webp;base64,")
+    assert manifest['total_bytes'] == sum(
+        (tmp_path / name).stat().st_size for name in
+        [level['file'] for level in manifest['levels']] + [manifest['placeholder']['file']]
+    )
+
+
+def test_save_poster_writes_the_pyramid_next_to_the_png(tmp_path):
+    path = save_poster(_poster(), str(tmp_path), "Heart Poster")
+    assert path.endswith("heart_poster.png")
+    assert (tmp_path / "heart_poster_240w.webp").exists()
+    assert thumbnail_manifest_path(path) == str(tmp_path / "heart_poster.thumbnails.json")
+
+    save_poster(_poster(), str(tmp_path), "plain", thumbnail_widths=())
+    assert not (tmp_path / "plain.thumbnails.json").exists()
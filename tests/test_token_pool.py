@@ -0,0 +1,69 @@
+import pytest
+
+from modules.scheduler import FairScheduler, QuotaExceeded
+from modules.token_pool import TokenPool, classify_api_error, load_tokens
+
+
+@pytest.mark.parametrize("message, outcome", [
+    ("429 Client Error: Too Many Requests", 'rate_limited'),
+    ("Rate limit reached for this model", 'rate_limited'),
+    ("You have exceeded your monthly included credits (quota)", 'rate_limited'),
+    ("401 Client Error: Unauthorized", 'invalid'),
+    ("Invalid username or password.", 'invalid'),
+    ("HTTPSConnectionPool(host='api-inference.huggingface.co', port=443): "
+     "Max retries exceeded with url: /models/x", 'error'),
+    ("500 Server Error", 'error')
+])
+def test_classify_api_error(message, outcome):
+    assert classify_api_error(message) == outcome
+
+
+def test_load_tokens_dedupes_in_order(tmp_path):
+    tokens_file = tmp_path / "tokens.txt"
+    tokens_file.write_text("hf_c  # spare\n\nhf_a\n", encoding="utf-8")
+    assert load_tokens(" hf_b, hf_a ,", tokens_file, primary="hf_a") == ["hf_a", "hf_b", "hf_c"]
+
+
+def test_acquire_spreads_load_and_release_returns_tokens():
+    pool = TokenPool(["hf_a", "hf_b"])
+    first, second = pool.acquire(), pool.acquire()
+    assert {first, second} == {"hf_a", "hf_b"}
+    pool.release(first)
+    assert pool.acquire() == first  # now the least loaded again
+    assert [entry['outstanding'] for entry in pool.stats()] == [1, 1]
+
+
+def test_rate_limited_and_invalid_tokens_leave_rotation():
+    pool = TokenPool(["hf_a", "hf_b", "hf_c"], rate_limit_cooldown=60, invalid_cooldown=3600)
+    pool.release(pool.acquire(exclude=("hf_b", "hf_c")), 'rate_limited')
+    pool.release(pool.acquire(exclude=("hf_a", "hf_c")), 'invalid')
+
+    assert pool.available() == ["hf_c"]
+    assert pool.acquire() == "hf_c"
+    assert pool.acquire() == "hf_c"  # still the only one in rotation
+    status = {entry['cooldown_reason'] for entry in pool.stats()}
+    assert status == {'rate limited', 'invalid', None}
+
+
+def test_exclude_is_only_a_preference():
+    pool = TokenPool(["hf_a"])
+    assert pool.acquire(exclude=("hf_a",)) == "hf_a"
+
+
+def test_all_tokens_cooling_down_raises_with_eta():
+    pool = TokenPool(["hf_a", "hf_b"], rate_limit_cooldown=30)
+    for _ in range(2):
+        pool.release(pool.acquire(), 'rate_limited')
+    assert pool.peek() is None
+    with pytest.raises(QuotaExceeded) as raised:
+        pool.acquire()
+    assert 0 < raised.value.eta_seconds <= 30
+
+
+def test_scheduler_headroom_steers_acquire():
+    scheduler = FairScheduler(requests_per_window=2, window_seconds=600)
+    with scheduler.slot("hf_a"):
+        pass
+    pool = TokenPool(["hf_a", "hf_b"], scheduler=scheduler)
+    assert pool.peek() == "hf_b"
+    assert pool.acquire() == "hf_b"
@@ -0,0 +1,35 @@
+from config import COLOR_PALETTES
+from modules.variants import LOGO_POSITIONS, plan_variants
+
+
+def test_first_variant_is_the_users_selection():
+    colors = COLOR_PALETTES['urgent']
+    variants = plan_variants(["Headline A", "Headline B"], colors, "Bottom-left", 4)
+    first = variants[0]
+    assert first['headline'] == "Headline A"
+    assert first['colors'] is colors
+    assert first['palette'] == 'urgent'
+    assert first['logo_position'] == "Bottom-left"
+    assert first['label'] == "#1 • Urgent • Bottom-left"
+
+
+def test_variants_differ_from_their_neighbours():
+    variants = plan_variants(["A", "B", "C"], COLOR_PALETTES['professional'], "Top-right", 4)
+    assert len(variants) == 4
+    for previous, current in zip(variants, variants[1:]):
+        changed = [key for key in ('headline', 'palette', 'logo_position') if previous[key] != current[key]]
+        assert len(changed) >= 2
+
+
+def test_custom_palette_and_unknown_position():
+    custom = {'primary': '#000000', 'secondary': '#111111'}
+    variants = plan_variants([], custom, "Middle", 3)
+    assert variants[0]['palette'] == 'custom'
+    assert variants[0]['colors'] is custom
+    assert variants[0]['headline'] == "AI Medical Diagnosis"
+    assert {v['logo_position'] for v in variants} <= set(LOGO_POSITIONS)
+    assert all(v['colors'] == COLOR_PALETTES[v['palette']] for v in variants[1:])
+
+
+def test_at_least_one_variant():
+    assert len(plan_variants(["A"], COLOR_PALETTES['trust'], "Top-left", 0)) == 1
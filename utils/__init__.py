@@ -1,3 +1,9 @@
-from .image_utils import resize_image, save_poster
+from .image_utils import (
+    resize_image, save_poster, StripTiffWriter,
+    THUMBNAIL_WIDTHS, thumbnail_pyramid, write_thumbnails, thumbnail_manifest_path
+)
 
-__all__ = ['resize_image', 'save_poster']
\ No newline at end of file
+__all__ = [
+    'resize_image', 'save_poster', 'StripTiffWriter',
+    'THUMBNAIL_WIDTHS', 'thumbnail_pyramid', 'write_thumbnails', 'thumbnail_manifest_path'
+]
@@ -1,15 +1,219 @@
-from PIL import Image
+from PIL import Image, ImageFilter
+import base64
+import io
+import json
 import os
+import struct
+import zlib
+
+# Widths of the responsive thumbnail pyramid, largest first
+THUMBNAIL_WIDTHS = (1080, 720, 480, 240)
 
 def resize_image(image, max_size=(1080, 1080)):
     """Resize image while maintaining aspect ratio"""
     image.thumbnail(max_size, Image.Resampling.LANCZOS)
     return image
 
-def save_poster(poster, output_path, filename):
-    """Save generated poster"""
+def save_poster(poster, output_path, filename, thumbnail_widths=THUMBNAIL_WIDTHS):
+    """Save generated poster, plus its thumbnail pyramid unless thumbnail_widths is empty"""
     os.makedirs(output_path, exist_ok=True)
     base_filename = filename.replace(" ", "_").lower()
     full_path = os.path.join(output_path, f"{base_filename}.png")
     poster.save(full_path, "PNG", quality=95)
-    return full_path
\ No newline at end of file
+    if thumbnail_widths:
+        write_thumbnails(thumbnail_pyramid(poster, thumbnail_widths), output_path, base_filename)
+    return full_path
+
+
+def _reduce_to_width(image, width):
+    """Shrink to `width` (aspect kept): integer box reduction, then LANCZOS for the remainder"""
+    height = max(1, round(image.height * width / image.width))
+    factor = image.width // width
+    if factor >= 2:
+        image = image.reduce(factor)
+    if image.size != (width, height):
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+    return image
+
+
+def _encode_webp(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, "WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def thumbnail_pyramid(image, widths=THUMBNAIL_WIDTHS, placeholder_width=16, quality=80):
+    """
+    Encode `image` at several widths as WebP in one pass.
+
+    Levels are made largest first, each resampled from the previous level
+    rather than from the full-size image, so later steps read far fewer
+    pixels. Steps of 2x or more start with an integer box reduction and
+    LANCZOS only covers the remainder; smaller steps are a plain LANCZOS
+    resize. Widths larger than the image are skipped, and a width equal to
+    it is encoded as is.
+    The smallest level is shrunk further into a blurred placeholder.
+
+    Returns {'width', 'height', 'levels', 'placeholder'}; levels and the
+    placeholder are dicts with 'width', 'height', 'bytes' and the WebP 'data'.
+    """
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGB')
+    pyramid = {'width': image.width, 'height': image.height, 'levels': []}
+    level = image
+    for width in sorted({int(width) for width in widths}, reverse=True):
+        if width > level.width or width <= 0:
+            continue
+        level = _reduce_to_width(level, width)
+        data = _encode_webp(level, quality)
+        pyramid['levels'].append({'width': level.width, 'height': level.height, 'bytes': len(data), 'data': data})
+
+    placeholder = _reduce_to_width(level, min(placeholder_width, level.width))
+    placeholder = placeholder.filter(ImageFilter.GaussianBlur(1))
+    data = _encode_webp(placeholder, 40)
+    pyramid['placeholder'] = {
+        'width': placeholder.width, 'height': placeholder.height, 'bytes': len(data), 'data': data
+    }
+    return pyramid
+
+
+def thumbnail_manifest_path(poster_path):
+    """Manifest written by write_thumbnails() for a poster file"""
+    poster_path = str(poster_path)
+    return os.path.splitext(poster_path)[0] + ".thumbnails.json"
+
+
+def write_thumbnails(pyramid, directory, stem):
+    """
+    Write a thumbnail_pyramid() as <stem>_<width>w.webp files, <stem>_placeholder.webp
+    and the manifest <stem>.thumbnails.json; returns the manifest.
+
+    The manifest lists each file with its size and byte count, and embeds the
+    placeholder as a data URI so it can be inlined in the page.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = {'width': pyramid['width'], 'height': pyramid['height'], 'format': 'webp', 'levels': []}
+    for level in pyramid['levels']:
+        name = f"{stem}_{level['width']}w.webp"
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(level['data'])
+        manifest['levels'].append({
+            'file': name, 'width': level['width'], 'height': level['height'], 'bytes': level['bytes']
+        })
+    placeholder = pyramid['placeholder']
+    name = f"{stem}_placeholder.webp"
+    with open(os.path.join(directory, name), "wb") as f:
+        f.write(placeholder['data'])
+    manifest['placeholder'] = {
+        'file': name, 'width': placeholder['width'], 'height': placeholder['height'],
+        'bytes': placeholder['bytes'],
+        'data_uri': "data:image/webp;base64," + base64.b64encode(placeholder['data']).decode('ascii')
+    }
+    manifest['total_bytes'] = sum(level['bytes'] for level in manifest['levels']) + placeholder['bytes']
+    with open(os.path.join(directory, f"{stem}.thumbnails.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class StripTiffWriter:
+    """
+    Streams an RGB image to a baseline TIFF one strip at a time.
+
+    Strips are Deflate-compressed and written as they arrive, and the
+    directory (strip offsets, size, DPI) is appended on close, so memory
+    use depends on the strip size only, never on the image size. A writer
+    that fails or is closed early deletes its partial file.
+    """
+
+    def __init__(self, path, size, rows_per_strip, dpi=300, compress=True):
+        self.path = path
+        self.width, self.height = size
+        self.rows_per_strip = rows_per_strip
+        self.dpi = dpi
+        self.compress = compress
+        self.strip_offsets = []
+        self.strip_byte_counts = []
+        self.rows_written = 0
+        self._file = open(path, "wb")
+        self._file.write(b"II*\x00" + struct.pack("<I", 0))  # directory offset patched on close
+
+    def write_strip(self, data):
+        """Append the next strip (raw RGB bytes, rows_per_strip rows except the last)"""
+        rows = len(data) // (self.width * 3)
+        if rows != min(self.rows_per_strip, self.height - self.rows_written):
+            raise ValueError(f"Strip of {rows} rows at row {self.rows_written} does not match the layout")
+        if self.compress:
+            data = zlib.compress(data, 6)
+        self.strip_offsets.append(self._file.tell())
+        self.strip_byte_counts.append(len(data))
+        self._file.write(data)
+        self.rows_written += rows
+
+    def close(self):
+        """Write the image directory and close the file"""
+        if self._file.closed:
+            return
+        if self.rows_written != self.height:
+            self.abort()
+            raise ValueError(f"Only {self.rows_written} of {self.height} rows were written")
+
+        f = self._file
+        if f.tell() % 2:
+            f.write(b"\x00")  # TIFF offsets are word-aligned
+
+        def put_values(fmt, values):
+            offset = f.tell()
+            f.write(struct.pack("<" + fmt * len(values), *values))
+            return offset
+
+        count = len(self.strip_offsets)
+        bits_offset = put_values("H", [8, 8, 8])
+        offsets_offset = put_values("I", self.strip_offsets) if count > 1 else self.strip_offsets[0]
+        counts_offset = put_values("I", self.strip_byte_counts) if count > 1 else self.strip_byte_counts[0]
+        resolution_offset = put_values("I", [int(self.dpi), 1])
+
+        # (tag, type, count, value or offset); types: 3 SHORT, 4 LONG, 5 RATIONAL
+        entries = [
+            (256, 4, 1, self.width),
+            (257, 4, 1, self.height),
+            (258, 3, 3, bits_offset),
+            (259, 3, 1, 8 if self.compress else 1),  # Adobe Deflate or none
+            (262, 3, 1, 2),  # RGB
+            (273, 4, count, offsets_offset),
+            (277, 3, 1, 3),
+            (278, 4, 1, self.rows_per_strip),
+            (279, 4, count, counts_offset),
+            (282, 5, 1, resolution_offset),
+            (283, 5, 1, resolution_offset),
+            (284, 3, 1, 1),  # chunky
+            (296, 3, 1, 2)  # inches
+        ]
+        directory_offset = f.tell()
+        f.write(struct.pack("<H", len(entries)))
+        for tag, field_type, value_count, value in entries:
+            if field_type == 3 and value_count == 1:
+                f.write(struct.pack("<HHIHH", tag, field_type, value_count, value, 0))
+            else:
+                f.write(struct.pack("<HHII", tag, field_type, value_count, value))
+        f.write(struct.pack("<I", 0))
+        f.seek(4)
+        f.write(struct.pack("<I", directory_offset))
+        f.close()
+
+    def abort(self):
+        """Close and delete the unfinished file"""
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()